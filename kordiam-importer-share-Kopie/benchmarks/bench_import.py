@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Import benchmark
+Runs the importer end to end against the local Kordiam stub server on synthetic
+workbooks and reports rows/sec, p50/p99 latency of element creates, peak RSS and
+the importer's own phase timings (results['timings']).
+
+Each scenario runs in its own process so peak RSS is not inflated by earlier
+scenarios, and the stub server runs in another so it does not compete with the
+importer for the GIL.
+
+Usage:
+    python benchmarks/bench_import.py --rows 1000 10000 100000 --workers 8 --latency 0.02
+    python benchmarks/bench_import.py --rows 10000 --output current.json
+    python benchmarks/bench_import.py --rows 10000 --baseline current.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from create_kordiam_example_clean import create_synthetic_workbook
+
+MODES = ('default', 'stream', 'pipeline')
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB.
+    
+    Uses the resource module where it exists (Linux, macOS), psutil's peak working
+    set on Windows, and returns None if neither is available.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        # peak_wset is Windows only; elsewhere the current RSS is the best estimate
+        return round(getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024), 1)
+    return None
+
+
+def run_scenario(scenario):
+    """Import one workbook against the stub and measure it (runs in a child process)."""
+    from kordiam_excel_importer import KordiamConfig, KordiamImporter
+    
+    logging.basicConfig(level=logging.CRITICAL)
+    with open(scenario['mapping'], 'r') as f:
+        mapping_config = json.load(f)
+    
+    config = KordiamConfig(scenario['base_url'], 'bench', 'bench', max_retries=5, backoff_base=0.01)
+    importer = KordiamImporter(config, max_workers=scenario['workers'])
+    
+    mode = scenario['mode']
+    started = time.perf_counter()
+    results = importer.import_from_excel(
+        scenario['workbook'],
+        mapping_config,
+        stream=mode == 'stream',
+        pipeline=mode == 'pipeline',
+        chunk_size=scenario['chunk_size']
+    )
+    total = time.perf_counter() - started
+    
+    # Phases as the importer measured them; the token request is its own phase and
+    # not one of the element requests
+    timings = results['timings']
+    phases = {name: summary['total_seconds'] for name, summary in timings['phases'].items()}
+    requests = timings['http'].values()
+    phases['http'] = sum(summary['total_seconds'] for summary in requests)  # Summed over workers
+    phases['total'] = total
+    created = timings['http'].get('POST 201')
+    
+    return {
+        'rows': scenario['rows'],
+        'mode': mode,
+        'workers': scenario['workers'],
+        'success': results['success'],
+        'errors': results['errors'],
+        'rows_per_sec': round(scenario['rows'] / total, 1),
+        'p50_ms': created['p50_ms'] if created else None,
+        'p99_ms': created['p99_ms'] if created else None,
+        'requests': sum(summary['count'] for summary in requests),
+        'retries': results['client']['retries'],
+        'peak_rss_mb': peak_rss_mb(),
+        'phases': {name: round(seconds, 3) for name, seconds in phases.items()}
+    }
+
+
+def start_stub_process(args):
+    """Start benchmarks/stub_server.py in a child process and return it with its base URL."""
+    command = [sys.executable, str(Path(__file__).with_name('stub_server.py')), '--port', '0',
+               '--latency', str(args.latency), '--jitter', str(args.jitter),
+               '--error-rate', str(args.error_rate)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    base_url = process.stdout.readline().strip()
+    if not base_url.startswith('http'):
+        process.kill()
+        raise RuntimeError("Stub server did not start")
+    return process, base_url
+
+
+def compare_with_baseline(results, baseline_path, tolerance):
+    """Return the scenarios whose throughput dropped by more than `tolerance` against the baseline."""
+    with open(baseline_path, 'r') as f:
+        baseline = {(r['rows'], r['mode'], r['workers']): r for r in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        reference = baseline.get((result['rows'], result['mode'], result['workers']))
+        if reference and result['rows_per_sec'] < reference['rows_per_sec'] * (1 - tolerance):
+            regressions.append((result, reference))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Kordiam importer against a local stub server')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help='Workbook sizes (default: 1000 10000)')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=['default'], help='Import modes to measure')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent uploads (default: 8)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per chunk for stream/pipeline modes')
+    parser.add_argument('--latency', type=float, default=0.02, help='Stub latency per request in seconds (default: 0.02)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random stub latency of up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests the stub answers with 503')
+    parser.add_argument('--row-error-rate', type=float, default=0.0, help='Share of synthetic rows with a non-numeric Confirmation Status')
+    parser.add_argument('--workbook-dir', help='Keep generated workbooks here and reuse them (default: temporary directory)')
+    parser.add_argument('--mapping', default=str(ROOT / 'kordiam_mapping_clean.json'))
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare rows/sec against results previously written with --output')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed throughput drop against the baseline (default: 0.2)')
+    parser.add_argument('--run-scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.run_scenario:
+        print(json.dumps(run_scenario(json.loads(args.run_scenario))))
+        return
+    
+    workbook_dir = args.workbook_dir or tempfile.mkdtemp(prefix='kordiam-bench-')
+    os.makedirs(workbook_dir, exist_ok=True)
+    
+    stub, base_url = start_stub_process(args)
+    results = []
+    try:
+        for rows in args.rows:
+            workbook = os.path.join(workbook_dir, f"synthetic_{rows}_{args.row_error_rate}.xlsx")
+            if not os.path.exists(workbook):
+                started = time.perf_counter()
+                create_synthetic_workbook(workbook, rows, args.row_error_rate)
+                print(f"Generated {workbook} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+            
+            for mode in args.modes:
+                scenario = {'workbook': workbook, 'rows': rows, 'mode': mode, 'workers': args.workers,
+                            'chunk_size': args.chunk_size, 'base_url': base_url, 'mapping': args.mapping}
+                completed = subprocess.run([sys.executable, __file__, '--run-scenario', json.dumps(scenario)],
+                                           capture_output=True, text=True)
+                if completed.returncode != 0:
+                    raise RuntimeError(f"Scenario {rows} rows ({mode}) failed:\n{completed.stderr}")
+                result = json.loads(completed.stdout.strip().splitlines()[-1])
+                results.append(result)
+                print(f"{rows} rows ({mode}): {result['rows_per_sec']} rows/s", file=sys.stderr)
+    finally:
+        stub.terminate()
+        stub.wait()
+    
+    print(f"Stub latency {args.latency * 1000:.0f}ms (+{args.jitter * 1000:.0f}ms jitter), "
+          f"error rate {args.error_rate:.1%}, {args.workers} workers")
+    print(f"{'rows':>8} {'mode':<9}{'rows/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'retries':>8}{'RSS MB':>8}"
+          f"{'read s':>8}{'xform s':>8}{'token s':>8}{'http s':>9}{'errors':>7}")
+    for r in results:
+        p = r['phases']
+        rss = 'n/a' if r['peak_rss_mb'] is None else f"{r['peak_rss_mb']:.1f}"
+        print(f"{r['rows']:>8} {r['mode']:<9}{r['rows_per_sec']:>9.1f}{r['p50_ms'] or 0:>9.2f}{r['p99_ms'] or 0:>9.2f}"
+              f"{r['retries']:>8}{rss:>8}{p.get('read', 0):>8.2f}{p.get('transform', 0):>8.2f}"
+              f"{p.get('token', 0):>8.2f}{p['http']:>9.2f}"
+              f"{r['errors']:>7}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'settings': {k: v for k, v in vars(args).items() if k != 'run_scenario'},
+                       'results': results}, f, indent=2)
+    
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        for result, reference in regressions:
+            print(f"REGRESSION: {result['rows']} rows ({result['mode']}): {result['rows_per_sec']} rows/s "
+                  f"vs. {reference['rows_per_sec']} in baseline")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
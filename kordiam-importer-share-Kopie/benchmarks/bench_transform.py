@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Transform benchmark
+Measures rows/sec of the single-process transform against sharding the DataFrame
+across a process pool (ExcelProcessor.iter_elements_parallel).
+
+The parent process has to ship every shard out and unpack every result, so its
+own CPU time ("parent CPU") bounds the speedup any number of processes can reach:
+a pool cannot go faster than single-process seconds / parent CPU seconds.
+
+Usage:
+    python benchmarks/bench_transform.py --rows 200000 --processes 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from create_kordiam_example_clean import COLUMNS, synthetic_rows
+from kordiam_excel_importer import ExcelProcessor, iter_shards
+
+
+def synthetic_frame(rows: int) -> pd.DataFrame:
+    """Build a DataFrame shaped like kordiam_example_clean.xlsx with `rows` rows."""
+    return pd.DataFrame(list(synthetic_rows(rows)), columns=COLUMNS)
+
+
+def consume(rows) -> int:
+    count = 0
+    for _, element, error in rows:
+        if error is not None:
+            raise error
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark single-process vs. multi-process transformation')
+    parser.add_argument('--rows', type=int, default=200000, help='Number of synthetic rows (default: 200000)')
+    parser.add_argument('--shard-size', type=int, default=5000, help='Rows per shard (default: 5000)')
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4, 8], help='Process counts to measure')
+    parser.add_argument('--mapping', default=str(ROOT / 'kordiam_mapping_clean.json'))
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+    
+    with open(args.mapping, 'r') as f:
+        mapping_config = json.load(f)
+    df = synthetic_frame(args.rows)
+    processor = ExcelProcessor(None)
+    
+    results = []
+    started, cpu_started = time.perf_counter(), time.process_time()
+    count = consume(processor.iter_elements(df, mapping_config))
+    baseline = time.perf_counter() - started
+    results.append({'mode': 'single-process', 'processes': 1, 'rows': count,
+                    'seconds': round(baseline, 3), 'parent_cpu': round(time.process_time() - cpu_started, 3),
+                    'rows_per_sec': round(count / baseline), 'speedup': 1.0})
+    
+    for processes in args.processes:
+        started, cpu_started = time.perf_counter(), time.process_time()
+        count = consume(processor.iter_elements_parallel(iter_shards(df, args.shard_size), mapping_config, processes))
+        elapsed = time.perf_counter() - started
+        results.append({'mode': 'sharded', 'processes': processes, 'rows': count,
+                        'seconds': round(elapsed, 3), 'parent_cpu': round(time.process_time() - cpu_started, 3),
+                        'rows_per_sec': round(count / elapsed), 'speedup': round(baseline / elapsed, 2)})
+    
+    if args.json:
+        print(json.dumps({'cpu_count': os.cpu_count(), 'results': results}, indent=2))
+        return
+    
+    print(f"{args.rows} rows, shard size {args.shard_size}, {os.cpu_count()} CPUs")
+    print(f"{'mode':<16}{'processes':>10}{'seconds':>10}{'parent CPU':>12}{'rows/s':>12}{'speedup':>9}")
+    for r in results:
+        print(f"{r['mode']:<16}{r['processes']:>10}{r['seconds']:>10.2f}{r['parent_cpu']:>12.2f}"
+              f"{r['rows_per_sec']:>12}{r['speedup']:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Kordiam stub server
+A local stand-in for the Kordiam API used by the tests and benchmarks. Serves
+the OAuth2 token endpoint and the element endpoints with configurable latency
+and error rates, and can revoke the tokens it issued to test re-authentication.
+
+Usage:
+    python benchmarks/stub_server.py --port 8099 --latency 0.02 --error-rate 0.01
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ELEMENTS_PATH = '/api/v1_0_1/elements/'
+BATCH_PATH = '/api/v1_0_1/elements/batch/'
+
+
+class StubState:
+    """Behaviour settings and request counters shared by all handler threads."""
+    
+    def __init__(self, latency=0.02, jitter=0.0, error_rate=0.0, error_status=503, retry_after=0, disconnect_rate=0.0,
+                 revoke_after=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.disconnect_rate = disconnect_rate  # Share of requests whose connection is closed unanswered
+        self.revoke_after = revoke_after  # Revoke the tokens issued so far after this many element requests
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.counters = {'tokens': 0, 'created': 0, 'updated': 0, 'errors': 0, 'disconnects': 0,
+                         'requests': 0, 'unauthorized': 0}
+        self.issued = []
+        self.revoked = set()
+    
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+    
+    def issue_token(self):
+        with self.lock:
+            self.counters['tokens'] += 1
+            token = f"stub-token-{self.counters['tokens']}"
+            self.issued.append(token)
+            return token
+    
+    def revoke_tokens(self):
+        """Answer 401 to every token issued so far, as if they had expired early."""
+        with self.lock:
+            self.revoked.update(self.issued)
+    
+    def admit(self, token) -> bool:
+        """Count an element request; False if its token has been revoked."""
+        with self.lock:
+            self.counters['requests'] += 1
+            if self.revoke_after is not None and self.counters['requests'] == self.revoke_after + 1:
+                self.revoked.update(self.issued)
+            if token in self.revoked:
+                self.counters['unauthorized'] += 1
+                return False
+            return True
+    
+    def next_id(self):
+        with self.lock:
+            return next(self.ids)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Send headers and body without waiting for the client's delayed ACK
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        pass
+    
+    @property
+    def state(self) -> StubState:
+        return self.server.state
+    
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length else b''
+    
+    def _read_json(self):
+        body = self._read_body()
+        return json.loads(body) if body else None
+    
+    def _simulate(self) -> bool:
+        """Sleep for the configured latency; answer with an error (or hang up) and return False for failed requests."""
+        token = self.headers.get('Authorization', '').partition(' ')[2]
+        if not self.state.admit(token):
+            self._send(401, {'detail': 'Token expired'})
+            return False
+        delay = self.state.latency + (random.uniform(0, self.state.jitter) if self.state.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if self.state.disconnect_rate and random.random() < self.state.disconnect_rate:
+            self.state.count('disconnects')
+            self.close_connection = True  # The client sees "Connection aborted"
+            return False
+        if self.state.error_rate and random.random() < self.state.error_rate:
+            self.state.count('errors')
+            self._send(self.state.error_status, {'detail': 'Simulated failure'},
+                       {'Retry-After': str(self.state.retry_after)})
+            return False
+        return True
+    
+    def do_POST(self):
+        if self.path == '/api/token':
+            self._read_body()  # Form-encoded client credentials
+            return self._send(200, {'access_token': self.state.issue_token(), 'token_type': 'Bearer', 'expires_in': 3600})
+        
+        data = self._read_json()
+        if self.path == BATCH_PATH:
+            if not self._simulate():
+                return
+            self.state.count('created', len(data))
+            return self._send(200, [{'id': self.state.next_id()} for _ in data])
+        
+        if self.path == ELEMENTS_PATH:
+            if not self._simulate():
+                return
+            self.state.count('created')
+            return self._send(201, {'id': self.state.next_id()})
+        
+        self._send(404, {'detail': 'Not found'})
+    
+    def do_PUT(self):
+        self._read_json()
+        if not self.path.startswith(ELEMENTS_PATH):
+            return self._send(404, {'detail': 'Not found'})
+        if not self._simulate():
+            return
+        self.state.count('updated')
+        self._send(200, {'id': self.path.rstrip('/').rsplit('/', 1)[-1]})
+    
+    def do_GET(self):
+        if not self.path.startswith(ELEMENTS_PATH):
+            return self._send(404, {'detail': 'Not found'})
+        if not self._simulate():
+            return
+        self._send(200, {'id': self.path.rstrip('/').rsplit('/', 1)[-1]})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+    
+    def __init__(self, address, state: StubState):
+        super().__init__(address, StubHandler)
+        self.state = state
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub(port=0, **settings) -> StubServer:
+    """Start a stub server on a background thread; settings are passed to StubState."""
+    server = StubServer(('127.0.0.1', port), StubState(**settings))
+    threading.Thread(target=server.serve_forever, name='kordiam-stub', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stub of the Kordiam API')
+    parser.add_argument('--port', type=int, default=8099, help='Port to listen on (0 picks a free port)')
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds each element request takes (default: 0.02)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency of up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of element requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=503, help='Status code of simulated failures (default: 503)')
+    args = parser.parse_args()
+    
+    server = StubServer(('127.0.0.1', args.port),
+                        StubState(args.latency, args.jitter, args.error_rate, args.error_status))
+    print(server.base_url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.state.counters))
+
+
+if __name__ == "__main__":
+    main()
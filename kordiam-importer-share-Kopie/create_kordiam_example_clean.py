@@ -1,4 +1,7 @@
 import pandas as pd
+import openpyxl
+import argparse
+import random
 from datetime import datetime, timedelta
 
 # Create sample data that matches the successful Kordiam API structure
@@ -63,19 +66,13 @@ data = {
     ]
 }
 
-# Create DataFrame
-df = pd.DataFrame(data)
+# Columns of the example sheet, in order
+COLUMNS = list(data.keys())
 
-# Save to Excel with proper formatting
-with pd.ExcelWriter('kordiam_example_clean.xlsx', engine='openpyxl') as writer:
-    df.to_excel(writer, sheet_name='Elements', index=False)
-    
-    # Get the workbook and worksheet
-    workbook = writer.book
-    worksheet = writer.sheets['Elements']
-    
-    # Auto-adjust column widths
-    for column in worksheet.columns:
+
+def autofit_columns(worksheet, sample_rows=None):
+    """Set column widths from the longest value in the column (or in the first sample_rows rows)."""
+    for column in worksheet.iter_cols(max_row=sample_rows):
         max_length = 0
         column_letter = column[0].column_letter
         for cell in column:
@@ -87,13 +84,97 @@ with pd.ExcelWriter('kordiam_example_clean.xlsx', engine='openpyxl') as writer:
         adjusted_width = min(max_length + 2, 50)
         worksheet.column_dimensions[column_letter].width = adjusted_width
 
-print("Kordiam clean example Excel file 'kordiam_example_clean.xlsx' created successfully!")
-print("\nThis file contains only the essential fields that were successfully tested:")
-print("- Basic element fields (title, slug, elementStatus)")
-print("- Task information (status, format, user, deadline, confirmationStatus)")
-print("- Publication details (platform, publication date, assignments)")
-print("- Group information")
-print("- Event information (optional)")
-print("\nUse this as a template for your own data import.")
-print("\nTo use this with the clean mapping:")
-print("python kordiam_excel_importer.py kordiam_example_clean.xlsx --mapping kordiam_mapping_clean.json --dry-run") 
\ No newline at end of file
+
+def create_example_workbook(path='kordiam_example_clean.xlsx'):
+    """Write the clean example workbook."""
+    # Create DataFrame
+    df = pd.DataFrame(data)
+    
+    # Save to Excel with proper formatting
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Elements', index=False)
+        
+        # Get the workbook and worksheet
+        worksheet = writer.sheets['Elements']
+        
+        # Auto-adjust column widths
+        autofit_columns(worksheet)
+    
+    return path
+
+
+def synthetic_rows(rows, error_rate=0.0, seed=0):
+    """
+    Generate rows shaped like the example sheet for benchmarks.
+    
+    Every row has a unique title and slug and its own deadline, publication and
+    event times. With error_rate > 0 that share of rows gets a non-numeric
+    Confirmation Status so the importer reports it as a row error.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 3, 15, 6, 0)
+    for i in range(rows):
+        published = start + timedelta(minutes=15 * i)
+        confirmation = 'unknown' if error_rate and rng.random() < error_rate else -2
+        has_event = i % 3 != 1
+        yield (
+            f"Story {i}: {rng.choice(['Election', 'Weather', 'Sports', 'Culture', 'Business'])} update",
+            f"story-{i}",
+            2,
+            2,
+            18,
+            10126151,
+            published - timedelta(hours=2),
+            confirmation,
+            9413781,
+            published,
+            'true',
+            9455121,
+            published + timedelta(hours=1) if has_event else None,
+            published + timedelta(hours=1) if has_event else None,
+            published + timedelta(hours=3) if has_event else None,
+            published + timedelta(hours=3) if has_event else None
+        )
+
+
+def create_synthetic_workbook(path, rows, error_rate=0.0, seed=0):
+    """
+    Write a workbook with `rows` synthetic rows using the example columns.
+    
+    Rows are streamed with openpyxl's write-only mode, so even 500k-row
+    workbooks are written without holding the sheet in memory.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Elements')
+    worksheet.append(COLUMNS)
+    for row in synthetic_rows(rows, error_rate, seed):
+        worksheet.append(row)
+    workbook.save(path)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Create the Kordiam example workbook or a synthetic one for benchmarks')
+    parser.add_argument('--rows', type=int, help='Write this many synthetic rows instead of the three examples')
+    parser.add_argument('--output', help='Output file (default: kordiam_example_clean.xlsx, or kordiam_synthetic_<rows>.xlsx)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of synthetic rows with a non-numeric Confirmation Status')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for synthetic rows')
+    args = parser.parse_args()
+    
+    if args.rows:
+        output = args.output or f"kordiam_synthetic_{args.rows}.xlsx"
+        create_synthetic_workbook(output, args.rows, args.error_rate, args.seed)
+        print(f"Synthetic Excel file '{output}' with {args.rows} rows created successfully!")
+    else:
+        output = create_example_workbook(args.output or 'kordiam_example_clean.xlsx')
+        
+        print(f"Kordiam clean example Excel file '{output}' created successfully!")
+        print("\nThis file contains only the essential fields that were successfully tested:")
+        print("- Basic element fields (title, slug, elementStatus)")
+        print("- Task information (status, format, user, deadline, confirmationStatus)")
+        print("- Publication details (platform, publication date, assignments)")
+        print("- Group information")
+        print("- Event information (optional)")
+        print("\nUse this as a template for your own data import.")
+        print("\nTo use this with the clean mapping:")
+        print("python kordiam_excel_importer.py kordiam_example_clean.xlsx --mapping kordiam_mapping_clean.json --dry-run") 
\ No newline at end of file
@@ -4,18 +4,46 @@ Kordiam Excel Importer
 A script that reads data from an Excel file and creates elements in Kordiam via its API.
 """
 
+import numpy as np
+import openpyxl
 import pandas as pd
 import requests
+import urllib3
+import asyncio
+import atexit
+import bisect
+import contextvars
+import csv
+import glob
+import hashlib
+import io
 import json
 import logging
+import logging.handlers
 import os
-from typing import Dict, List, Optional, Any
+import pickle
+import queue
+import random
+import sqlite3
+import time
+import uuid
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Any, BinaryIO, Callable, Iterable, Iterator, Tuple, Union
 from dataclasses import dataclass
 from pathlib import Path
 import sys
 import argparse
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+try:
+    import httpx  # Optional: only needed for AsyncKordiamAPIClient
+except ImportError:
+    httpx = None
+
 
 @dataclass
 class KordiamConfig:
@@ -25,35 +53,536 @@ class KordiamConfig:
     client_secret: str
     token_endpoint: str = "/api/token"
     timeout: int = 30
+    max_retries: int = 3              # Retries on throttling, gateway and connection errors
+    backoff_base: float = 0.5         # Seconds; doubled per attempt, with full jitter
+    backoff_max: float = 30.0
+    rate_limit: Optional[float] = None  # Requests per second (None = unlimited)
+    max_concurrency: int = 64         # Upper bound for the adaptive in-flight limit
+    token_cache_file: Optional[str] = None  # Share OAuth2 tokens across processes via this file
+    pool_connections: int = 4         # Number of hosts to keep connection pools for
+    pool_maxsize: int = 64            # Pooled connections per host (total for the async client)
+    keep_alive: bool = True           # Reuse connections between requests
+    keepalive_expiry: float = 30.0    # Seconds an idle connection is kept open (async client)
+    http2: bool = False               # Negotiate HTTP/2 (async client only, needs httpx[http2])
+
+
+# Optional KordiamConfig fields that may also be set in config.json
+_OPTIONAL_CONFIG_KEYS = ('max_retries', 'backoff_base', 'backoff_max', 'rate_limit', 'max_concurrency',
+                         'token_cache_file', 'pool_connections', 'pool_maxsize', 'keep_alive',
+                         'keepalive_expiry', 'http2')
+
+# Responses worth retrying: throttling and gateway/overload errors
+RETRY_STATUS_CODES = frozenset([429, 502, 503, 504])
+
+# Responses to a POST that mean the server did not process it. After a 502/504 the
+# backend may still have created the element, so creates are not retried on those.
+POST_RETRY_STATUS_CODES = frozenset([429, 503])
+
+# Methods that can be repeated without creating anything twice
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+# Sent with every API request (kept across retries) so log lines can be matched to server logs
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+
+def _retry_status_codes(method: str) -> frozenset:
+    """Response statuses worth retrying for this HTTP method."""
+    return RETRY_STATUS_CODES if method.upper() in IDEMPOTENT_METHODS else POST_RETRY_STATUS_CODES
+
+
+def _is_connect_failure(error: requests.exceptions.ConnectionError) -> bool:
+    """True if the connection could not be opened, so no part of the request reached the server."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, 'reason', reason)  # urllib3's MaxRetryError wraps the cause
+    return isinstance(reason, (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError))
+
+
+def _request_id(source: Any) -> Optional[str]:
+    """The request id sent with a request, given its response or the exception it raised."""
+    try:
+        return source.request.headers.get(REQUEST_ID_HEADER)
+    except (AttributeError, RuntimeError):
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting requests to `rate` per second."""
+    
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """
+        Take a token, borrowing against future refills if none is left.
+        
+        Returns:
+            Seconds the caller must wait before sending (0 if a token was available)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+    
+    def acquire(self):
+        """Block until a token is available and take it."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on the number of requests in flight.
+    
+    The limit grows by one per window of successful requests and is halved when the
+    server throttles (at most once per cooldown, so one burst of 429s counts once).
+    """
+    
+    def __init__(self, max_limit: int, min_limit: int = 1, cooldown: float = 1.0):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.cooldown = cooldown
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+    
+    def __enter__(self) -> 'AdaptiveConcurrencyLimiter':
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+    
+    def acquire(self):
+        """Block until a request slot is free under the current limit."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+    
+    def release(self):
+        """Free a request slot."""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+    
+    def on_success(self):
+        """Additive increase."""
+        with self._cond:
+            if self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                self._cond.notify_all()
+    
+    def on_throttle(self):
+        """Multiplicative decrease."""
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.min_limit, self.limit / 2)
+                self._last_decrease = now
+
+
+class Histogram:
+    """Latency histogram with fixed bucket bounds (in seconds), as used by Prometheus."""
+    
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bucket, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                if bucket == len(self.BUCKETS):
+                    return self.max
+                lower = self.BUCKETS[bucket - 1] if bucket else 0.0
+                upper = min(self.BUCKETS[bucket], self.max)
+                return lower + (upper - lower) * max(0.0, rank - cumulative) / count
+            cumulative += count
+        return self.max
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 4),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.quantile(0.50) * 1000, 3),
+            'p95_ms': round(self.quantile(0.95) * 1000, 3),
+            'p99_ms': round(self.quantile(0.99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+
+class ImportMetrics:
+    """
+    Timing histograms for the phases of an import and for every HTTP call.
+    
+    Phases are 'read' (Excel parsing), 'transform', 'validate' (validation, resume
+    and upsert checks), 'serialize' (JSON encoding of request bodies), 'token'
+    (OAuth2 token requests) and 'record' (bookkeeping of outcomes). HTTP calls are
+    recorded per method and status code. Safe to use from several threads.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases: Dict[str, Histogram] = {}
+        self._http: Dict[Tuple[str, str], Histogram] = {}
+        self._local = threading.local()
+    
+    def observe(self, phase: str, seconds: float):
+        with self._lock:
+            histogram = self._phases.get(phase)
+            if histogram is None:
+                histogram = self._phases[phase] = Histogram()
+            histogram.observe(seconds)
+    
+    def observe_http(self, method: str, status: Union[int, str], seconds: float):
+        key = (method, str(status))
+        with self._lock:
+            histogram = self._http.get(key)
+            if histogram is None:
+                histogram = self._http[key] = Histogram()
+            histogram.observe(seconds)
+    
+    def _start(self) -> float:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)  # Time spent in nested phases
+        return time.perf_counter()
+    
+    def _stop(self, name: Optional[str], started: float):
+        elapsed = time.perf_counter() - started
+        stack = self._local.stack
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        if name is not None:
+            self.observe(name, elapsed - nested)
+    
+    @contextmanager
+    def phase(self, name: Optional[str]):
+        """
+        Time the enclosed block as one observation of `name`.
+        
+        Phases nest per thread: time spent in an inner phase is not counted again
+        for the outer one. With name None the block is only excluded from the
+        enclosing phase (e.g. waiting on a queue).
+        """
+        started = self._start()
+        try:
+            yield
+        finally:
+            self._stop(name, started)
+    
+    def timed_iter(self, iterable: Iterable[Any], name: Optional[str]) -> Iterator[Any]:
+        """Yield from `iterable`, timing each step of it as a phase (see phase())."""
+        iterator = iter(iterable)
+        while True:
+            started = self._start()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._stop(name, started)
+            yield item
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current timings.
+        
+        Returns:
+            Dictionary with 'phases' (phase -> count, total and latency percentiles)
+            and 'http' ('METHOD status' -> the same)
+        """
+        with self._lock:
+            return {
+                'phases': {name: histogram.summary() for name, histogram in self._phases.items()},
+                'http': {f"{method} {status}": histogram.summary()
+                         for (method, status), histogram in sorted(self._http.items())}
+            }
+    
+    def to_openmetrics(self) -> str:
+        """Render all histograms in the Prometheus/OpenMetrics text format."""
+        with self._lock:
+            series = [('kordiam_import_phase_seconds', 'Time spent per import phase',
+                       [({'phase': name}, histogram) for name, histogram in sorted(self._phases.items())]),
+                      ('kordiam_http_request_seconds', 'Duration of HTTP requests to the Kordiam API',
+                       [({'method': method, 'status': status}, histogram)
+                        for (method, status), histogram in sorted(self._http.items())])]
+            lines = []
+            for metric, help_text, histograms in series:
+                lines.append(f"# TYPE {metric} histogram")
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# UNIT {metric} seconds")
+                for labels, histogram in histograms:
+                    label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+                    cumulative = 0
+                    for bound, count in zip(histogram.BUCKETS + (float('inf'),), histogram.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{metric}_bucket{{{label_text},le="{le}"}} {cumulative}')
+                    lines.append(f"{metric}_count{{{label_text}}} {histogram.count}")
+                    lines.append(f"{metric}_sum{{{label_text}}} {histogram.total:.6f}")
+            lines.append("# EOF")
+        return '\n'.join(lines) + '\n'
+
+
+class TokenCache:
+    """
+    Cache of OAuth2 access tokens keyed by base URL, token endpoint and client ID.
+    
+    Tokens are shared by every client in the process (so Streamlit reruns and GUI
+    sessions reuse them) and, if a cache file is configured, across processes so
+    short CLI runs can skip the token round-trip. The file is only readable by the
+    current user.
+    """
+    
+    _memory: Dict[str, Tuple[str, datetime]] = {}
+    _lock = threading.Lock()
+    
+    def __init__(self, config: KordiamConfig):
+        identity = f"{config.base_url}|{config.token_endpoint}|{config.client_id}"
+        self.key = hashlib.sha256(identity.encode('utf-8')).hexdigest()
+        self.path = config.token_cache_file
+    
+    def get(self) -> Optional[Tuple[str, datetime]]:
+        """Return a cached (token, expires_at) that has not expired yet."""
+        with self._lock:
+            entry = self._memory.get(self.key)
+            if entry is None and self.path:
+                entry = self._read_file().get(self.key)
+                if entry is not None:
+                    entry = (entry['access_token'], datetime.fromisoformat(entry['expires_at']))
+                    self._memory[self.key] = entry
+        
+        if entry is not None and datetime.now() < entry[1]:
+            return entry
+        return None
+    
+    def put(self, access_token: str, expires_at: datetime):
+        """Store a freshly obtained token."""
+        with self._lock:
+            self._memory[self.key] = (access_token, expires_at)
+            if self.path:
+                entries = self._read_file()
+                entries[self.key] = {'access_token': access_token, 'expires_at': expires_at.isoformat()}
+                self._write_file(entries)
+    
+    def invalidate(self, access_token: str):
+        """Drop a token the server rejected, unless it has already been replaced."""
+        with self._lock:
+            entry = self._memory.get(self.key)
+            if entry is not None and entry[0] == access_token:
+                del self._memory[self.key]
+            if self.path:
+                entries = self._read_file()
+                if entries.get(self.key, {}).get('access_token') == access_token:
+                    del entries[self.key]
+                    self._write_file(entries)
+    
+    def _read_file(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable token cache {self.path}: {e}")
+            return {}
+    
+    def _write_file(self, entries: Dict[str, Dict[str, str]]):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not write token cache {self.path}: {e}")
+
+
+class _CountingPoolMixin:
+    """Counts whether each request gets a live pooled connection or has to connect."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._count_lock = threading.Lock()
+        self.connections_opened = 0
+        self.connections_reused = 0
+    
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        # New connections and ones reset after the server dropped them have no socket yet
+        with self._count_lock:
+            if getattr(conn, 'sock', None) is None:
+                self.connections_opened += 1
+            else:
+                self.connections_reused += 1
+        return conn
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, urllib3.HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, urllib3.HTTPSConnectionPool):
+    pass
+
+
+class _PooledHTTPAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter whose connection pools report connection reuse."""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool
+        }
+
+
+def _backoff_delay(config: KordiamConfig, attempt: int) -> float:
+    """Exponential backoff with full jitter, shared by the sync and async clients."""
+    return random.uniform(0, min(config.backoff_max, config.backoff_base * (2 ** attempt)))
 
 
 class KordiamAPIClient:
     """Client for interacting with Kordiam API with OAuth2 authentication."""
     
-    def __init__(self, config: KordiamConfig):
+    def __init__(self, config: KordiamConfig, metrics: Optional[ImportMetrics] = None):
         self.config = config
+        self.metrics = metrics or ImportMetrics()
         self.session = requests.Session()
+        # The default adapter keeps 10 connections per host, so parallel imports would
+        # keep discarding connections and redoing TLS handshakes
+        adapter = _PooledHTTPAdapter(
+            pool_connections=config.pool_connections,
+            pool_maxsize=config.pool_maxsize
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.access_token = None
         self.token_expires_at = None
+        self.token_cache = TokenCache(config)
+        self._token_lock = threading.Lock()
+        self._refreshing = False
+        self.rate_limiter = TokenBucket(config.rate_limit) if config.rate_limit else None
+        self.concurrency = AdaptiveConcurrencyLimiter(config.max_concurrency)
+        self._stats_lock = threading.Lock()
+        self._started_at = None
+        self.stats = {
+            'requests': 0,
+            'token_requests': 0,
+            'reauthentications': 0,
+            'retries': 0,
+            'retries_by_reason': {},
+            'throttled': 0
+        }
         
         # Set default headers
         self.session.headers.update({
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         })
+        if not config.keep_alive:
+            self.session.headers['Connection'] = 'close'
+    
+    # Start refreshing in the background once the token is this close to expiry
+    token_refresh_ahead = timedelta(minutes=2)
     
     def _get_access_token(self) -> str:
         """
         Get OAuth2 access token using client credentials flow.
         
+        Safe to call from many threads: only one of them requests a new token while
+        the others wait for it. Shortly before expiry the token is refreshed in a
+        background thread so request threads never block on it.
+        
         Returns:
             Access token string
         """
         # Check if we have a valid token
-        if (self.access_token and self.token_expires_at and 
-            datetime.now() < self.token_expires_at):
-            return self.access_token
+        access_token, expires_at = self.access_token, self.token_expires_at
+        now = datetime.now()
+        if access_token and expires_at and now < expires_at:
+            if now >= expires_at - self.token_refresh_ahead:
+                self._start_background_refresh()
+            return access_token
+        
+        with self._token_lock:
+            # Another thread may have refreshed while we were waiting
+            if (self.access_token and self.token_expires_at and
+                datetime.now() < self.token_expires_at):
+                return self.access_token
+            
+            cached = self.token_cache.get()
+            if cached is not None:
+                self.access_token, self.token_expires_at = cached
+                logging.debug("Using cached OAuth2 access token")
+                return self.access_token
+            
+            return self._request_access_token()
+    
+    def _start_background_refresh(self):
+        """Refresh the token in a daemon thread unless a refresh is already running."""
+        with self._token_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name='kordiam-token-refresh', daemon=True).start()
+    
+    def _background_refresh(self):
+        try:
+            with self._token_lock:
+                if self.token_expires_at and datetime.now() < self.token_expires_at - self.token_refresh_ahead:
+                    return  # Someone else already refreshed
+                self._request_access_token()
+        except Exception as e:
+            # The current token is still valid; the next caller retries synchronously if needed
+            logging.warning(f"Background token refresh failed: {e}")
+        finally:
+            self._refreshing = False
+    
+    def _invalidate_token(self, rejected_token: str):
+        """
+        Forget a token the server answered with 401.
         
+        Only the token that was actually rejected is dropped, so when many threads
+        hit 401 at once the first one triggers a refresh and the rest reuse it.
+        """
+        with self._token_lock:
+            if self.access_token == rejected_token:
+                self.access_token = None
+                self.token_expires_at = None
+            self.token_cache.invalidate(rejected_token)
+    
+    def _request_access_token(self) -> str:
+        """Request a new token from the token endpoint. Caller must hold _token_lock."""
         try:
             token_url = f"{self.config.base_url}{self.config.token_endpoint}"
             
@@ -67,20 +596,25 @@ class KordiamAPIClient:
             # Use form data for token request
             headers = {'Content-Type': 'application/x-www-form-urlencoded'}
             
-            response = requests.post(
-                token_url,
-                data=token_data,
-                headers=headers,
-                timeout=self.config.timeout
-            )
+            with self.metrics.phase('token'):
+                response = self.session.post(
+                    token_url,
+                    data=token_data,
+                    headers=headers,
+                    timeout=self.config.timeout
+                )
             response.raise_for_status()
             
             token_response = response.json()
-            self.access_token = token_response['access_token']
+            access_token = token_response['access_token']
             
             # Calculate token expiration (with 5 minute buffer)
             expires_in = token_response.get('expires_in', 3600)  # Default 1 hour
+            self.access_token = access_token
             self.token_expires_at = datetime.now() + timedelta(seconds=expires_in - 300)
+            self.token_cache.put(self.access_token, self.token_expires_at)
+            with self._stats_lock:
+                self.stats['token_requests'] += 1
             
             logging.info("Successfully obtained OAuth2 access token")
             return self.access_token
@@ -107,17 +641,147 @@ class KordiamAPIClient:
         Returns:
             Response object
         """
-        # Get valid access token
-        access_token = self._get_access_token()
+        if 'json' in kwargs:
+            # Encode the body once (not on every retry) and time it separately
+            with self.metrics.phase('serialize'):
+                try:
+                    kwargs['data'] = json.dumps(kwargs.pop('json'), allow_nan=False).encode('utf-8')
+                except ValueError as e:
+                    # Same failure as requests' own json= encoding (e.g. NaN values)
+                    raise requests.exceptions.RequestException(f"Invalid JSON body: {e}")
         
-        # Add authorization header
+        max_retries = self.config.max_retries
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_statuses = _retry_status_codes(method)
+        attempt = 0
+        reauthenticated = False
         headers = kwargs.get('headers', {})
-        headers['Authorization'] = f'Bearer {access_token}'
+        request_id = headers.setdefault(REQUEST_ID_HEADER, uuid.uuid4().hex[:16])
         kwargs['headers'] = headers
+        while True:
+            # Get valid access token and add the authorization header
+            access_token = self._get_access_token()
+            headers['Authorization'] = f'Bearer {access_token}'
+            
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            
+            # Make the request
+            try:
+                with self.concurrency:
+                    self._count_request()
+                    started = time.perf_counter()
+                    try:
+                        response = self.session.request(method, url, timeout=self.config.timeout, **kwargs)
+                    except requests.exceptions.RequestException:
+                        self.metrics.observe_http(method, 'error', time.perf_counter() - started)
+                        raise
+                    self.metrics.observe_http(method, response.status_code, time.perf_counter() - started)
+            except requests.exceptions.ConnectionError as e:
+                # A POST is only resent if the connection was never opened: once it was sent
+                # (e.g. "Connection aborted" while waiting for the answer), the server may
+                # already have created the element. Read timeouts are never retried.
+                if attempt >= max_retries or not (idempotent or _is_connect_failure(e)):
+                    raise
+                self.concurrency.on_throttle()
+                delay = self._backoff_delay(attempt)
+                self._count_retry('connection_error')
+                logging.warning("%s %s failed (%s); retry %d/%d in %.1fs", method, url, e, attempt + 1, max_retries, delay,
+                                extra={'request_id': request_id})
+            else:
+                if response.status_code == 401 and not reauthenticated:
+                    # Token revoked or expired early (clock skew); refresh once and replay
+                    logging.warning("%s %s returned 401; refreshing access token and retrying", method, url,
+                                    extra={'request_id': request_id})
+                    self._invalidate_token(access_token)
+                    with self._stats_lock:
+                        self.stats['reauthentications'] += 1
+                    reauthenticated = True
+                    continue
+                
+                if response.status_code not in retry_statuses:
+                    self.concurrency.on_success()
+                    return response
+                
+                self.concurrency.on_throttle()
+                if response.status_code == 429:
+                    with self._stats_lock:
+                        self.stats['throttled'] += 1
+                if attempt >= max_retries:
+                    return response
+                
+                retry_after = self._parse_retry_after(response)
+                delay = retry_after if retry_after is not None else self._backoff_delay(attempt)
+                self._count_retry(str(response.status_code))
+                logging.warning("%s %s returned %d; retry %d/%d in %.1fs", method, url, response.status_code,
+                                attempt + 1, max_retries, delay, extra={'request_id': request_id})
+            
+            time.sleep(delay)
+            attempt += 1
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return _backoff_delay(self.config, attempt)
+    
+    @staticmethod
+    def _parse_retry_after(response: Union[requests.Response, 'httpx.Response']) -> Optional[float]:
+        """Seconds to wait according to a Retry-After header (delta-seconds or HTTP date)."""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+    
+    def _count_request(self):
+        with self._stats_lock:
+            if self._started_at is None:
+                self._started_at = time.monotonic()
+            self.stats['requests'] += 1
+    
+    def _count_retry(self, reason: str):
+        with self._stats_lock:
+            self.stats['retries'] += 1
+            by_reason = self.stats['retries_by_reason']
+            by_reason[reason] = by_reason.get(reason, 0) + 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of request, retry and rate-limiting counters.
         
-        # Make the request
-        response = self.session.request(method, url, timeout=self.config.timeout, **kwargs)
-        return response
+        Returns:
+            Dictionary with request/retry counts, the observed request rate, the
+            configured rate limit and the current adaptive concurrency limit
+        """
+        with self._stats_lock:
+            stats = dict(self.stats)
+            stats['retries_by_reason'] = dict(self.stats['retries_by_reason'])
+            elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        stats['observed_rate'] = round(stats['requests'] / elapsed, 2) if elapsed > 0 else 0.0
+        stats['rate_limit'] = self.config.rate_limit
+        stats['concurrency_limit'] = int(self.concurrency.limit)
+        stats.update(self._connection_stats())
+        return stats
+    
+    def _connection_stats(self) -> Dict[str, int]:
+        """Sum opened vs. reused connections over the session's connection pools."""
+        stats = {'connections_opened': 0, 'connections_reused': 0}
+        for adapter in set(self.session.adapters.values()):
+            pools = getattr(getattr(adapter, 'poolmanager', None), 'pools', None)
+            if pools is None:
+                continue
+            for key in pools.keys():
+                pool = pools.get(key)
+                if isinstance(pool, _CountingPoolMixin):
+                    stats['connections_opened'] += pool.connections_opened
+                    stats['connections_reused'] += pool.connections_reused
+        return stats
         
     def create_element(self, element_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -140,14 +804,17 @@ class KordiamAPIClient:
             )
             response.raise_for_status()
             
-            logging.info(f"Successfully created element: {response.json().get('id', 'Unknown ID')}")
-            return response.json()
+            created = response.json()
+            logging.info("Successfully created element: %s", created.get('id', 'Unknown ID'),
+                         extra={'request_id': _request_id(response), 'element_id': created.get('id')})
+            return created
             
         except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to create element: {e}")
+            context = {'request_id': _request_id(e)}
+            logging.error("Failed to create element: %s", e, extra=context)
             if hasattr(e, 'response') and e.response is not None:
-                logging.error(f"Response status: {e.response.status_code}")
-                logging.error(f"Response body: {e.response.text}")
+                logging.error("Response status: %s", e.response.status_code, extra=context)
+                logging.error("Response body: %s", e.response.text, extra=context)
             raise
     
     def get_element(self, element_id: str) -> Dict[str, Any]:
@@ -193,270 +860,3422 @@ class KordiamAPIClient:
             )
             response.raise_for_status()
             
-            logging.info(f"Successfully updated element: {element_id}")
+            logging.info("Successfully updated element: %s", element_id,
+                         extra={'request_id': _request_id(response), 'element_id': element_id})
             return response.json()
             
         except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to update element {element_id}: {e}")
+            logging.error("Failed to update element %s: %s", element_id, e,
+                          extra={'request_id': _request_id(e), 'element_id': element_id})
             raise
-
-
-class ExcelProcessor:
-    """Processes Excel files and transforms data for Kordiam API."""
     
-    def __init__(self, excel_file: str, sheet_name: Optional[str] = None):
-        self.excel_file = excel_file
-        self.sheet_name = sheet_name
-        
-    def read_excel_data(self) -> pd.DataFrame:
+    def create_elements(self, elements: List[Dict[str, Any]], endpoint: str) -> List[Union[Dict[str, Any], Exception]]:
         """
-        Read data from Excel file.
+        Create several elements with one request to a batch endpoint.
         
-        Returns:
-            DataFrame containing the Excel data
-        """
-        try:
-            if self.sheet_name:
-                df = pd.read_excel(self.excel_file, sheet_name=self.sheet_name)
-            else:
-                df = pd.read_excel(self.excel_file)
-            
-            logging.info(f"Successfully read {len(df)} rows from Excel file")
-            return df
-            
-        except Exception as e:
-            logging.error(f"Failed to read Excel file {self.excel_file}: {e}")
-            raise
-    
-    def transform_row_to_element(self, row: pd.Series, mapping_config: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Transform a DataFrame row to Kordiam element format.
+        The endpoint must accept a JSON list of elements and answer with a list of the
+        same length (or an object with a 'results' list), one entry per element.
         
         Args:
-            row: Pandas Series representing a row
-            mapping_config: Complete mapping configuration including element fields and sub-structures
+            elements: Elements in Kordiam format
+            endpoint: Path of the batch endpoint, relative to base_url
             
         Returns:
-            Dictionary formatted for Kordiam API
+            The created element or a BatchItemError for each input element, in order
         """
-        element_data = {}
-        
-        # Basic element fields
-        basic_fields = mapping_config.get('element_fields', {})
-        for excel_col, kordiam_field in basic_fields.items():
-            if excel_col in row.index and pd.notna(row[excel_col]):
-                value = row[excel_col]
-                
-                # Handle different data types
-                if isinstance(value, pd.Timestamp):
-                    value = value.strftime('%Y-%m-%d')
-                elif isinstance(value, (int, float)) and pd.isna(value):
-                    continue
-                
-                element_data[kordiam_field] = value
-        
-        # Handle tasks if configured
-        task_config = mapping_config.get('tasks', {})
-        if task_config and any(col in row.index and pd.notna(row[col]) for col in task_config.keys()):
-            task = {}
-            
-            for excel_col, task_field in task_config.items():
-                if excel_col in row.index and pd.notna(row[excel_col]):
-                    value = row[excel_col]
-                    
-                    # Handle special task fields
-                    if task_field == 'deadline' and isinstance(value, pd.Timestamp):
-                        task['deadline'] = {
-                            'date': value.strftime('%Y-%m-%d'),
-                            'time': value.strftime('%H:%M') if not pd.isna(value) else None
-                        }
-                    elif task_field in ['status', 'format', 'user'] and isinstance(value, (int, float)):
-                        task[task_field] = int(value)
-                    elif task_field == 'confirmationStatus':
-                        # Default to "Not requested" (-2) if not specified
-                        task[task_field] = int(value) if pd.notna(value) else -2
-                    else:
-                        task[task_field] = value
-            
-            # Ensure required task fields have defaults
-            if 'confirmationStatus' not in task:
-                task['confirmationStatus'] = -2  # Not requested
-            
-            if task:  # Only add if we have task data
-                element_data['tasks'] = [task]
+        url = f"{self.config.base_url}{endpoint}"
+        response = self._make_authenticated_request('POST', url, json=elements)
+        response.raise_for_status()
         
-        # Handle publications if configured
-        publication_config = mapping_config.get('publications', {})
-        if publication_config and any(col in row.index and pd.notna(row[col]) for col in publication_config.keys()):
-            publication = {}
-            
-            for excel_col, pub_field in publication_config.items():
-                if excel_col in row.index and pd.notna(row[excel_col]):
-                    value = row[excel_col]
-                    
-                    # Handle special publication fields
-                    if pub_field == 'single' and isinstance(value, pd.Timestamp):
-                        publication['single'] = {
-                            'start': {
-                                'date': value.strftime('%Y-%m-%d')
-                            }
-                        }
-                    elif pub_field in ['status', 'category', 'type'] and isinstance(value, (int, float)):
-                        publication[pub_field] = int(value)
-                    elif pub_field == 'platform' and isinstance(value, (int, float)):
-                        publication[pub_field] = str(int(value))  # Platform ID as string
-                    elif pub_field == 'assignments':
-                        # Handle assignments as boolean array
-                        if isinstance(value, str):
-                            # Convert string like "true,false" to [true, false]
-                            assignments = [s.strip().lower() == 'true' for s in value.split(',')]
-                            publication[pub_field] = assignments
-                        else:
-                            publication[pub_field] = [True]  # Default
-                    else:
-                        publication[pub_field] = value
-            
-            # Set default assignments if not provided
-            if 'assignments' not in publication and 'tasks' in element_data:
-                publication['assignments'] = [True] * len(element_data['tasks'])
-            
-            if publication:  # Only add if we have publication data
-                element_data['publications'] = [publication]
+        body = response.json()
+        if isinstance(body, dict):
+            body = body.get('results')
+        if not isinstance(body, list) or len(body) != len(elements):
+            raise ValueError(f"Batch response from {endpoint} does not match the {len(elements)} submitted elements")
         
-        # Handle groups if configured
-        groups_config = mapping_config.get('groups', {})
-        if groups_config:
-            for excel_col, group_field in groups_config.items():
-                if excel_col in row.index and pd.notna(row[excel_col]):
-                    value = row[excel_col]
-                    if isinstance(value, (int, float)):
-                        element_data['groups'] = [int(value)]  # Direct ID, not object
-                    elif isinstance(value, str):
-                        # Handle comma-separated group IDs
-                        group_ids = [int(g.strip()) for g in value.split(',') if g.strip().isdigit()]
-                        if group_ids:
-                            element_data['groups'] = group_ids
-        
-        # Handle location if configured
-        location_config = mapping_config.get('location', {})
-        if location_config and any(col in row.index and pd.notna(row[col]) for col in location_config.keys()):
-            location = {}
-            
-            for excel_col, loc_field in location_config.items():
-                if excel_col in row.index and pd.notna(row[excel_col]):
-                    location[loc_field] = str(row[excel_col])
-            
-            if location:
-                element_data['location'] = location
-                # Handle event information at element level only
-        event_config = mapping_config.get('event', {})
-        if event_config and any(col in row.index and pd.notna(row[col]) for col in event_config.keys()):
-            event = {}
-            
-            for excel_col, event_field in event_config.items():
-                if excel_col in row.index and pd.notna(row[excel_col]):
-                    value = row[excel_col]
-                    
-                    if event_field in ['fromDate', 'toDate'] and isinstance(value, pd.Timestamp):
-                        event[event_field] = value.strftime('%Y-%m-%d')
-                    elif event_field in ['fromTime', 'toTime'] and isinstance(value, pd.Timestamp):
-                        event[event_field] = value.strftime('%H:%M')
-                    else:
-                        event[event_field] = str(value)
-            
-            if event:
-                element_data['event'] = event
+        results = []
+        for item in body:
+            if isinstance(item, dict) and item.get('id') is not None and not item.get('error'):
+                results.append(item)
+            else:
+                status = item.get('status') if isinstance(item, dict) else None
+                detail = item.get('error', item) if isinstance(item, dict) else item
+                results.append(BatchItemError(f"Batch member rejected: {detail}", status))
         
-        return element_data
+        logging.info("Batch of %d elements submitted, %d created",
+                     len(elements), sum(1 for r in results if not isinstance(r, Exception)))
+        return results
 
 
-class KordiamImporter:
-    """Main importer class that orchestrates the Excel to Kordiam import process."""
+class BatchItemError(Exception):
+    """A single element of a batch request was rejected by the server."""
     
-    def __init__(self, config: KordiamConfig):
-        self.client = KordiamAPIClient(config)
-        self.results = {
-            'success': 0,
-            'errors': 0,
-            'details': []
-        }
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def _is_retryable_error(error: Exception, method: str = 'POST') -> bool:
+    """
+    Whether a failed submission is worth resending (throttling, gateway or connection errors).
     
-    def import_from_excel(self, 
-                         excel_file: str, 
-                         mapping_config: Dict[str, Any],
-                         sheet_name: Optional[str] = None,
-                         dry_run: bool = False) -> Dict[str, Any]:
+    Creates (POST) are only resent when the server cannot have processed them: on
+    429/503 and when the connection could not be opened. Read timeouts never are.
+    
+    Args:
+        error: Exception the submission failed with
+        method: HTTP method of the submission (PUT for updates)
+    """
+    if isinstance(error, BatchItemError):
+        return error.status in _retry_status_codes(method)
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return method.upper() in IDEMPOTENT_METHODS or _is_connect_failure(error)
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code in _retry_status_codes(method)
+    return False
+
+
+class BatchSender:
+    """
+    Submits a batch of elements to Kordiam.
+    
+    Each item is an (element_id, element_data) pair; element_id is None for new
+    elements and the id of the element to update otherwise. send() returns one
+    result per item, in order: the API response or the exception it failed with.
+    """
+    
+    def send(self, items: List[Tuple[Optional[Any], Dict[str, Any]]]) -> List[Union[Dict[str, Any], Exception]]:
         """
-        Import data from Excel file to Kordiam.
+        Submit the items and return one result per item.
         
-        Args:
-            excel_file: Path to Excel file
-            mapping_config: Complete mapping configuration
-            sheet_name: Specific sheet to read (optional)
-            dry_run: If True, don't actually create elements
-            
-        Returns:
-            Import results summary
+        If sending is interrupted (e.g. Ctrl-C), implementations attach the outcomes
+        known so far to the exception as `batch_results` (None for unknown items),
+        so the importer can still journal elements that were created.
         """
-        processor = ExcelProcessor(excel_file, sheet_name)
-        df = processor.read_excel_data()
+        raise NotImplementedError
+    
+    def close(self):
+        """Release resources held by the sender."""
+
+
+class FanOutSender(BatchSender):
+    """Sends every item as its own request, with up to `workers` requests in flight."""
+    
+    def __init__(self, client: KordiamAPIClient, workers: int = 8):
+        self.client = client
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='kordiam-batch')
+    
+    def _submit(self, element_id: Optional[Any], element_data: Dict[str, Any]) -> Dict[str, Any]:
+        if element_id is not None:
+            return self.client.update_element(element_id, element_data)
+        return self.client.create_element(element_data)
+    
+    @staticmethod
+    def _outcome(future: Future) -> Union[Dict[str, Any], Exception]:
+        try:
+            return future.result()
+        except Exception as e:
+            return e
+    
+    def send(self, items: List[Tuple[Optional[Any], Dict[str, Any]]]) -> List[Union[Dict[str, Any], Exception]]:
+        futures = [self.executor.submit(self._submit, element_id, element_data) for element_id, element_data in items]
+        try:
+            return [self._outcome(future) for future in futures]
+        except BaseException as interrupt:
+            # Requests already sent still complete; pass their outcomes on with the
+            # interruption (None for items that were never sent)
+            interrupt.batch_results = [None if future.cancel() else self._outcome(future) for future in futures]
+            raise
+    
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class BatchEndpointSender(BatchSender):
+    """
+    Creates new elements through a batch endpoint; updates are fanned out.
+    
+    If the server does not offer the endpoint (404/405/501) the sender logs a
+    warning once and fans out all further items instead.
+    """
+    
+    def __init__(self, client: KordiamAPIClient, endpoint: str, workers: int = 8):
+        self.client = client
+        self.endpoint = endpoint
+        self.fallback = FanOutSender(client, workers)
+        self.supported = True
+    
+    def send(self, items: List[Tuple[Optional[Any], Dict[str, Any]]]) -> List[Union[Dict[str, Any], Exception]]:
+        if not self.supported:
+            return self.fallback.send(items)
         
-        logging.info(f"Starting import of {len(df)} rows (dry_run={dry_run})")
+        creates = [position for position, (element_id, _) in enumerate(items) if element_id is None]
+        updates = [position for position, (element_id, _) in enumerate(items) if element_id is not None]
+        results: List[Union[Dict[str, Any], Exception]] = [None] * len(items)
         
-        for index, row in df.iterrows():
+        if creates:
             try:
-                element_data = processor.transform_row_to_element(row, mapping_config)
-                
-                if not element_data:
-                    logging.warning(f"Row {index + 1}: No valid data found, skipping")
-                    continue
-                
-                # Validate that element has required components
-                has_publication = 'publications' in element_data and element_data['publications']
-                has_task = 'tasks' in element_data and element_data['tasks']
-                has_group = 'groups' in element_data and element_data['groups']
-                
-                if not (has_publication or has_task or has_group):
-                    logging.warning(f"Row {index + 1}: Element must contain at least one of: publication, task, or group. Skipping.")
-                    continue
-                
-                if dry_run:
-                    logging.info(f"Row {index + 1}: Would create element with data: {json.dumps(element_data, indent=2)}")
-                    self.results['success'] += 1
-                else:
-                    response = self.client.create_element(element_data)
-                    self.results['success'] += 1
-                    self.results['details'].append({
-                        'row': index + 1,
-                        'status': 'success',
-                        'element_id': response.get('id'),
-                        'data': element_data
-                    })
-                
-            except Exception as e:
-                self.results['errors'] += 1
-                error_detail = {
-                    'row': index + 1,
-                    'status': 'error',
-                    'error': str(e),
-                    'data': element_data if 'element_data' in locals() else None
-                }
-                self.results['details'].append(error_detail)
-                logging.error(f"Row {index + 1}: {e}")
+                created = self.client.create_elements([items[position][1] for position in creates], self.endpoint)
+            except requests.exceptions.HTTPError as e:
+                if e.response is not None and e.response.status_code in (404, 405, 501):
+                    logging.warning(f"Batch endpoint {self.endpoint} not available "
+                                    f"({e.response.status_code}); sending elements individually")
+                    self.supported = False
+                    return self.fallback.send(items)
+                created = [e] * len(creates)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                created = [e] * len(creates)
+            for position, result in zip(creates, created):
+                results[position] = result
         
-        return self.results
-
+        if updates:
+            try:
+                updated = self.fallback.send([items[position] for position in updates])
+            except BaseException as interrupt:
+                updated = getattr(interrupt, 'batch_results', None) or [None] * len(updates)
+                for position, result in zip(updates, updated):
+                    results[position] = result
+                interrupt.batch_results = results
+                raise
+            for position, result in zip(updates, updated):
+                results[position] = result
+        
+        return results
+    
+    def close(self):
+        self.fallback.close()
 
-def setup_logging(log_level: str = "INFO"):
-    """Setup logging configuration."""
-    logging.basicConfig(
-        level=getattr(logging, log_level.upper()),
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(f'kordiam_import_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+
+class AsyncKordiamAPIClient:
+    """
+    Asyncio client for the Kordiam API with OAuth2 authentication.
+    
+    Mirrors KordiamAPIClient on top of a single pooled httpx.AsyncClient so that
+    many requests can be in flight from one event loop, with the same retries
+    (429/502/503/504 and connection errors, honouring Retry-After), backoff and
+    rate limit. Use it as an async context manager (or call aclose()) to release
+    the connection pool.
+    """
+    
+    def __init__(self,
+                 config: KordiamConfig,
+                 max_connections: Optional[int] = None,
+                 metrics: Optional[ImportMetrics] = None,
+                 rate_limiter: Optional[TokenBucket] = None):
+        if httpx is None:
+            raise ImportError("AsyncKordiamAPIClient requires httpx. Install it with: pip install httpx")
+        
+        if max_connections is None:
+            max_connections = config.pool_maxsize
+        
+        self.config = config
+        self.metrics = metrics or ImportMetrics()
+        self.max_connections = max_connections
+        self.access_token = None
+        self.token_expires_at = None
+        self.token_cache = TokenCache(config)
+        self._token_lock = asyncio.Lock()
+        # May be shared with a KordiamAPIClient, so both clients stay under one limit
+        self.rate_limiter = rate_limiter or (TokenBucket(config.rate_limit) if config.rate_limit else None)
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'retries_by_reason': {},
+            'throttled': 0,
+            'reauthentications': 0
+        }
+        self.client = httpx.AsyncClient(
+            headers={
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            },
+            timeout=config.timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections if config.keep_alive else 0,
+                keepalive_expiry=config.keepalive_expiry
+            ),
+            http2=config.http2
+        )
+    
+    async def __aenter__(self) -> 'AsyncKordiamAPIClient':
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    async def aclose(self):
+        """Close the underlying connection pool."""
+        await self.client.aclose()
+    
+    async def _get_access_token(self) -> str:
+        """
+        Get OAuth2 access token using client credentials flow.
+        
+        Concurrent callers wait on a lock so only one token request is sent.
+        
+        Returns:
+            Access token string
+        """
+        async with self._token_lock:
+            if (self.access_token and self.token_expires_at and 
+                datetime.now() < self.token_expires_at):
+                return self.access_token
+            
+            cached = self.token_cache.get()
+            if cached is not None:
+                self.access_token, self.token_expires_at = cached
+                return self.access_token
+            
+            try:
+                started = time.perf_counter()
+                response = await self.client.post(
+                    f"{self.config.base_url}{self.config.token_endpoint}",
+                    data={
+                        'grant_type': 'client_credentials',
+                        'client_id': self.config.client_id,
+                        'client_secret': self.config.client_secret
+                    },
+                    headers={'Content-Type': 'application/x-www-form-urlencoded'}
+                )
+                self.metrics.observe('token', time.perf_counter() - started)
+                response.raise_for_status()
+                
+                token_response = response.json()
+                self.access_token = token_response['access_token']
+                
+                # Calculate token expiration (with 5 minute buffer)
+                expires_in = token_response.get('expires_in', 3600)
+                self.token_expires_at = datetime.now() + timedelta(seconds=expires_in - 300)
+                self.token_cache.put(self.access_token, self.token_expires_at)
+                
+                logging.info("Successfully obtained OAuth2 access token")
+                return self.access_token
+                
+            except httpx.HTTPStatusError as e:
+                logging.error(f"Failed to obtain access token: {e}")
+                logging.error(f"Token response status: {e.response.status_code}")
+                logging.error(f"Token response body: {e.response.text}")
+                raise
+            except httpx.HTTPError as e:
+                logging.error(f"Failed to obtain access token: {e}")
+                raise
+            except KeyError as e:
+                logging.error(f"Invalid token response format: {e}")
+                raise
+    
+    async def _make_authenticated_request(self, method: str, url: str, **kwargs) -> 'httpx.Response':
+        """
+        Make an authenticated request to the Kordiam API.
+        
+        Args:
+            method: HTTP method (GET, POST, PUT, etc.)
+            url: API endpoint URL
+            **kwargs: Additional arguments for httpx
+            
+        Returns:
+            Response object
+        """
+        max_retries = self.config.max_retries
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_statuses = _retry_status_codes(method)
+        attempt = 0
+        reauthenticated = False
+        headers = kwargs.get('headers', {})
+        request_id = headers.setdefault(REQUEST_ID_HEADER, uuid.uuid4().hex[:16])
+        kwargs['headers'] = headers
+        while True:
+            access_token = await self._get_access_token()
+            headers['Authorization'] = f'Bearer {access_token}'
+            
+            if self.rate_limiter:
+                wait = self.rate_limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            
+            try:
+                self.stats['requests'] += 1
+                response = await self._send(method, url, **kwargs)
+            except (httpx.NetworkError, httpx.RemoteProtocolError, httpx.ConnectTimeout) as e:
+                # As in KordiamAPIClient: a POST is only resent if the connection was never
+                # opened, and read timeouts are never retried
+                if attempt >= max_retries or not (idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))):
+                    raise
+                delay = _backoff_delay(self.config, attempt)
+                self._count_retry('connection_error')
+                logging.warning("%s %s failed (%s); retry %d/%d in %.1fs", method, url, e, attempt + 1, max_retries, delay,
+                                extra={'request_id': request_id})
+            else:
+                if response.status_code == 401 and not reauthenticated:
+                    # Token revoked or expired early (clock skew); refresh once and replay
+                    logging.warning("%s %s returned 401; refreshing access token and retrying", method, url,
+                                    extra={'request_id': request_id})
+                    async with self._token_lock:
+                        if self.access_token == access_token:
+                            self.access_token = None
+                            self.token_expires_at = None
+                        self.token_cache.invalidate(access_token)
+                    self.stats['reauthentications'] += 1
+                    reauthenticated = True
+                    continue
+                
+                if response.status_code not in retry_statuses:
+                    return response
+                
+                if response.status_code == 429:
+                    self.stats['throttled'] += 1
+                if attempt >= max_retries:
+                    return response
+                
+                retry_after = KordiamAPIClient._parse_retry_after(response)
+                delay = retry_after if retry_after is not None else _backoff_delay(self.config, attempt)
+                self._count_retry(str(response.status_code))
+                logging.warning("%s %s returned %d; retry %d/%d in %.1fs", method, url, response.status_code,
+                                attempt + 1, max_retries, delay, extra={'request_id': request_id})
+            
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    def _count_retry(self, reason: str):
+        self.stats['retries'] += 1
+        by_reason = self.stats['retries_by_reason']
+        by_reason[reason] = by_reason.get(reason, 0) + 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Request, retry and rate-limiting counters, with the same keys as KordiamAPIClient.get_stats()."""
+        stats = dict(self.stats)
+        stats['retries_by_reason'] = dict(self.stats['retries_by_reason'])
+        stats['rate_limit'] = self.config.rate_limit
+        stats['concurrency_limit'] = self.max_connections
+        return stats
+    
+    async def _send(self, method: str, url: str, **kwargs) -> 'httpx.Response':
+        """Send one request and record its duration."""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.metrics.observe_http(method, 'error', time.perf_counter() - started)
+            raise
+        self.metrics.observe_http(method, response.status_code, time.perf_counter() - started)
+        return response
+    
+    async def create_element(self, element_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create an element in Kordiam.
+        
+        Args:
+            element_data: Dictionary containing element data in Kordiam format
+            
+        Returns:
+            Response from the API
+        """
+        try:
+            url = f"{self.config.base_url}/api/v1_0_1/elements/"
+            
+            response = await self._make_authenticated_request('POST', url, json=element_data)
+            response.raise_for_status()
+            
+            created = response.json()
+            logging.info("Successfully created element: %s", created.get('id', 'Unknown ID'),
+                         extra={'request_id': _request_id(response), 'element_id': created.get('id')})
+            return created
+            
+        except httpx.HTTPError as e:
+            context = {'request_id': _request_id(e)}
+            logging.error("Failed to create element: %s", e, extra=context)
+            if isinstance(e, httpx.HTTPStatusError):
+                logging.error("Response status: %s", e.response.status_code, extra=context)
+                logging.error("Response body: %s", e.response.text, extra=context)
+            raise
+    
+    async def get_element(self, element_id: str) -> Dict[str, Any]:
+        """
+        Get an element from Kordiam by ID.
+        
+        Args:
+            element_id: ID of the element to retrieve
+            
+        Returns:
+            Element data
+        """
+        try:
+            url = f"{self.config.base_url}/api/v1_0_1/elements/{element_id}/"
+            
+            response = await self._make_authenticated_request('GET', url)
+            response.raise_for_status()
+            
+            return response.json()
+            
+        except httpx.HTTPError as e:
+            logging.error(f"Failed to get element {element_id}: {e}")
+            raise
+    
+    async def update_element(self, element_id: str, element_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Update an element in Kordiam.
+        
+        Args:
+            element_id: ID of the element to update
+            element_data: Updated element data
+            
+        Returns:
+            Response from the API
+        """
+        try:
+            url = f"{self.config.base_url}/api/v1_0_1/elements/{element_id}/"
+            
+            response = await self._make_authenticated_request('PUT', url, json=element_data)
+            response.raise_for_status()
+            
+            logging.info("Successfully updated element: %s", element_id,
+                         extra={'request_id': _request_id(response), 'element_id': element_id})
+            return response.json()
+            
+        except httpx.HTTPError as e:
+            logging.error("Failed to update element %s: %s", element_id, e,
+                          extra={'request_id': _request_id(e), 'element_id': element_id})
+            raise
+
+
+# --- Column converters used by ExcelProcessor.transform_dataframe ---
+# Each converter takes one non-null cell (as it would appear in an iterrows() row)
+# and returns the value for the Kordiam payload, mirroring transform_row_to_element.
+
+_MISSING = object()
+
+
+class _CellError:
+    """Marks a cell whose conversion raised; the error is re-raised for its row."""
+    __slots__ = ('error',)
+    
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def _convert_element_field(field: str, value: Any) -> Any:
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+def _convert_task_field(field: str, value: Any) -> Any:
+    if field == 'deadline' and isinstance(value, pd.Timestamp):
+        return {'date': value.strftime('%Y-%m-%d'), 'time': value.strftime('%H:%M')}
+    if field in ['status', 'format', 'user'] and isinstance(value, (int, float)):
+        return int(value)
+    if field == 'confirmationStatus':
+        return int(value)
+    return value
+
+
+def _convert_publication_field(field: str, value: Any) -> Any:
+    if field == 'single' and isinstance(value, pd.Timestamp):
+        return {'start': {'date': value.strftime('%Y-%m-%d')}}
+    if field in ['status', 'category', 'type'] and isinstance(value, (int, float)):
+        return int(value)
+    if field == 'platform' and isinstance(value, (int, float)):
+        return str(int(value))
+    if field == 'assignments':
+        if isinstance(value, str):
+            return [s.strip().lower() == 'true' for s in value.split(',')]
+        return [True]
+    return value
+
+
+def _convert_group_field(field: str, value: Any) -> Any:
+    if isinstance(value, (int, float)):
+        return [int(value)]
+    if isinstance(value, str):
+        group_ids = [int(g.strip()) for g in value.split(',') if g.strip().isdigit()]
+        if group_ids:
+            return group_ids
+    return _MISSING
+
+
+def _convert_location_field(field: str, value: Any) -> Any:
+    return str(value)
+
+
+def _convert_event_field(field: str, value: Any) -> Any:
+    if field in ['fromDate', 'toDate'] and isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d')
+    if field in ['fromTime', 'toTime'] and isinstance(value, pd.Timestamp):
+        return value.strftime('%H:%M')
+    return str(value)
+
+
+def _timestamp_builder(section: str, field: str) -> Optional[Callable[[str, str], Any]]:
+    """
+    Return a builder taking pre-formatted (date, time) strings for datetime columns,
+    or None when the field keeps the Timestamp and needs the per-cell converter.
+    """
+    if section == 'element_fields':
+        return lambda date, time: date
+    if section == 'tasks' and field == 'deadline':
+        return lambda date, time: {'date': date, 'time': time}
+    if section == 'publications' and field == 'single':
+        return lambda date, time: {'start': {'date': date}}
+    if section == 'event' and field in ['fromDate', 'toDate']:
+        return lambda date, time: date
+    if section == 'event' and field in ['fromTime', 'toTime']:
+        return lambda date, time: time
+    return None
+
+
+_SECTION_CONVERTERS = {
+    'element_fields': _convert_element_field,
+    'tasks': _convert_task_field,
+    'publications': _convert_publication_field,
+    'groups': _convert_group_field,
+    'location': _convert_location_field,
+    'event': _convert_event_field,
+}
+
+
+@dataclass(frozen=True)
+class MappedColumn:
+    """One mapped Excel column resolved against a sheet."""
+    excel_col: Any
+    field: str
+    convert: Callable[[str, Any], Any]
+    timestamp_builder: Optional[Callable[[str, str], Any]]
+
+
+_PLAN_CACHE_SIZE = 32
+_plan_cache: 'OrderedDict[Tuple[str, Tuple[Any, ...]], MappingPlan]' = OrderedDict()
+# Hash of each recently used mapping dict by id(); the dict is kept so its id is not reused
+_mapping_hashes: 'OrderedDict[int, Tuple[Dict[str, Any], str]]' = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+# Documentation keys of a mapping section; any other key is an Excel column, even if it starts with "_"
+_MAPPING_METADATA_KEYS = frozenset(['_comment', '_requirement', '_examples', '_field_types', '_instructions'])
+
+
+def _is_mapping_metadata(key: Any) -> bool:
+    """Whether a mapping key is documentation (_comment, _note, _note2, ...) rather than a column."""
+    return isinstance(key, str) and (key in _MAPPING_METADATA_KEYS or key.startswith('_note'))
+
+
+@dataclass(frozen=True)
+class MappingPlan:
+    """
+    A mapping configuration compiled against one sheet's headers.
+    
+    Resolves once which mapped columns exist in the sheet, their Kordiam field and
+    converter, so transforming rows never re-reads the mapping JSON. Documentation
+    keys (`_comment`, `_note*`, `_requirement`, `_examples`, `_field_types`,
+    `_instructions`) are skipped; other keys starting with "_" are mapped like any
+    column. Use MappingPlan.for_columns() to get a cached plan.
+    """
+    mapping_config: Dict[str, Any]
+    columns: Tuple[Any, ...]
+    sections: Dict[str, Tuple[MappedColumn, ...]]
+    missing_columns: Tuple[Any, ...]
+    
+    @classmethod
+    def compile(cls, mapping_config: Dict[str, Any], columns) -> 'MappingPlan':
+        """
+        Compile a mapping configuration against the given sheet headers.
+        
+        Args:
+            mapping_config: Complete mapping configuration
+            columns: Column labels of the sheet
+            
+        Returns:
+            Compiled mapping plan
+        """
+        columns = tuple(columns)
+        available = set(columns)
+        sections = {}
+        missing = []
+        
+        for section, convert in _SECTION_CONVERTERS.items():
+            section_config = mapping_config.get(section) or {}
+            if not isinstance(section_config, dict):
+                section_config = {}
+            
+            resolved = []
+            for excel_col, field in section_config.items():
+                if _is_mapping_metadata(excel_col):
+                    continue
+                if excel_col not in available:
+                    if excel_col not in missing:
+                        missing.append(excel_col)
+                    continue
+                resolved.append(MappedColumn(
+                    excel_col=excel_col,
+                    field=field,
+                    convert=convert,
+                    timestamp_builder=_timestamp_builder(section, field)
+                ))
+            sections[section] = tuple(resolved)
+        
+        return cls(
+            mapping_config=mapping_config,
+            columns=columns,
+            sections=sections,
+            missing_columns=tuple(missing)
+        )
+    
+    @classmethod
+    def for_columns(cls, mapping_config: Union[Dict[str, Any], 'MappingPlan'], columns) -> 'MappingPlan':
+        """
+        Return the cached plan for a mapping and header signature, compiling it on first use.
+        
+        A mapping dict is hashed once and then recognized by identity, so a mapping
+        changed in place after an import needs to be passed as a new dict.
+        
+        Args:
+            mapping_config: Mapping configuration, or an already compiled plan
+            columns: Column labels of the sheet
+            
+        Returns:
+            Compiled mapping plan
+        """
+        columns = tuple(columns)
+        if isinstance(mapping_config, MappingPlan):
+            if mapping_config.columns == columns:
+                return mapping_config
+            mapping_config = mapping_config.mapping_config
+        
+        key = (cls._identity_hash(mapping_config), columns)
+        with _plan_cache_lock:
+            plan = _plan_cache.get(key)
+            if plan is not None:
+                _plan_cache.move_to_end(key)
+                return plan
+        
+        plan = cls.compile(mapping_config, columns)
+        with _plan_cache_lock:
+            _plan_cache[key] = plan
+            while len(_plan_cache) > _PLAN_CACHE_SIZE:
+                _plan_cache.popitem(last=False)
+        return plan
+    
+    @staticmethod
+    def mapping_hash(mapping_config: Dict[str, Any]) -> str:
+        """Hash a mapping configuration. Key order is significant: it decides payload key order."""
+        return hashlib.sha256(json.dumps(mapping_config, default=str).encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def _identity_hash(cls, mapping_config: Dict[str, Any]) -> str:
+        """mapping_hash() of a mapping dict, computed once per dict object."""
+        with _plan_cache_lock:
+            cached = _mapping_hashes.get(id(mapping_config))
+            if cached is not None and cached[0] is mapping_config:
+                _mapping_hashes.move_to_end(id(mapping_config))
+                return cached[1]
+        
+        mapping_hash = cls.mapping_hash(mapping_config)
+        with _plan_cache_lock:
+            _mapping_hashes[id(mapping_config)] = (mapping_config, mapping_hash)
+            while len(_mapping_hashes) > _PLAN_CACHE_SIZE:
+                _mapping_hashes.popitem(last=False)
+        return mapping_hash
+
+
+# Strings pd.read_excel treats as missing by default; the streaming reader matches them
+_EXCEL_NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+
+def _fold_floats(values: np.ndarray) -> np.ndarray:
+    """Float array as objects: integral values as int, NaN as None, others unchanged."""
+    cells = values.astype(object)
+    integral = np.isfinite(values) & (np.abs(values) < 2 ** 63)
+    integral[integral] = values[integral] == np.floor(values[integral])
+    cells[integral] = values[integral].astype(np.int64).tolist()
+    cells[np.isnan(values)] = None
+    return cells
+
+
+def _normalize_cells(cells: np.ndarray) -> np.ndarray:
+    """Normalize an object array in place like _fold_floats, also turning datetimes into Timestamps."""
+    for i, value in enumerate(cells):
+        if isinstance(value, float):
+            if value != value:
+                cells[i] = None
+            elif value.is_integer() and abs(value) < 2 ** 63:
+                cells[i] = int(value)
+        elif value is pd.NA or value is pd.NaT:
+            cells[i] = None
+        elif isinstance(value, datetime) and not isinstance(value, pd.Timestamp):
+            cells[i] = pd.Timestamp(value)
+    return cells
+
+
+# Legacy .xls workbooks are OLE2 compound files; .xlsx/.xlsm are zip archives
+_OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# What ExcelProcessor and KordiamImporter accept as a workbook
+WorkbookSource = Union[str, bytes, BinaryIO, pd.DataFrame]
+
+
+def workbook_name(excel_file: Any) -> str:
+    """Name of a workbook source for logs and results: its path, or the name of an uploaded file."""
+    if isinstance(excel_file, (str, os.PathLike)):
+        return str(excel_file)
+    name = getattr(excel_file, 'name', None)
+    if isinstance(name, str):
+        return name
+    return '<DataFrame>' if isinstance(excel_file, pd.DataFrame) else '<workbook>'
+
+
+@dataclass(frozen=True)
+class RowSelection:
+    """
+    The rows of a sheet to import: a row range, one partition of n and/or a sample.
+    
+    Rows are numbered as in results and journals (1 is the first data row below the
+    header). The range is applied first, then the partition, then the sample, and
+    rows outside the selection are dropped before they are transformed.
+    
+    Partitions split a sheet between machines or processes that each import one of
+    them: 'modulo' takes every n-th row, 'hash' spreads rows by a stable hash of the
+    row number, so consecutive rows (often one slow or broken block) are not all
+    handled by the same partition. Samples are drawn with a fixed seed, so the same
+    selection picks the same rows on every run.
+    """
+    first_row: int = 1
+    last_row: Optional[int] = None
+    partition: Optional[Tuple[int, int]] = None  # (k, n), 1 <= k <= n
+    partition_by: str = 'hash'                   # 'hash' or 'modulo'
+    sample: Optional[int] = None
+    seed: int = 0
+    
+    def __post_init__(self):
+        if self.first_row < 1 or (self.last_row is not None and self.last_row < self.first_row):
+            raise ValueError(f"Invalid row range {self.first_row}-{self.last_row or ''}")
+        if self.partition is not None:
+            k, n = self.partition
+            if not 1 <= k <= n:
+                raise ValueError(f"Invalid partition {k}/{n}: expected k/n with 1 <= k <= n")
+        if self.partition_by not in ('hash', 'modulo'):
+            raise ValueError(f"Unknown partitioning {self.partition_by!r}: expected 'hash' or 'modulo'")
+        if self.sample is not None and self.sample < 0:
+            raise ValueError(f"Invalid sample size {self.sample}")
+    
+    @classmethod
+    def parse(cls,
+              rows: Optional[str] = None,
+              partition: Optional[str] = None,
+              partition_by: str = 'hash',
+              sample: Optional[int] = None,
+              seed: int = 0) -> 'RowSelection':
+        """
+        Build a selection from command line style values.
+        
+        Args:
+            rows: '1000-1999', '1000-' (to the end), '-1999' (from the start) or '42'
+            partition: 'k/n', e.g. '2/4' for the second of four partitions
+            partition_by: 'hash' or 'modulo'
+            sample: Number of rows to pick at random from the selected rows
+            seed: Seed of the sample
+            
+        Returns:
+            Row selection
+        """
+        first_row, last_row = 1, None
+        if rows:
+            try:
+                start, separator, end = rows.partition('-')
+                first_row = int(start) if start.strip() else 1
+                last_row = (int(end) if end.strip() else None) if separator else first_row
+            except ValueError:
+                raise ValueError(f"Invalid row range {rows!r}: expected e.g. 1000-1999") from None
+        parts = None
+        if partition:
+            try:
+                k, n = partition.split('/')
+                parts = (int(k), int(n))
+            except ValueError:
+                raise ValueError(f"Invalid partition {partition!r}: expected k/n, e.g. 2/4") from None
+        return cls(first_row, last_row, parts, partition_by, sample, seed)
+    
+    @property
+    def label(self) -> Optional[str]:
+        """Short name of the partition for file names (e.g. 'part2of4'), or None."""
+        return f"part{self.partition[0]}of{self.partition[1]}" if self.partition else None
+    
+    def _mask(self, index: pd.Index) -> np.ndarray:
+        """Rows of the range and partition, for an index of 0-based data row positions."""
+        rows = index.to_numpy(dtype=np.int64) + 1
+        mask = rows >= self.first_row
+        if self.last_row is not None:
+            mask &= rows <= self.last_row
+        if self.partition is not None:
+            k, n = self.partition
+            if self.partition_by == 'modulo':
+                buckets = (rows - 1) % n
+            else:
+                # Fibonacci hashing: the same on every machine and Python process
+                buckets = ((rows.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)) % np.uint64(n)
+            mask &= buckets == k - 1
+        return mask
+    
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Select the rows of a whole sheet."""
+        df = df[self._mask(df.index)]
+        if self.sample is not None and self.sample < len(df):
+            positions = sorted(random.Random(self.seed).sample(range(len(df)), self.sample))
+            df = df.iloc[positions]
+        return df
+    
+    def filter_chunks(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Select the rows of a sheet read in chunks (without sampling, which needs all rows).
+        
+        Stops reading once the chunks are past the end of the row range.
+        """
+        for chunk in chunks:
+            if len(chunk) and self.last_row is not None and chunk.index[0] + 1 > self.last_row:
+                break
+            chunk = chunk[self._mask(chunk.index)]
+            if len(chunk):
+                yield chunk
+
+
+class ExcelProcessor:
+    """Processes Excel files and transforms data for Kordiam API."""
+    
+    def __init__(self,
+                 excel_file: WorkbookSource,
+                 sheet_name: Optional[str] = None,
+                 dataframe: Optional[pd.DataFrame] = None,
+                 row_selection: Optional[RowSelection] = None):
+        """
+        Args:
+            excel_file: Path to the workbook, its content as bytes, a binary file object
+                (e.g. an upload; read once, from the start if seekable) or a parsed DataFrame
+            sheet_name: Specific sheet to read (optional)
+            dataframe: Already parsed sheet to use instead of reading `excel_file`
+            row_selection: Only read these rows (see RowSelection)
+        """
+        self.name = workbook_name(excel_file)
+        if isinstance(excel_file, pd.DataFrame):
+            excel_file, dataframe = None, excel_file
+        elif dataframe is None and hasattr(excel_file, 'read'):
+            if getattr(excel_file, 'seekable', lambda: False)():
+                excel_file.seek(0)
+            excel_file = excel_file.read()
+        if dataframe is not None and not self._has_row_positions(dataframe):
+            # Row numbers, the journal and row selections all rely on the index being
+            # the 0-based row position, as it is for a freshly read sheet
+            dataframe = dataframe.reset_index(drop=True)
+        self.excel_file = excel_file
+        self.sheet_name = sheet_name
+        self.dataframe = dataframe
+        self.row_selection = row_selection
+    
+    @staticmethod
+    def _has_row_positions(df: pd.DataFrame) -> bool:
+        index = df.index
+        return isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1
+    
+    def _open(self) -> Union[str, io.BytesIO]:
+        """The workbook as pandas and openpyxl read it: a path, or a fresh buffer over its bytes."""
+        if isinstance(self.excel_file, (bytes, bytearray)):
+            return io.BytesIO(self.excel_file)
+        return self.excel_file
+    
+    def _is_legacy_xls(self) -> bool:
+        if isinstance(self.excel_file, (bytes, bytearray)):
+            return bytes(self.excel_file[:len(_OLE2_SIGNATURE)]) == _OLE2_SIGNATURE
+        return str(self.excel_file).lower().endswith('.xls')
+        
+    def read_excel_data(self) -> pd.DataFrame:
+        """
+        Read data from Excel file.
+        
+        If the processor was given an already parsed `dataframe`, that frame is
+        used instead of reading the file, renumbered from 0 if its index is not
+        already the row position. Cells are normalized as in iter_excel_chunks
+        (see _normalize_frame). With a row selection, only the selected rows are
+        returned, keeping their row positions as index.
+        
+        Returns:
+            DataFrame containing the Excel data
+        """
+        if self.dataframe is not None:
+            return self._select(self._normalize_frame(self.dataframe))
+        
+        try:
+            if self.sheet_name:
+                df = pd.read_excel(self._open(), sheet_name=self.sheet_name)
+            else:
+                df = pd.read_excel(self._open())
+            
+            logging.info(f"Successfully read {len(df)} rows from Excel file")
+            return self._select(self._normalize_frame(df))
+            
+        except Exception as e:
+            logging.error(f"Failed to read Excel file {self.name}: {e}")
+            raise
+    
+    def _select(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.row_selection is None:
+            return df
+        selected = self.row_selection.apply(df)
+        logging.info(f"Selected {len(selected)} of {len(df)} rows")
+        return selected
+    
+    def sheet_names(self) -> List[str]:
+        """
+        List the sheets of the workbook without reading their data.
+        
+        Returns:
+            Sheet names in workbook order
+        """
+        if self._is_legacy_xls():
+            return list(pd.ExcelFile(self._open()).sheet_names)
+        workbook = openpyxl.load_workbook(self._open(), read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    
+    def iter_excel_chunks(self, chunk_size: int = 1000) -> Iterator[pd.DataFrame]:
+        """
+        Read the Excel file lazily in chunks of rows.
+        
+        Uses openpyxl's read-only mode so memory stays flat regardless of sheet size
+        and the first chunk is available before the rest of the sheet is parsed.
+        Chunks are indexed by data row position, like read_excel_data, and hold the
+        same cell values read_excel_data returns whatever the chunk size (see
+        _normalize_frame). Legacy .xls files are read in full and then chunked.
+        
+        With a row selection, rows outside it are dropped from each chunk and reading
+        stops after the last selected row; a sample needs every row, so the sheet is
+        then read in full and chunked.
+        
+        Args:
+            chunk_size: Number of data rows per chunk
+            
+        Yields:
+            DataFrames of at most chunk_size rows
+        """
+        selection = self.row_selection
+        if self.dataframe is not None or self._is_legacy_xls() or (selection and selection.sample is not None):
+            yield from iter_shards(self.read_excel_data(), chunk_size)
+        elif selection is not None:
+            yield from selection.filter_chunks(self._read_chunks(chunk_size))
+        else:
+            yield from self._read_chunks(chunk_size)
+    
+    def _read_chunks(self, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Stream the sheet through openpyxl (see iter_excel_chunks)."""
+        try:
+            workbook = openpyxl.load_workbook(self._open(), read_only=True, data_only=True)
+        except Exception as e:
+            logging.error(f"Failed to read Excel file {self.name}: {e}")
+            raise
+        
+        try:
+            worksheet = workbook[self.sheet_name] if self.sheet_name else workbook.worksheets[0]
+            rows = worksheet.iter_rows(values_only=True)
+            header_row = next(rows, None)
+            if header_row is None:
+                return
+            
+            headers = self._unique_headers(header_row)
+            width = len(headers)
+            chunk = []
+            blank_rows = 0
+            position = 0
+            
+            for values in rows:
+                record = [self._normalize_cell(value) for value in values[:width]]
+                if all(value is None for value in record):
+                    # Only keep blank rows that turn out not to be trailing, like read_excel
+                    blank_rows += 1
+                    continue
+                
+                for _ in range(blank_rows):
+                    chunk.append([None] * width)
+                blank_rows = 0
+                record.extend([None] * (width - len(record)))
+                chunk.append(record)
+                
+                if len(chunk) >= chunk_size:
+                    yield self._normalize_frame(
+                        pd.DataFrame(chunk, columns=headers, index=range(position, position + len(chunk))))
+                    position += len(chunk)
+                    chunk = []
+            
+            if chunk:
+                yield self._normalize_frame(
+                    pd.DataFrame(chunk, columns=headers, index=range(position, position + len(chunk))))
+                position += len(chunk)
+            
+            logging.info(f"Successfully streamed {position} rows from Excel file")
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def _unique_headers(header_row: Tuple[Any, ...]) -> List[Any]:
+        """Name blank headers and de-duplicate repeated ones the way pd.read_excel does."""
+        headers = []
+        seen = {}
+        for position, header in enumerate(header_row):
+            if header is None:
+                header = f"Unnamed: {position}"
+            base = header
+            while header in seen:
+                seen[base] += 1
+                header = f"{base}.{seen[base]}"
+            seen[header] = 0
+            headers.append(header)
+        return headers
+    
+    @staticmethod
+    def _normalize_cell(value: Any) -> Any:
+        """Treat the strings pd.read_excel reads as missing as empty cells."""
+        if isinstance(value, str) and value in _EXCEL_NA_VALUES:
+            return None
+        return value
+    
+    @staticmethod
+    def _normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Give every cell a value that does not depend on how pandas typed its column.
+        
+        pandas infers dtypes per frame: one blank cell turns a column of ids into
+        floats, while a streamed chunk without blanks keeps them as ints, so the
+        payloads (and content hashes) would depend on --stream and --chunk-size.
+        Datetime columns are kept; every other column becomes an object column of
+        plain values with integral floats folded to int, missing cells as None and
+        datetimes as pd.Timestamp. The frame passed in is not modified.
+        """
+        normalized = None
+        for position in range(df.shape[1]):
+            series = df.iloc[:, position]
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                continue
+            if series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype):
+                cells = _normalize_cells(series.to_numpy(dtype=object, copy=True))
+            elif pd.api.types.is_float_dtype(series.dtype):
+                cells = _fold_floats(series.to_numpy(dtype=float, na_value=np.nan))
+            elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+                cells = _normalize_cells(series.to_numpy(dtype=object, na_value=None, copy=True))
+            else:
+                cells = series.to_numpy(dtype=object)  # ints and bools box to Python values
+            if normalized is None:
+                normalized = df.copy(deep=False)
+            normalized.isetitem(position, cells)
+        return df if normalized is None else normalized
+    
+    def transform_row_to_element(self,
+                                 row: pd.Series,
+                                 mapping_config: Union[Dict[str, Any], MappingPlan]) -> Dict[str, Any]:
+        """
+        Transform a DataFrame row to Kordiam element format.
+        
+        Args:
+            row: Pandas Series representing a row
+            mapping_config: Complete mapping configuration, or a MappingPlan compiled from it
+            
+        Returns:
+            Dictionary formatted for Kordiam API
+        """
+        plan = MappingPlan.for_columns(mapping_config, row.index)
+        compiled = {}
+        present = {}
+        
+        for section, mapped_columns in plan.sections.items():
+            columns = []
+            any_present = False
+            for column in mapped_columns:
+                value = row[column.excel_col]
+                if pd.notna(value):
+                    any_present = True
+                    try:
+                        cell = column.convert(column.field, value)
+                    except Exception as e:
+                        cell = _CellError(e)
+                else:
+                    cell = _MISSING
+                columns.append((column.field, [cell]))
+            compiled[section] = columns
+            present[section] = [any_present]
+        
+        return self._assemble_element(0, compiled, present)
+    
+    def transform_dataframe(self, df: pd.DataFrame, mapping_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Transform a whole DataFrame to Kordiam element format.
+        
+        Produces the same element dicts as calling transform_row_to_element on every
+        row, but converts each mapped column once instead of touching every cell
+        through a per-row Series.
+        
+        Args:
+            df: DataFrame as returned by read_excel_data
+            mapping_config: Complete mapping configuration
+            
+        Returns:
+            List of element dicts, one per row
+        """
+        elements = []
+        for _, element_data, error in self.iter_elements(df, mapping_config):
+            if error is not None:
+                raise error
+            elements.append(element_data)
+        return elements
+    
+    def iter_elements(self,
+                      df: pd.DataFrame,
+                      mapping_config: Union[Dict[str, Any], MappingPlan]) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Transform a DataFrame column by column and yield one element per row.
+        
+        Args:
+            df: DataFrame as returned by read_excel_data
+            mapping_config: Complete mapping configuration, or a MappingPlan compiled from it
+            
+        Yields:
+            (index, element_data, error) tuples; error is set when the row failed to convert
+        """
+        plan = MappingPlan.for_columns(mapping_config, df.columns)
+        
+        # Rows of a frame with a single shared non-object dtype are boxed differently
+        # between pandas versions, so keep the row-wise path for those.
+        if len(df.columns) == 0 or df.iloc[:0].to_numpy().dtype != object:
+            for index, row in df.iterrows():
+                try:
+                    yield index, self.transform_row_to_element(row, plan), None
+                except Exception as e:
+                    yield index, None, e
+            return
+        
+        compiled = {}
+        present = {}
+        for section, mapped_columns in plan.sections.items():
+            compiled[section], present[section] = self._convert_columns(df, mapped_columns)
+        
+        for position, index in enumerate(df.index):
+            try:
+                yield index, self._assemble_element(position, compiled, present), None
+            except Exception as e:
+                yield index, None, e
+    
+    def iter_elements_parallel(self,
+                               frames: Iterable[pd.DataFrame],
+                               mapping_config: Dict[str, Any],
+                               processes: int) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Transform DataFrame shards in a process pool and yield elements in row order.
+        
+        At most ``2 * processes`` shards are in the pool at a time, so shards can be
+        produced lazily (e.g. by iter_excel_chunks) without reading the whole sheet.
+        Workers send each element back pickled on its own and it is unpickled only when
+        yielded: unpickling a whole shard of nested dicts at once costs this process
+        more than half of what transforming it would, mostly in garbage collection.
+        
+        Args:
+            frames: DataFrame shards in row order
+            mapping_config: Complete mapping configuration (plans are compiled in each worker)
+            processes: Number of worker processes
+            
+        Yields:
+            (index, element_data, error) tuples, as iter_elements
+        """
+        if isinstance(mapping_config, MappingPlan):
+            mapping_config = mapping_config.mapping_config
+        
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for frame in frames:
+                pending.append(executor.submit(_transform_shard, frame, mapping_config))
+                if len(pending) >= processes * 2:
+                    yield from self._unpack_shard(pending.popleft().result())
+            while pending:
+                yield from self._unpack_shard(pending.popleft().result())
+    
+    @staticmethod
+    def _unpack_shard(rows: List[Tuple[Any, Optional[bytes], Optional[Exception]]]
+                      ) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """Unpickle the elements of a shard returned by _transform_shard, one row at a time."""
+        for index, payload, error in rows:
+            yield index, pickle.loads(payload) if payload is not None else None, error
+    
+    def _convert_columns(self,
+                         df: pd.DataFrame,
+                         mapped_columns: Tuple[MappedColumn, ...]) -> Tuple[List[Tuple[str, List[Any]]], np.ndarray]:
+        """
+        Convert every mapped column of one mapping section.
+        
+        Returns:
+            ([(kordiam_field, cells), ...], present) where cells holds the converted value,
+            _MISSING or a _CellError for each row, and present marks rows with any value
+        """
+        columns = []
+        present = np.zeros(len(df), dtype=bool)
+        for column in mapped_columns:
+            series = df[column.excel_col]
+            cells = [_MISSING] * len(series)
+            
+            builder = column.timestamp_builder if pd.api.types.is_datetime64_any_dtype(series) else None
+            if builder is not None:
+                mask = series.notna().to_numpy()
+                dates, times = self._format_timestamps(series)
+                for i in np.flatnonzero(mask):
+                    cells[i] = builder(dates[i], times[i])
+            else:
+                # astype first: to_numpy(dtype=object) turns integer categories with gaps into floats
+                values = series.astype(object).to_numpy()
+                mask = pd.notna(values)
+                for i in np.flatnonzero(mask):
+                    try:
+                        cells[i] = column.convert(column.field, values[i])
+                    except Exception as e:
+                        cells[i] = _CellError(e)
+            
+            present |= mask
+            columns.append((column.field, cells))
+        return columns, present
+    
+    @staticmethod
+    def _format_timestamps(series: pd.Series) -> Tuple[List[str], List[str]]:
+        """
+        Format a datetime column as '%Y-%m-%d' dates and '%H:%M' times in vectorized calls.
+        
+        Returns:
+            (dates, times) lists aligned with the series; entries for NaT are meaningless
+        """
+        if series.dt.tz is not None:
+            series = series.dt.tz_localize(None)  # Keep local wall-clock time
+        if (series.dt.year < 1000).any():
+            # strftime does not zero-pad short years; keep its output exactly
+            dates = [stamp.strftime('%Y-%m-%d') if pd.notna(stamp) else '' for stamp in series]
+            times = [stamp.strftime('%H:%M') if pd.notna(stamp) else '' for stamp in series]
+            return dates, times
+        stamps = np.datetime_as_string(series.to_numpy(dtype='datetime64[m]'), unit='m')
+        return stamps.astype('<U10').tolist(), [stamp[11:16] for stamp in stamps.tolist()]
+    
+    @staticmethod
+    def _assemble_element(position: int,
+                          compiled: Dict[str, List[Tuple[str, List[Any]]]],
+                          present: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the element dict for one row from pre-converted columns."""
+        
+        def fill(target: Dict[str, Any], columns: List[Tuple[str, List[Any]]]):
+            for field, cells in columns:
+                value = cells[position]
+                if value is _MISSING:
+                    continue
+                if type(value) is _CellError:
+                    raise value.error
+                target[field] = value
+        
+        element_data = {}
+        fill(element_data, compiled['element_fields'])
+        
+        if present['tasks'][position]:
+            task = {}
+            fill(task, compiled['tasks'])
+            if 'confirmationStatus' not in task:
+                task['confirmationStatus'] = -2  # Not requested
+            element_data['tasks'] = [task]
+        
+        if present['publications'][position]:
+            publication = {}
+            fill(publication, compiled['publications'])
+            if 'assignments' not in publication and 'tasks' in element_data:
+                publication['assignments'] = [True] * len(element_data['tasks'])
+            if publication:
+                element_data['publications'] = [publication]
+        
+        for _, cells in compiled['groups']:
+            value = cells[position]
+            if value is _MISSING:
+                continue
+            if type(value) is _CellError:
+                raise value.error
+            element_data['groups'] = value
+        
+        if present['location'][position]:
+            location = {}
+            fill(location, compiled['location'])
+            if location:
+                element_data['location'] = location
+        
+        if present['event'][position]:
+            event = {}
+            fill(event, compiled['event'])
+            if event:
+                element_data['event'] = event
+        
+        return element_data
+
+
+@dataclass(frozen=True)
+class ParsedWorkbook:
+    """One sheet of an uploaded workbook, parsed once and shared through WorkbookCache."""
+    digest: str
+    sheet_name: Optional[str]
+    frame: pd.DataFrame
+    headers: List[str]
+    first_row: Dict[str, Any]
+    size_bytes: int
+
+
+class WorkbookCache:
+    """
+    Parsed workbooks keyed by the SHA-256 of their content.
+    
+    Re-uploading or re-rendering the same bytes returns the DataFrame parsed the
+    first time, along with its headers and first row for previews. The least
+    recently used entries are evicted once more than `max_entries` workbooks are
+    held or their frames use more than `max_bytes` of memory; a workbook larger
+    than `max_bytes` on its own is parsed but not kept. Thread-safe. Cached frames
+    are shared, so callers must not modify them.
+    """
+    
+    def __init__(self, max_entries: int = 8, max_bytes: int = 512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple[str, Optional[str]], ParsedWorkbook]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+    
+    def get(self, data: bytes, sheet_name: Optional[str] = None) -> ParsedWorkbook:
+        """
+        Parse a workbook, or return it from the cache if these bytes were parsed before.
+        
+        Args:
+            data: Content of the .xlsx/.xls file
+            sheet_name: Sheet to read (default: the first sheet)
+            
+        Returns:
+            The parsed sheet
+        """
+        key = (self.content_hash(data), sheet_name)
+        with self._lock:
+            workbook = self._entries.get(key)
+            if workbook is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return workbook
+            self.misses += 1
+        
+        # Parse outside the lock; two sessions uploading the same file at once both parse it
+        frame = pd.read_excel(io.BytesIO(data), sheet_name=sheet_name or 0)
+        workbook = ParsedWorkbook(
+            digest=key[0],
+            sheet_name=sheet_name,
+            frame=frame,
+            headers=[str(column) for column in frame.columns],
+            first_row={} if frame.empty else {str(column): value for column, value in frame.iloc[0].items()},
+            size_bytes=int(frame.memory_usage(index=True, deep=True).sum())
+        )
+        if workbook.size_bytes > self.max_bytes:
+            logging.info(f"Workbook {key[0][:12]} uses {workbook.size_bytes} bytes, more than the cache holds")
+            return workbook
+        
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = workbook
+                self._bytes += workbook.size_bytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size_bytes
+        return workbook
+    
+    def stats(self) -> Dict[str, int]:
+        """Entries, memory use and hit/miss counts of the cache."""
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses}
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_WORKBOOK_SUFFIXES = ('.xlsx', '.xlsm', '.xls')
+_WRITE_BACK_SUFFIX = '.kordiam'  # Copies written by WorkbookWriteBack: <name>.kordiam.xlsx
+
+
+def expand_workbook_paths(inputs: List[str]) -> List[str]:
+    """
+    Resolve workbook arguments to a list of files.
+    
+    Args:
+        inputs: Files, directories (all workbooks directly inside them) or glob
+            patterns such as 'desks/*.xlsx' or 'desks/**/*.xlsx'
+        
+    Returns:
+        Workbook paths in argument order, sorted within each directory or pattern,
+        without duplicates and without Excel lock files (~$name.xlsx). Directories
+        also skip result copies written by WorkbookWriteBack.
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(str(path) for path in Path(item).iterdir()
+                             if path.is_file() and path.suffix.lower() in _WORKBOOK_SUFFIXES
+                             and not path.stem.endswith(_WRITE_BACK_SUFFIX))
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item, recursive=True))
+            if not matches:
+                logging.warning(f"No workbooks match {item}")
+        else:
+            matches = [item]
+        for path in matches:
+            if not Path(path).name.startswith('~$') and path not in paths:
+                paths.append(path)
+    return paths
+
+
+def _transform_shard(df: pd.DataFrame, mapping_config: Dict[str, Any]) -> List[Tuple[Any, Optional[bytes], Optional[Exception]]]:
+    """Process pool entry point: transform one shard of a sheet, each element pickled separately."""
+    processor = ExcelProcessor(None)
+    return [(index, pickle.dumps(element_data, pickle.HIGHEST_PROTOCOL) if element_data is not None else None, error)
+            for index, element_data, error in processor.iter_elements(df, mapping_config)]
+
+
+def iter_shards(df: pd.DataFrame, shard_size: int) -> Iterator[pd.DataFrame]:
+    """Split a DataFrame into consecutive shards of at most `shard_size` rows."""
+    for start in range(0, len(df), shard_size):
+        yield df.iloc[start:start + shard_size]
+
+
+def _ends_with_newline(path: str) -> bool:
+    """True if the file is empty or its last byte is a newline."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def element_content_hash(element_data: Dict[str, Any]) -> str:
+    """Stable hash of a transformed element, independent of key order."""
+    payload = json.dumps(element_data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ImportJournal:
+    """
+    Append-only JSONL journal of row outcomes for resumable imports.
+    
+    Every processed row is written as one line (row number, content hash, element id,
+    status) and flushed immediately, so an import that dies part-way can be resumed
+    by skipping the rows the journal already records as committed.
+    """
+    
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._committed = self._load_committed() if resume else {}
+        # A fresh run starts a new journal; a resumed run appends to the old one
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and not _ends_with_newline(path):
+            self._file.write('\n')  # Terminate a line cut off by the interrupted run
+    
+    def __enter__(self) -> 'ImportJournal':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _load_committed(self) -> Dict[int, Dict[str, Any]]:
+        """Read the latest successful entry per row from an existing journal."""
+        committed = {}
+        if not os.path.exists(self.path):
+            return committed
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Partial line from an interrupted write
+                if not isinstance(entry, dict) or 'row' not in entry:
+                    continue  # Not a journal entry
+                if entry.get('status') == 'success':
+                    committed[entry['row']] = entry
+                else:
+                    committed.pop(entry.get('row'), None)
+        
+        logging.info(f"Loaded {len(committed)} committed rows from journal {self.path}")
+        return committed
+    
+    def is_committed(self, row: int, content_hash: Optional[str] = None) -> bool:
+        """
+        True if the journal records the row as created.
+        
+        Args:
+            row: 1-based row number
+            content_hash: If given, only count the row as committed when it was
+                          created with this content
+        """
+        entry = self._committed.get(row)
+        if entry is None:
+            return False
+        return content_hash is None or entry.get('hash') == content_hash
+    
+    def committed_element_id(self, row: int) -> Any:
+        """Element id the journal records for a committed row, if any."""
+        entry = self._committed.get(row)
+        return entry.get('element_id') if entry else None
+    
+    def record(self, row: int, content_hash: Optional[str], element_id: Any, status: str):
+        """Append one row outcome to the journal."""
+        entry = {
+            'row': row,
+            'hash': content_hash,
+            'element_id': element_id,
+            'status': status,
+            'ts': datetime.now().isoformat(timespec='seconds')
+        }
+        with self._lock:
+            self._file.write(json.dumps(entry, default=str) + '\n')
+            self._file.flush()
+    
+    def close(self):
+        """Close the journal file."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class UpsertIndex:
+    """
+    Persistent map from a row key (e.g. the element slug) to its Kordiam element.
+    
+    Remembers the element id and content hash of every keyed row that was imported,
+    so re-importing the same sheet can skip unchanged rows and update changed ones.
+    Stored as append-only JSONL (the last entry per key wins) and compacted on close.
+    A read-only index (used by dry runs) never creates or writes the file.
+    """
+    
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._lines = 0
+        self._file = None
+        
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Partial line from an interrupted write
+                    self._entries[entry['key']] = entry
+                    self._lines += 1
+            logging.info(f"Loaded {len(self._entries)} keys from upsert index {path}")
+        
+        if read_only:
+            return
+        self._file = open(path, 'a', encoding='utf-8')
+        if not _ends_with_newline(path):
+            self._file.write('\n')  # Terminate a line cut off by an interrupted run
+    
+    def __enter__(self) -> 'UpsertIndex':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored entry (element_id, hash) for a key, if any."""
+        return self._entries.get(key)
+    
+    def record(self, key: str, element_id: Any, content_hash: str):
+        """Remember the element id and content hash imported for a key (in memory only if read-only)."""
+        entry = {'key': key, 'element_id': element_id, 'hash': content_hash}
+        with self._lock:
+            self._entries[key] = entry
+            if self._file is None:
+                return
+            self._lines += 1
+            self._file.write(json.dumps(entry, default=str) + '\n')
+            self._file.flush()
+    
+    def close(self):
+        """Close the index, rewriting it without superseded entries if worthwhile."""
+        with self._lock:
+            if self._file is None or self._file.closed:
+                return
+            self._file.close()
+            if self._lines > 2 * len(self._entries):
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for entry in self._entries.values():
+                        f.write(json.dumps(entry, default=str) + '\n')
+                os.replace(tmp_path, self.path)
+                self._lines = len(self._entries)
+
+
+RESULT_FIELDS = ('file', 'sheet', 'row', 'status', 'action', 'element_id', 'error')
+
+
+class ResultSink:
+    """
+    Receives the outcome of every imported row as it happens.
+    
+    Each entry is a dict with the RESULT_FIELDS ('file', 'sheet', 'row', 'status',
+    'action', 'element_id', 'error') plus the transformed element as 'data'.
+    write() may be called from several threads.
+    """
+    
+    def __enter__(self) -> 'ResultSink':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def write(self, entry: Dict[str, Any]):
+        raise NotImplementedError
+    
+    def close(self):
+        """Flush and release the sink."""
+
+
+class JsonlResultSink(ResultSink):
+    """Writes one JSON line per row outcome."""
+    
+    def __init__(self, path: str, include_data: bool = False):
+        self.path = path
+        self.include_data = include_data
+        self._lock = threading.Lock()
+        self._file = open(path, 'w', encoding='utf-8', buffering=1024 * 1024)
+    
+    def write(self, entry: Dict[str, Any]):
+        record = {field: entry.get(field) for field in RESULT_FIELDS}
+        if self.include_data:
+            record['data'] = entry.get('data')
+        line = json.dumps(record, separators=(',', ':'), default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+    
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class CsvResultSink(ResultSink):
+    """Writes one CSV row per row outcome (without the element data)."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'w', encoding='utf-8', newline='', buffering=1024 * 1024)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(RESULT_FIELDS)
+    
+    def write(self, entry: Dict[str, Any]):
+        with self._lock:
+            self._writer.writerow([entry.get(field) for field in RESULT_FIELDS])
+    
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class SqliteResultSink(ResultSink):
+    """
+    Stores row outcomes in the `results` table of a SQLite database.
+    
+    Rows are inserted in batches of `commit_every` to keep the import fast, so
+    an interrupted run may lose the last uncommitted batch (the journal still has it).
+    """
+    
+    def __init__(self, path: str, include_data: bool = False, commit_every: int = 500):
+        self.path = path
+        self.include_data = include_data
+        self.commit_every = commit_every
+        self._lock = threading.Lock()
+        self._pending = []
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (file TEXT, sheet TEXT, row INTEGER, status TEXT, "
+            "action TEXT, element_id TEXT, error TEXT, data TEXT, ts TEXT)")
+    
+    def write(self, entry: Dict[str, Any]):
+        data = json.dumps(entry.get('data'), default=str) if self.include_data and entry.get('data') else None
+        element_id = entry.get('element_id')
+        record = (entry.get('file'), entry.get('sheet'), entry.get('row'), entry.get('status'), entry.get('action'),
+                  None if element_id is None else str(element_id), entry.get('error'), data,
+                  datetime.now().isoformat(timespec='seconds'))
+        with self._lock:
+            self._pending.append(record)
+            if len(self._pending) >= self.commit_every:
+                self._flush()
+    
+    def _flush(self):
+        if self._pending:
+            self._connection.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self._pending)
+            self._connection.commit()
+            self._pending = []
+    
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._flush()
+                self._connection.close()
+                self._connection = None
+
+
+class WorkbookWriteBack(ResultSink):
+    """
+    Writes the import outcome back into a copy of each source workbook.
+    
+    Only the element id, status and error of each row are kept until close(), which
+    saves `<workbook>.kordiam.xlsx` (or `.xlsm`) next to every imported workbook with
+    WRITE_BACK_COLUMNS appended to the imported sheets. Re-importing such a copy reuses
+    the columns. Legacy .xls workbooks cannot be written and are skipped with a warning.
+    Only workbooks read from a file path can be written back (see check_source()).
+    """
+    
+    WRITE_BACK_COLUMNS = ('Kordiam Element ID', 'Kordiam Status', 'Kordiam Error')
+    
+    def __init__(self, suffix: str = _WRITE_BACK_SUFFIX):
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._outcomes: Dict[Tuple[str, Optional[str]], Dict[int, Tuple[Any, str, Optional[str]]]] = {}
+        self.written: List[str] = []
+    
+    def write(self, entry: Dict[str, Any]):
+        if not entry.get('file'):
+            return
+        key = (entry['file'], entry.get('sheet'))
+        with self._lock:
+            self._outcomes.setdefault(key, {})[entry['row']] = (entry.get('element_id'), entry['status'], entry.get('error'))
+    
+    @staticmethod
+    def check_source(excel_file: Any):
+        """
+        Reject a workbook source that has no file to copy.
+        
+        Args:
+            excel_file: Workbook source of an import
+            
+        Raises:
+            ValueError: If the source is bytes, a file object or a DataFrame
+        """
+        if not isinstance(excel_file, (str, os.PathLike)):
+            raise ValueError(f"Cannot write results back into {workbook_name(excel_file)}: "
+                             f"write-back needs a workbook read from a file path")
+    
+    def output_path(self, excel_file: str) -> str:
+        """Path of the written-back copy of a workbook."""
+        base, extension = os.path.splitext(excel_file)
+        return f"{base}{self.suffix}{extension}"
+    
+    def close(self):
+        with self._lock:
+            outcomes, self._outcomes = self._outcomes, {}
+        by_file: Dict[str, Dict[Optional[str], Dict[int, Tuple[Any, str, Optional[str]]]]] = {}
+        for (excel_file, sheet), rows in outcomes.items():
+            by_file.setdefault(excel_file, {})[sheet] = rows
+        
+        for excel_file, sheets in by_file.items():
+            if excel_file.lower().endswith('.xls'):
+                logging.warning(f"Cannot write results back into legacy .xls workbook {excel_file}")
+                continue
+            try:
+                self.written.append(self._write_copy(excel_file, sheets))
+            except Exception as e:
+                logging.error(f"Failed to write results back into a copy of {excel_file}: {e}")
+    
+    def _write_copy(self, excel_file: str, sheets: Dict[Optional[str], Dict[int, Tuple[Any, str, Optional[str]]]]) -> str:
+        workbook = openpyxl.load_workbook(excel_file, keep_vba=excel_file.lower().endswith('.xlsm'))
+        for sheet, rows in sheets.items():
+            worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+            headers = {cell.value: cell.column for cell in worksheet[1] if cell.value is not None}
+            next_column = max(headers.values(), default=0) + 1
+            columns = []
+            for name in self.WRITE_BACK_COLUMNS:
+                if name not in headers:
+                    worksheet.cell(row=1, column=next_column, value=name)
+                    headers[name] = next_column
+                    next_column += 1
+                columns.append(headers[name])
+            
+            # Result row N is data row N, i.e. sheet row N + 1 below the header
+            for row, values in rows.items():
+                for column, value in zip(columns, values):
+                    if value is not None and not isinstance(value, (str, int, float)):
+                        value = str(value)
+                    worksheet.cell(row=row + 1, column=column, value=value)
+        
+        output_path = self.output_path(excel_file)
+        workbook.save(output_path)
+        logging.info(f"Wrote import results into {output_path}")
+        return output_path
+
+
+def open_result_sink(path: str, include_data: bool = False) -> ResultSink:
+    """
+    Open a result sink for a file, choosing the format by its extension.
+    
+    Args:
+        path: Target file ending in .jsonl, .csv, .sqlite or .db
+        include_data: Also store the transformed element (JSONL and SQLite only)
+        
+    Returns:
+        The opened sink
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return JsonlResultSink(path, include_data)
+    if extension == '.csv':
+        return CsvResultSink(path)
+    if extension in ('.sqlite', '.sqlite3', '.db'):
+        return SqliteResultSink(path, include_data)
+    raise ValueError(f"Unsupported result file '{path}' (use .jsonl, .csv, .sqlite or .db)")
+
+
+class PipelineStats:
+    """
+    Throughput and queue-depth counters of a staged import.
+    
+    Every stage reports how many items it handled and how long it was busy (time
+    spent waiting on a queue is excluded). snapshot() can be called from any
+    thread while the import is running.
+    """
+    
+    def __init__(self, stages: List[str], queues: Dict[str, queue.Queue]):
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._stages = {stage: {'items': 0, 'busy_seconds': 0.0} for stage in stages}
+        self._queues = queues
+        self._max_depth = {name: 0 for name in queues}
+    
+    def add(self, stage: str, items: int, busy_seconds: float):
+        with self._lock:
+            counters = self._stages[stage]
+            counters['items'] += items
+            counters['busy_seconds'] += busy_seconds
+    
+    def observe(self, name: str):
+        """Record the current depth of a queue after an item was put on it."""
+        depth = self._queues[name].qsize()
+        with self._lock:
+            if depth > self._max_depth[name]:
+                self._max_depth[name] = depth
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current counters.
+        
+        Returns:
+            Dictionary with 'elapsed_seconds', per-stage items, busy seconds and
+            items per second of wall time, and per-queue depth, maximum depth and capacity
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._started_at
+            stages = {}
+            for stage, counters in self._stages.items():
+                stages[stage] = {
+                    'items': counters['items'],
+                    'busy_seconds': round(counters['busy_seconds'], 3),
+                    'rate': round(counters['items'] / elapsed, 2) if elapsed > 0 else 0.0
+                }
+            queues = {
+                name: {'depth': q.qsize(), 'max_depth': self._max_depth[name], 'capacity': q.maxsize}
+                for name, q in self._queues.items()
+            }
+        return {'elapsed_seconds': round(elapsed, 3), 'stages': stages, 'queues': queues}
+
+
+# Marks the end of a pipeline queue
+_END_OF_STREAM = object()
+# Outcome of a queued row that was dropped because the import was cancelled
+_NOT_UPLOADED = object()
+
+
+class KordiamImporter:
+    """Main importer class that orchestrates the Excel to Kordiam import process."""
+    
+    def __init__(self, config: KordiamConfig, max_workers: int = 1, client: Optional[KordiamAPIClient] = None):
+        self.client = client or KordiamAPIClient(config)
+        self.metrics = self.client.metrics
+        self.max_workers = max_workers
+        self._upload_executor = None
+        self.journal = None
+        self.upsert_index = None
+        self.upsert_key = None
+        self._upsert_targets = {}
+        self.pipeline_stats = None
+        self.result_sinks: List[ResultSink] = []
+        self._source: Tuple[Optional[str], Optional[str]] = (None, None)
+        self._samples: List[Dict[str, Any]] = []
+        self._sample_size = 0
+        self._sample_seen = 0
+        self._sample_random = random.Random(0)
+        self._cancelled = threading.Event()
+        self.rows_total: Optional[int] = None
+        self.results = {
+            'success': 0,
+            'errors': 0,
+            'skipped': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'invalid': 0,
+            'details': []
+        }
+    
+    def import_from_excel(self, 
+                         excel_file: WorkbookSource, 
+                         mapping_config: Dict[str, Any],
+                         sheet_name: Optional[str] = None,
+                         dry_run: bool = False,
+                         max_workers: Optional[int] = None,
+                         stream: bool = False,
+                         chunk_size: int = 1000,
+                         journal_path: Optional[str] = None,
+                         resume: bool = False,
+                         upsert_key: Optional[str] = None,
+                         upsert_index_path: Optional[str] = None,
+                         batch_size: Optional[int] = None,
+                         batch_sender: Optional[BatchSender] = None,
+                         pipeline: bool = False,
+                         queue_size: int = 256,
+                         transform_processes: int = 1,
+                         result_sinks: Optional[List[ResultSink]] = None,
+                         samples: int = 3,
+                         dataframe: Optional[pd.DataFrame] = None,
+                         row_selection: Optional[RowSelection] = None) -> Dict[str, Any]:
+        """
+        Import data from Excel file to Kordiam.
+        
+        Args:
+            excel_file: Path to Excel file, its content as bytes, a binary file object or a
+                parsed DataFrame
+            mapping_config: Complete mapping configuration
+            sheet_name: Specific sheet to read (optional)
+            dry_run: If True, don't actually create elements
+            max_workers: Number of concurrent uploads (defaults to the importer setting)
+            stream: If True, read the sheet lazily in chunks so uploads start immediately
+            chunk_size: Rows per chunk in streaming mode
+            journal_path: Append row outcomes to this journal file (ignored for dry runs)
+            resume: Skip rows the journal already records as created with the same content
+            upsert_key: Kordiam field identifying a row across imports (e.g. 'slug'); enables
+                upsert mode, which skips unchanged rows and updates changed ones
+            upsert_index_path: File remembering element ids per key (default: kordiam_upsert_index.jsonl)
+            batch_size: Submit elements in batches of this size; failed members are retried
+            batch_sender: How batches are submitted (default: FanOutSender with `max_workers`)
+            pipeline: Run reading, transforming and uploading as concurrent stages
+                connected by bounded queues (ignored for dry runs and batch imports)
+            queue_size: Capacity of the queue between the transform and upload stages
+            transform_processes: Transform shards of `chunk_size` rows in this many worker
+                processes (results keep row order)
+            result_sinks: Stream every row outcome to these sinks (closed by the caller).
+                When given, results['details'] is not filled and only the counters are kept
+            samples: Dry runs keep this many randomly sampled elements in results['samples']
+            dataframe: Already parsed sheet (e.g. from WorkbookCache) to import instead of
+                reading `excel_file`, which then only names the source in results
+            row_selection: Import only these rows (a range, a partition and/or a sample);
+                the others are skipped before they are transformed
+            
+        Returns:
+            Import results summary
+        """
+        self._check_result_sinks(excel_file, result_sinks)
+        processor = ExcelProcessor(excel_file, sheet_name, dataframe, row_selection)
+        workers = max(1, max_workers or self.max_workers)
+        
+        started = time.perf_counter()
+        self._open_state(dry_run, journal_path, resume, upsert_key, upsert_index_path)
+        self._open_results(processor.name, sheet_name, result_sinks, samples if dry_run else 0)
+        try:
+            if pipeline and not dry_run and not batch_size:
+                self._run_pipeline(processor, mapping_config, workers, stream, chunk_size, queue_size,
+                                   transform_processes)
+            else:
+                self._run_import(processor, mapping_config, dry_run, workers, stream, chunk_size,
+                                 batch_size, batch_sender, transform_processes)
+        finally:
+            self._close_state()
+        
+        if dry_run:
+            self.results['samples'] = sorted(self._samples, key=lambda sample: sample['row'])
+        if self.cancelled:
+            self.results['cancelled'] = True
+            logging.warning(f"Import of {processor.name} cancelled after {self.progress()['processed']} rows")
+        self.results['timings'] = self._timings(started)
+        return self.results
+    
+    def cancel(self):
+        """
+        Stop the running import cleanly; safe to call from any thread.
+        
+        No further rows are read or transformed. Uploads already in flight finish
+        and are recorded (and journaled), then the import returns its results with
+        results['cancelled'] set.
+        """
+        self._cancelled.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() was called."""
+        return self._cancelled.is_set()
+    
+    def progress(self) -> Dict[str, Optional[int]]:
+        """
+        Progress of the running import; safe to call from any thread.
+        
+        Returns:
+            Dictionary with 'processed' (rows recorded as created, updated, failed,
+            skipped, unchanged or invalid) and 'total' (rows in the sheet, None while streaming)
+        """
+        results = self.results
+        processed = (results['success'] + results['errors'] + results['skipped'] + results['unchanged']
+                     + results['invalid'])
+        return {'processed': processed, 'total': self.rows_total}
+    
+    def _timings(self, started: float) -> Dict[str, Any]:
+        """Phase and HTTP timings collected so far, plus wall time since `started`."""
+        timings = self.metrics.snapshot()
+        timings['wall_seconds'] = round(time.perf_counter() - started, 3)
+        return timings
+    
+    def import_workbooks(self,
+                         workbooks: List[str],
+                         mapping_config: Dict[str, Any],
+                         sheet_name: Optional[str] = None,
+                         all_sheets: bool = False,
+                         parallel_files: int = 1,
+                         dry_run: bool = False,
+                         journal: bool = True,
+                         **options) -> Dict[str, Any]:
+        """
+        Import several workbooks (or all sheets of them) in one run.
+        
+        All imports share this importer's API client, so one OAuth2 token and one
+        connection pool serve every file, and concurrent uploads of all files run
+        on one pool of `max_workers` threads.
+        
+        Args:
+            workbooks: Workbook paths (see expand_workbook_paths)
+            mapping_config: Complete mapping configuration, used for every sheet
+            sheet_name: Sheet to import from each workbook (default: the first sheet)
+            all_sheets: Import every sheet of every workbook
+            parallel_files: Number of sheets read and transformed at the same time
+            dry_run: If True, don't actually create elements
+            journal: Keep a journal per sheet next to each workbook (see journal_path_for)
+            **options: Further import_from_excel options (stream, resume, upsert_key, ...)
+            
+        Returns:
+            Consolidated report with totals and one entry per imported sheet
+        """
+        if options.get('upsert_key') and parallel_files > 1:
+            logging.info("Upsert mode shares one index file; importing workbooks one at a time")
+            parallel_files = 1
+        
+        jobs = []
+        for path in workbooks:
+            if all_sheets:
+                try:
+                    jobs.extend((path, sheet) for sheet in ExcelProcessor(path).sheet_names())
+                except Exception as e:
+                    logging.error(f"Failed to list sheets of {path}: {e}")
+                    jobs.append((path, e))
+            else:
+                jobs.append((path, sheet_name))
+        
+        logging.info(f"Starting batch import of {len(jobs)} sheets from {len(workbooks)} workbooks "
+                     f"(parallel_files={parallel_files}, workers={self.max_workers})")
+        started = time.monotonic()
+        
+        upload_executor = None
+        if self.max_workers > 1 and not dry_run:
+            upload_executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='kordiam-upload')
+        
+        def run_job(path: str, sheet: Union[str, None, Exception]) -> Dict[str, Any]:
+            summary = {'file': path, 'sheet': sheet, 'status': 'completed'}
+            job_started = time.monotonic()
+            if self.cancelled:
+                summary['status'] = 'cancelled'
+                return summary
+            try:
+                if isinstance(sheet, Exception):
+                    raise sheet
+                importer = KordiamImporter(self.client.config, self.max_workers, client=self.client)
+                importer._upload_executor = upload_executor
+                importer._cancelled = self._cancelled
+                journal_path = None
+                if journal:
+                    journal_path = self.journal_path_for(path, sheet if all_sheets else None, options.get('row_selection'))
+                results = importer.import_from_excel(path, mapping_config, sheet, dry_run,
+                                                     journal_path=journal_path, **options)
+                for key in ('success', 'errors', 'skipped', 'updated', 'unchanged', 'invalid'):
+                    summary[key] = results[key]
+                if results.get('samples'):
+                    summary['samples'] = results['samples']
+                summary['failed_rows'] = [{'row': d['row'], 'error': d['error']}
+                                          for d in results['details'] if d['status'] == 'error']
+            except Exception as e:
+                logging.error(f"Import of {path}{f' [{sheet}]' if isinstance(sheet, str) else ''} failed: {e}")
+                summary['sheet'] = None if isinstance(sheet, Exception) else sheet
+                summary['status'] = 'failed'
+                summary['error'] = str(e)
+            summary['seconds'] = round(time.monotonic() - job_started, 3)
+            return summary
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, parallel_files), thread_name_prefix='kordiam-file') as file_pool:
+                futures = [file_pool.submit(run_job, path, sheet) for path, sheet in jobs]
+                job_reports = [future.result() for future in futures]
+        finally:
+            if upload_executor:
+                upload_executor.shutdown(wait=True)
+        
+        report = {
+            'workbooks': len(workbooks),
+            'sheets': len(jobs),
+            'failed_sheets': sum(1 for job in job_reports if job['status'] == 'failed'),
+            'seconds': round(time.monotonic() - started, 3),
+            'jobs': job_reports
+        }
+        for key in ('success', 'errors', 'skipped', 'updated', 'unchanged', 'invalid'):
+            report[key] = sum(job.get(key, 0) for job in job_reports)
+        report['client'] = self.client.get_stats()
+        report['timings'] = self.metrics.snapshot()
+        return report
+    
+    @staticmethod
+    def journal_path_for(excel_file: str,
+                         sheet_name: Optional[str] = None,
+                         row_selection: Optional[RowSelection] = None) -> str:
+        """Default journal location for a workbook, one of its sheets, or one partition of them."""
+        part = f".{row_selection.label}" if row_selection is not None and row_selection.label else ''
+        if sheet_name:
+            return f"{excel_file}.{sheet_name}{part}.journal.jsonl"
+        return f"{excel_file}{part}.journal.jsonl"
+    
+    def _open_state(self,
+                    dry_run: bool,
+                    journal_path: Optional[str],
+                    resume: bool,
+                    upsert_key: Optional[str],
+                    upsert_index_path: Optional[str]):
+        """Open the journal and upsert index used by one import."""
+        if journal_path and not dry_run:
+            self.journal = ImportJournal(journal_path, resume=resume)
+        if upsert_key:
+            self.upsert_key = upsert_key
+            # A dry run previews skips and updates against the index but must not create or change it
+            self.upsert_index = UpsertIndex(upsert_index_path or 'kordiam_upsert_index.jsonl', read_only=dry_run)
+    
+    @staticmethod
+    def _check_result_sinks(excel_file: WorkbookSource, result_sinks: Optional[List[ResultSink]]):
+        """Fail before anything is imported if a sink cannot handle the workbook source."""
+        for sink in result_sinks or []:
+            if isinstance(sink, WorkbookWriteBack):
+                sink.check_source(excel_file)
+    
+    def _open_results(self,
+                      excel_file: str,
+                      sheet_name: Optional[str],
+                      result_sinks: Optional[List[ResultSink]],
+                      samples: int = 0):
+        """Direct row outcomes of one import to the given sinks (or results['details'])."""
+        self._source = (str(excel_file), sheet_name)
+        self.result_sinks = list(result_sinks or [])
+        self._samples = []
+        self._sample_size = samples
+        self._sample_seen = 0
+        self.rows_total = None
+    
+    def _sample_element(self, index: int, action: str, element_data: Dict[str, Any]):
+        """Keep a uniform random sample of the elements seen (reservoir sampling)."""
+        self._sample_seen += 1
+        sample = {'row': index + 1, 'action': action, 'data': element_data}
+        if len(self._samples) < self._sample_size:
+            self._samples.append(sample)
+        else:
+            slot = self._sample_random.randrange(self._sample_seen)
+            if slot < self._sample_size:
+                self._samples[slot] = sample
+    
+    def _emit_result(self, index: int, status: str, element_data: Optional[Dict[str, Any]] = None,
+                     element_id: Any = None, error: Optional[Exception] = None, action: Optional[str] = None):
+        """Pass one row outcome to the result sinks."""
+        if not self.result_sinks:
+            return
+        excel_file, sheet_name = self._source
+        entry = {
+            'file': excel_file,
+            'sheet': sheet_name,
+            'row': index + 1,
+            'status': status,
+            'action': action,
+            'element_id': element_id,
+            'error': None if error is None else str(error),
+            'data': element_data
+        }
+        for sink in self.result_sinks:
+            sink.write(entry)
+    
+    def _close_state(self):
+        """Close the journal and upsert index of the finished import."""
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+        if self.upsert_index:
+            self.upsert_index.close()
+            self.upsert_index = None
+        self._upsert_targets = {}
+    
+    def _run_import(self,
+                    processor: ExcelProcessor,
+                    mapping_config: Dict[str, Any],
+                    dry_run: bool,
+                    workers: int,
+                    stream: bool,
+                    chunk_size: int,
+                    batch_size: Optional[int] = None,
+                    batch_sender: Optional[BatchSender] = None,
+                    transform_processes: int = 1) -> Dict[str, Any]:
+        """Read, transform and upload the rows of one sheet."""
+        
+        if stream:
+            logging.info(f"Starting streaming import (dry_run={dry_run}, workers={workers}, chunk_size={chunk_size})")
+            rows = self._iter_streamed_elements(processor, mapping_config, chunk_size, transform_processes)
+        else:
+            with self.metrics.phase('read'):
+                df = processor.read_excel_data()
+            self.rows_total = len(df)
+            plan = self._compile_plan(mapping_config, df)
+            logging.info(f"Starting import of {len(df)} rows (dry_run={dry_run}, workers={workers})")
+            if transform_processes > 1:
+                rows = processor.iter_elements_parallel(iter_shards(df, chunk_size), plan, transform_processes)
+            else:
+                rows = processor.iter_elements(df, plan)
+            rows = self.metrics.timed_iter(rows, 'transform')
+        
+        rows = self._prepare_rows(rows)
+        
+        if batch_size and not dry_run:
+            sender = batch_sender or FanOutSender(self.client, workers)
+            try:
+                self._import_rows_batched(rows, batch_size, sender)
+            finally:
+                if batch_sender is None:
+                    sender.close()
+        elif dry_run or workers == 1:
+            self._import_rows_serial(rows, dry_run)
+        else:
+            self._import_rows_concurrent(rows, workers)
+        
+        self.results['client'] = self.client.get_stats()
+        return self.results
+    
+    def _run_pipeline(self,
+                      processor: ExcelProcessor,
+                      mapping_config: Dict[str, Any],
+                      workers: int,
+                      stream: bool,
+                      chunk_size: int,
+                      queue_size: int,
+                      transform_processes: int = 1) -> Dict[str, Any]:
+        """
+        Import one sheet as a staged pipeline.
+        
+        A reader thread parses the sheet into chunks, a transformer thread turns them
+        into validated elements (fanning chunks out to `transform_processes` worker
+        processes if requested), `workers` uploader threads send them, and the calling
+        thread records the outcomes in row order. Bounded queues between the stages
+        (and a cap on rows in flight) apply backpressure, so a slow server stalls
+        reading instead of buffering the whole sheet, while transforming later rows
+        overlaps the uploads of earlier ones.
+        """
+        logging.info(f"Starting pipelined import (workers={workers}, chunk_size={chunk_size}, queue_size={queue_size})")
+        self.client._get_access_token()
+        
+        chunk_queue = queue.Queue(maxsize=2)
+        row_queue = queue.Queue(maxsize=queue_size)
+        result_queue = queue.Queue()
+        in_flight = threading.Semaphore(queue_size + 2 * workers)
+        stats = PipelineStats(['read', 'transform', 'upload', 'write'],
+                              {'chunks': chunk_queue, 'rows': row_queue, 'results': result_queue})
+        self.pipeline_stats = stats
+        stop = threading.Event()
+        failures = []
+        
+        def put(q: queue.Queue, name: str, item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                except queue.Full:
+                    continue
+                stats.observe(name)
+                return True
+            return False
+        
+        def get(q: queue.Queue) -> Any:
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _END_OF_STREAM
+        
+        def read_stage():
+            try:
+                if stream:
+                    chunks = processor.iter_excel_chunks(chunk_size)
+                else:
+                    started = time.monotonic()
+                    with self.metrics.phase('read'):
+                        df = processor.read_excel_data()
+                    self.rows_total = len(df)
+                    stats.add('read', 0, time.monotonic() - started)
+                    chunks = iter_shards(df, chunk_size)
+                while True:
+                    started = time.monotonic()
+                    with self.metrics.phase('read' if stream else None):
+                        chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    stats.add('read', len(chunk), time.monotonic() - started)
+                    if not put(chunk_queue, 'chunks', chunk):
+                        return
+            except Exception as e:
+                failures.append(e)
+                stop.set()
+            finally:
+                put(chunk_queue, 'chunks', _END_OF_STREAM)
+        
+        def transform_stage():
+            waited = 0.0
+            
+            def queued_chunks():
+                nonlocal waited
+                while True:
+                    started = time.monotonic()
+                    with self.metrics.phase(None):
+                        chunk = get(chunk_queue)
+                    waited += time.monotonic() - started
+                    if chunk is _END_OF_STREAM:
+                        return
+                    yield chunk
+            
+            try:
+                rows = self._prepare_rows(
+                    self._transform_chunks(processor, queued_chunks(), mapping_config, transform_processes))
+                sequence = 0
+                while True:
+                    started = time.monotonic()
+                    waited = 0.0
+                    row = next(rows, None)
+                    if row is None:
+                        break
+                    stats.add('transform', 1, time.monotonic() - started - waited)
+                    
+                    while not in_flight.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    if not put(row_queue, 'rows', (sequence,) + row):
+                        return
+                    sequence += 1
+            except Exception as e:
+                failures.append(e)
+                stop.set()
+            finally:
+                for _ in range(workers):
+                    put(row_queue, 'rows', _END_OF_STREAM)
+        
+        def upload_stage():
+            try:
+                while True:
+                    item = get(row_queue)
+                    if item is _END_OF_STREAM:
+                        return
+                    sequence, index, element_data, error = item
+                    response = None
+                    started = time.monotonic()
+                    if self._cancelled.is_set():
+                        error = _NOT_UPLOADED  # Queued but not sent; a resumed run imports it
+                    elif error is None:
+                        try:
+                            response = self._upload_element(index, element_data)
+                        except Exception as e:
+                            error = e
+                    stats.add('upload', 1, time.monotonic() - started)
+                    result_queue.put((sequence, index, element_data, response, error))
+                    stats.observe('results')
+            finally:
+                result_queue.put(_END_OF_STREAM)
+        
+        threads = [threading.Thread(target=read_stage, name='kordiam-read', daemon=True),
+                   threading.Thread(target=transform_stage, name='kordiam-transform', daemon=True)]
+        threads += [threading.Thread(target=upload_stage, name=f'kordiam-upload-{n}', daemon=True)
+                    for n in range(workers)]
+        for thread in threads:
+            thread.start()
+        
+        # Result writer: record outcomes in row order on the calling thread
+        completed = {}
+        try:
+            finished_uploaders = 0
+            next_sequence = 0
+            while finished_uploaders < workers:
+                item = result_queue.get()
+                if item is _END_OF_STREAM:
+                    finished_uploaders += 1
+                    continue
+                completed[item[0]] = item
+                while next_sequence in completed:
+                    _, index, element_data, response, error = completed.pop(next_sequence)
+                    started = time.monotonic()
+                    if error is None:
+                        self._record_success(index, element_data, response)
+                    elif error is not _NOT_UPLOADED:
+                        self._record_error(index, error, element_data)
+                    stats.add('write', 1, time.monotonic() - started)
+                    in_flight.release()
+                    next_sequence += 1
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            
+            # After a failure or interrupt, uploads that finished out of order (or after
+            # the writer stopped) are still recorded, so --resume does not repeat them
+            while True:
+                try:
+                    item = result_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _END_OF_STREAM:
+                    completed[item[0]] = item
+            for sequence in sorted(completed):
+                _, index, element_data, response, error = completed.pop(sequence)
+                if error is None:
+                    self._record_success(index, element_data, response)
+                elif error is not _NOT_UPLOADED:
+                    self._record_error(index, error, element_data)
+        
+        if failures:
+            raise failures[0]
+        
+        self.results['pipeline'] = stats.snapshot()
+        self.results['client'] = self.client.get_stats()
+        return self.results
+    
+    def _iter_streamed_elements(self,
+                                processor: ExcelProcessor,
+                                mapping_config: Dict[str, Any],
+                                chunk_size: int,
+                                transform_processes: int = 1) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """Transform the sheet chunk by chunk as it is read."""
+        chunks = self.metrics.timed_iter(processor.iter_excel_chunks(chunk_size), 'read')
+        yield from self._transform_chunks(processor, chunks, mapping_config, transform_processes)
+    
+    def _transform_chunks(self,
+                          processor: ExcelProcessor,
+                          chunks: Iterable[pd.DataFrame],
+                          mapping_config: Dict[str, Any],
+                          transform_processes: int) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """Transform chunks in this process or in a process pool."""
+        chunks = self._planned_chunks(chunks, mapping_config)
+        if transform_processes > 1:
+            yield from self.metrics.timed_iter(
+                processor.iter_elements_parallel(chunks, mapping_config, transform_processes), 'transform')
+        else:
+            for chunk in chunks:
+                yield from self.metrics.timed_iter(processor.iter_elements(chunk, mapping_config), 'transform')
+    
+    def _planned_chunks(self, chunks: Iterable[pd.DataFrame], mapping_config: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+        """Pass chunks through, compiling the plan (and reporting unmapped columns) on the first one."""
+        compiled = False
+        for chunk in chunks:
+            if not compiled:
+                self._compile_plan(mapping_config, chunk)
+                compiled = True
+            yield chunk
+    
+    def _prepare_rows(self,
+                      rows: Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]
+                      ) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """Validate transformed rows and apply resume and upsert filtering."""
+        rows = self._until_cancelled(rows)
+        rows = self._validated_rows(rows)
+        if self.journal:
+            rows = self._skip_committed(rows)
+        if self.upsert_index:
+            rows = self._route_upserts(rows)
+        return self.metrics.timed_iter(rows, 'validate')
+    
+    def _until_cancelled(self,
+                         rows: Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]
+                         ) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """Stop pulling (and transforming) rows once the import is cancelled."""
+        for row in rows:
+            if self._cancelled.is_set():
+                return
+            yield row
+    
+    def _validated_rows(self,
+                        rows: Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]
+                        ) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """Drop rows that fail validation, counting them as invalid; transform errors pass through."""
+        for index, element_data, error in rows:
+            if error is None:
+                valid_data = self._validate_element(index, element_data)
+                if valid_data is None:
+                    self.results['invalid'] += 1
+                    self._emit_result(index, 'invalid', element_data)
+                    continue
+                element_data = valid_data
+            yield index, element_data, error
+    
+    def _route_upserts(self,
+                       rows: Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]
+                       ) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Decide per keyed row whether to skip, update or create it.
+        
+        Rows whose content hash matches the index are dropped; rows with a known key but
+        new content are marked for update_element. Rows without a key are created.
+        """
+        seen = {}
+        for index, element_data, error in rows:
+            key = element_data.get(self.upsert_key) if error is None else None
+            if key is not None:
+                key = str(key).strip()
+                if key in seen:
+                    error = ValueError(f"Duplicate {self.upsert_key} '{key}' (first used in row {seen[key]})")
+                    yield index, None, error
+                    continue
+                seen[key] = index + 1
+                
+                entry = self.upsert_index.get(key)
+                if entry is not None:
+                    if entry.get('hash') == element_content_hash(element_data):
+                        self.results['unchanged'] += 1
+                        self._emit_result(index, 'unchanged', element_data, entry['element_id'])
+                        continue
+                    self._upsert_targets[index] = entry['element_id']
+            
+            yield index, element_data, error
+    
+    def _upload_element(self, index: Any, element_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create the element, or update it when upsert mode matched an existing one."""
+        element_id = self._upsert_targets.get(index)
+        token = _log_row.set(index + 1)  # Log records of this upload name the row
+        try:
+            if element_id is not None:
+                return self.client.update_element(element_id, element_data)
+            return self.client.create_element(element_data)
+        finally:
+            _log_row.reset(token)
+    
+    def _skip_committed(self,
+                        rows: Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]
+                        ) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Drop rows the journal records as already created.
+        
+        A committed row is never created again. If its content changed since, it is
+        only passed on when upsert mode knows its key and will update the element;
+        otherwise it is skipped with a warning.
+        """
+        for index, element_data, error in rows:
+            if error is None and element_data and self.journal.is_committed(index + 1):
+                element_id = self.journal.committed_element_id(index + 1)
+                if not self.journal.is_committed(index + 1, element_content_hash(element_data)):
+                    if self._upsert_key_known(element_data):
+                        yield index, element_data, error
+                        continue
+                    logging.warning("Row %d changed since it was imported as element %s; not creating it again "
+                                    "(use --upsert-key to update changed rows)", index + 1, element_id)
+                self.results['skipped'] += 1
+                self._emit_result(index, 'skipped', element_data, element_id)
+                continue
+            yield index, element_data, error
+    
+    def _upsert_key_known(self, element_data: Dict[str, Any]) -> bool:
+        """True if upsert mode will route this row to an update of an existing element."""
+        if not self.upsert_index:
+            return False
+        key = element_data.get(self.upsert_key)
+        return key is not None and self.upsert_index.get(str(key).strip()) is not None
+    
+    def _compile_plan(self, mapping_config: Dict[str, Any], df: pd.DataFrame) -> MappingPlan:
+        """Compile (or fetch the cached) mapping plan for this sheet and report unmapped columns."""
+        plan = MappingPlan.for_columns(mapping_config, df.columns)
+        if plan.missing_columns:
+            logging.warning(f"Mapped columns not found in Excel file: {', '.join(str(c) for c in plan.missing_columns)}")
+        return plan
+    
+    def _validate_element(self, index: Any, element_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Validate a transformed row.
+        
+        Returns:
+            Element data ready for the API, or None if the row should be skipped
+        """
+        if not element_data:
+            logging.warning("Row %d: No valid data found, skipping", index + 1)
+            return None
+        
+        # Validate that element has required components
+        has_publication = 'publications' in element_data and element_data['publications']
+        has_task = 'tasks' in element_data and element_data['tasks']
+        has_group = 'groups' in element_data and element_data['groups']
+        
+        if not (has_publication or has_task or has_group):
+            logging.warning("Row %d: Element must contain at least one of: publication, task, or group. Skipping.", index + 1)
+            return None
+        
+        return element_data
+    
+    def _record_success(self, index: int, element_data: Dict[str, Any], response: Dict[str, Any]):
+        """Record a successfully created or updated element."""
+        with self.metrics.phase('record'):
+            self._record_success_entry(index, element_data, response)
+    
+    def _record_success_entry(self, index: int, element_data: Dict[str, Any], response: Dict[str, Any]):
+        updated_id = self._upsert_targets.pop(index, None)
+        element_id = response.get('id', updated_id)
+        
+        self.results['success'] += 1
+        action = 'created' if updated_id is None else 'updated'
+        if self.upsert_index:
+            if updated_id is not None:
+                self.results['updated'] += 1
+            key = element_data.get(self.upsert_key)
+            if key is not None:
+                self.upsert_index.record(str(key).strip(), element_id, element_content_hash(element_data))
+        
+        if self.result_sinks:
+            self._emit_result(index, 'success', element_data, element_id, action=action)
+        else:
+            detail = {
+                'row': index + 1,
+                'status': 'success',
+                'element_id': element_id,
+                'data': element_data
+            }
+            if self.upsert_index:
+                detail['action'] = action
+            self.results['details'].append(detail)
+        
+        if self.journal:
+            self.journal.record(index + 1, element_content_hash(element_data), element_id, 'success')
+    
+    def _record_error(self, index: int, error: Exception, element_data: Optional[Dict[str, Any]]):
+        """Record a failed row."""
+        with self.metrics.phase('record'):
+            self._record_error_entry(index, error, element_data)
+    
+    def _record_error_entry(self, index: int, error: Exception, element_data: Optional[Dict[str, Any]]):
+        self._upsert_targets.pop(index, None)
+        self.results['errors'] += 1
+        if self.result_sinks:
+            self._emit_result(index, 'error', element_data, error=error)
+        else:
+            self.results['details'].append({
+                'row': index + 1,
+                'status': 'error',
+                'error': str(error),
+                'data': element_data
+            })
+        if self.journal:
+            content_hash = element_content_hash(element_data) if element_data else None
+            self.journal.record(index + 1, content_hash, None, 'error')
+        logging.error("Row %d: %s", index + 1, error, extra={'row': index + 1})
+    
+    def _import_rows_serial(self,
+                            rows: Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]],
+                            dry_run: bool):
+        """Upload transformed rows one at a time (or only count them in a dry run)."""
+        verbose = dry_run and logging.getLogger().isEnabledFor(logging.DEBUG)
+        for index, element_data, error in rows:
+            if error is not None:
+                self._record_error(index, error, None)
+                continue
+            try:
+                if dry_run:
+                    element_id = self._upsert_targets.pop(index, None)
+                    action = 'create' if element_id is None else 'update'
+                    if verbose:
+                        # Guarded: serializing every element costs more than the dry run itself
+                        target = 'element' if element_id is None else f"element {element_id}"
+                        logging.debug("Row %d: Would %s %s with data: %s", index + 1, action, target,
+                                      json.dumps(element_data, separators=(',', ':'), default=str))
+                    self.results['success'] += 1
+                    self._emit_result(index, 'dry_run', element_data, element_id, action=action)
+                    if self._sample_size:
+                        self._sample_element(index, action, element_data)
+                else:
+                    response = self._upload_element(index, element_data)
+                    self._record_success(index, element_data, response)
+                
+            except Exception as e:
+                self._record_error(index, e, element_data)
+    
+    def _import_rows_concurrent(self,
+                                rows: Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]],
+                                workers: int):
+        """
+        Upload rows with up to `workers` requests in flight.
+        
+        Rows are pulled (and transformed) on the calling thread and handed to a thread pool.
+        At most ``2 * workers`` rows are pending at any time, and outcomes are
+        recorded strictly in submission order so ``results['details']`` stays
+        ordered by source row. If reading rows fails or the import is interrupted,
+        the uploads already submitted are still waited for and recorded before the
+        error propagates, so the journal knows every element that was created.
+        """
+        # Fetch the token once up front instead of racing for it in every worker
+        self.client._get_access_token()
+        
+        pending = deque()
+        window = workers * 2
+        
+        def drain_oldest():
+            index, element_data, future = pending[0]
+            try:
+                response = future.result()
+            except Exception as e:
+                pending.popleft()
+                self._record_error(index, e, element_data)
+            else:
+                pending.popleft()
+                self._record_success(index, element_data, response)
+        
+        # Batch imports share one upload pool across workbooks
+        executor = self._upload_executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix='kordiam-upload')
+        try:
+            for index, element_data, error in rows:
+                if error is None:
+                    future = executor.submit(self._upload_element, index, element_data)
+                else:
+                    # Keep transform errors in row order alongside the uploads
+                    future = Future()
+                    future.set_exception(error)
+                
+                pending.append((index, element_data, future))
+                if len(pending) >= window:
+                    drain_oldest()
+            
+            while pending:
+                drain_oldest()
+        except BaseException:
+            self._record_in_flight(pending)
+            raise
+        finally:
+            if executor is not self._upload_executor:
+                executor.shutdown(wait=True)
+    
+    def _record_in_flight(self, pending: deque):
+        """
+        Record the outcome of uploads still pending when an import is aborted.
+        
+        Uploads that have not started are cancelled; the others are waited for, since
+        their elements may be created, and recorded (journaled) like any other row.
+        """
+        while pending:
+            index, element_data, future = pending.popleft()
+            if future.cancel():
+                continue
+            try:
+                response = future.result()
+            except Exception as e:
+                self._record_error(index, e, element_data)
+            else:
+                self._record_success(index, element_data, response)
+    
+    def _import_rows_batched(self,
+                             rows: Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]],
+                             batch_size: int,
+                             sender: BatchSender):
+        """Group rows into batches of `batch_size` uploadable elements and submit each batch."""
+        self.client._get_access_token()
+        
+        batch = []
+        members = 0
+        for row in rows:
+            batch.append(row)
+            if row[2] is None:
+                members += 1
+            if members >= batch_size:
+                self._submit_batch(batch, sender)
+                batch = []
+                members = 0
+        if batch:
+            self._submit_batch(batch, sender)
+    
+    def _submit_batch(self,
+                      batch: List[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]],
+                      sender: BatchSender):
+        """
+        Submit one batch, resending only members that failed with a retryable error.
+        
+        Only members the batch endpoint rejected individually (BatchItemError) are
+        resent here; whole requests are already retried by the API client, so
+        resending those too would multiply the attempts per row. Outcomes are
+        recorded in row order once the batch is settled.
+        """
+        outcomes = {}
+        pending = [(index, element_data) for index, element_data, error in batch if error is None]
+        max_retries = self.client.config.max_retries
+        attempt = 0
+        while pending:
+            try:
+                results = sender.send([(self._upsert_targets.get(index), element_data) for index, element_data in pending])
+            except BaseException as interrupt:
+                partial = getattr(interrupt, 'batch_results', None) or []
+                for (index, _), result in zip(pending, partial):
+                    if result is not None:
+                        outcomes[index] = result
+                self._record_batch(batch, outcomes)
+                raise
+            
+            retry = []
+            for (index, element_data), result in zip(pending, results):
+                method = 'POST' if self._upsert_targets.get(index) is None else 'PUT'
+                if isinstance(result, BatchItemError) and attempt < max_retries and _is_retryable_error(result, method):
+                    retry.append((index, element_data))
+                    self.client._count_retry('batch_member')
+                else:
+                    outcomes[index] = result
+            
+            if retry:
+                delay = self.client._backoff_delay(attempt)
+                logging.warning("Resending %d of %d batch members (retry %d/%d) in %.1fs",
+                                len(retry), len(pending), attempt + 1, max_retries, delay)
+                time.sleep(delay)
+            pending = retry
+            attempt += 1
+        
+        self._record_batch(batch, outcomes)
+    
+    def _record_batch(self,
+                      batch: List[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]],
+                      outcomes: Dict[Any, Union[Dict[str, Any], Exception]]):
+        """Record the rows of a batch in row order; rows without an outcome (never sent) are left out."""
+        for index, element_data, error in batch:
+            if error is not None:
+                self._record_error(index, error, None)
+            elif index not in outcomes:
+                continue
+            elif isinstance(outcomes[index], Exception):
+                self._record_error(index, outcomes[index], element_data)
+            else:
+                self._record_success(index, element_data, outcomes[index])
+    
+    async def import_from_excel_async(self,
+                                      excel_file: WorkbookSource,
+                                      mapping_config: Dict[str, Any],
+                                      sheet_name: Optional[str] = None,
+                                      dry_run: bool = False,
+                                      max_concurrency: int = 50,
+                                      journal_path: Optional[str] = None,
+                                      resume: bool = False,
+                                      upsert_key: Optional[str] = None,
+                                      upsert_index_path: Optional[str] = None,
+                                      result_sinks: Optional[List[ResultSink]] = None,
+                                      samples: int = 3,
+                                      dataframe: Optional[pd.DataFrame] = None,
+                                      row_selection: Optional[RowSelection] = None) -> Dict[str, Any]:
+        """
+        Import data from Excel file to Kordiam using AsyncKordiamAPIClient.
+        
+        Up to `max_concurrency` requests are in flight on the running event loop;
+        outcomes are recorded in row order, as with the threaded importer.
+        
+        Args:
+            excel_file: Path to Excel file, its content as bytes, a binary file object or a
+                parsed DataFrame
+            mapping_config: Complete mapping configuration
+            sheet_name: Specific sheet to read (optional)
+            dry_run: If True, don't actually create elements
+            max_concurrency: Maximum number of requests in flight
+            journal_path: Append row outcomes to this journal file (ignored for dry runs)
+            resume: Skip rows the journal already records as created with the same content
+            upsert_key: Kordiam field identifying a row across imports; enables upsert mode
+            upsert_index_path: File remembering element ids per key (default: kordiam_upsert_index.jsonl)
+            result_sinks: Stream every row outcome to these sinks instead of results['details']
+            samples: Dry runs keep this many randomly sampled elements in results['samples']
+            dataframe: Already parsed sheet to import instead of reading `excel_file`
+            row_selection: Import only these rows (see RowSelection)
+            
+        Returns:
+            Import results summary
+        """
+        self._check_result_sinks(excel_file, result_sinks)
+        started = time.perf_counter()
+        processor = ExcelProcessor(excel_file, sheet_name, dataframe, row_selection)
+        df = await asyncio.to_thread(processor.read_excel_data)
+        self.metrics.observe('read', time.perf_counter() - started)
+        plan = self._compile_plan(mapping_config, df)
+        self.rows_total = len(df)
+        
+        logging.info(f"Starting async import of {len(df)} rows (dry_run={dry_run}, concurrency={max_concurrency})")
+        
+        self._open_state(dry_run, journal_path, resume, upsert_key, upsert_index_path)
+        self._open_results(processor.name, sheet_name, result_sinks, samples if dry_run else 0)
+        try:
+            rows = self._prepare_rows(self.metrics.timed_iter(processor.iter_elements(df, plan), 'transform'))
+            if dry_run:
+                self._import_rows_serial(rows, dry_run)
+            else:
+                async with AsyncKordiamAPIClient(self.client.config, max_connections=max_concurrency,
+                                                 metrics=self.metrics,
+                                                 rate_limiter=self.client.rate_limiter) as client:
+                    try:
+                        await self._import_rows_async(rows, client, max_concurrency)
+                    finally:
+                        self.results['client'] = client.get_stats()
+        finally:
+            self._close_state()
+        
+        if dry_run:
+            self.results['samples'] = sorted(self._samples, key=lambda sample: sample['row'])
+        if self.cancelled:
+            self.results['cancelled'] = True
+        self.results['timings'] = self._timings(started)
+        return self.results
+    
+    async def _import_rows_async(self,
+                                 rows: Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]],
+                                 client: AsyncKordiamAPIClient,
+                                 max_concurrency: int):
+        """
+        Upload rows with up to `max_concurrency` requests in flight, recording outcomes in row order.
+        
+        If the import is cancelled or fails, the requests already sent are awaited and
+        recorded before the exception propagates, so the journal and upsert index know
+        about every element they created.
+        """
+        pending = deque()
+        
+        async def drain_oldest():
+            index, element_data, task = pending[0]
+            try:
+                # Shielded so cancelling the import does not abort a request mid-flight
+                response = await asyncio.shield(task)
+            except Exception as e:
+                pending.popleft()
+                self._record_error(index, e, element_data)
+            else:
+                pending.popleft()
+                self._record_success(index, element_data, response)
+        
+        try:
+            for index, element_data, error in rows:
+                if error is None:
+                    element_id = self._upsert_targets.get(index)
+                    token = _log_row.set(index + 1)  # Copied into the task's context
+                    if element_id is not None:
+                        task = asyncio.ensure_future(client.update_element(element_id, element_data))
+                    else:
+                        task = asyncio.ensure_future(client.create_element(element_data))
+                    _log_row.reset(token)
+                else:
+                    task = asyncio.get_running_loop().create_future()
+                    task.set_exception(error)
+                
+                pending.append((index, element_data, task))
+                if len(pending) >= max_concurrency:
+                    await drain_oldest()
+            
+            while pending:
+                await drain_oldest()
+        except BaseException:
+            await self._settle_async(pending)
+            raise
+    
+    async def _settle_async(self, pending: deque):
+        """Wait for the requests still in flight and record the outcome of each one that finished."""
+        tasks = [task for _, _, task in pending]
+        try:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        except BaseException:
+            pass  # Cancelled again while waiting: record what has finished so far
+        while pending:
+            index, element_data, task = pending.popleft()
+            if not task.done() or task.cancelled():
+                continue
+            if task.exception() is not None:
+                self._record_error(index, task.exception(), element_data)
+            else:
+                self._record_success(index, element_data, task.result())
+
+
+class ImportJob(ResultSink):
+    """
+    One import running in the background, observable from other threads.
+    
+    The job is a result sink of its own import: it keeps the importer's counters
+    and only the most recent errors, so memory stays bounded however large the
+    sheet is, and snapshot() is cheap enough to poll once a second.
+    """
+    
+    MAX_ERRORS = 50
+    
+    def __init__(self, job_id: str, label: str, importer: 'KordiamImporter', dry_run: bool = False):
+        self.id = job_id
+        self.label = label
+        self.importer = importer
+        self.dry_run = dry_run
+        self.status = 'queued'
+        self.created_at = datetime.now()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.results: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._errors = deque(maxlen=self.MAX_ERRORS)
+    
+    def write(self, entry: Dict[str, Any]):
+        if entry['status'] == 'error':
+            self._errors.append({'row': entry['row'], 'error': entry['error']})
+    
+    @property
+    def done(self) -> bool:
+        """Whether the job has finished, failed or was cancelled."""
+        return self.status in ('completed', 'failed', 'cancelled')
+    
+    def cancel(self):
+        """Cancel the import; uploads in flight finish first (see KordiamImporter.cancel)."""
+        self.importer.cancel()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current state of the job; safe to call from any thread.
+        
+        Returns:
+            Dictionary with id, label, status, dry_run, processed and total rows,
+            success and error counts, elapsed seconds, rows per second, ETA in
+            seconds (None if unknown), the most recent errors and the failure message
+        """
+        progress = self.importer.progress()
+        results = self.importer.results
+        if self.started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        rate = progress['processed'] / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if not self.done and progress['total'] and rate > 0:
+            eta = max(0.0, (progress['total'] - progress['processed']) / rate)
+        return {
+            'id': self.id,
+            'label': self.label,
+            'status': self.status,
+            'dry_run': self.dry_run,
+            'created_at': self.created_at.isoformat(timespec='seconds'),
+            'processed': progress['processed'],
+            'total': progress['total'],
+            'success': results['success'],
+            'errors': results['errors'],
+            'elapsed_seconds': round(elapsed, 1),
+            'rate': round(rate, 1),
+            'eta_seconds': None if eta is None else round(eta),
+            'recent_errors': list(self._errors),
+            'error': self.error
+        }
+
+
+class ImportJobRegistry:
+    """
+    Runs imports as background jobs and keeps them findable by id.
+    
+    Jobs run on a pool of `max_running` threads; further jobs wait in line. The
+    registry is thread-safe and meant to be shared by everything in the process
+    (e.g. all sessions of a web app), so a job keeps running when whoever started
+    it goes away and can be picked up again by its id. Only the `keep_finished`
+    most recent finished jobs are kept.
+    """
+    
+    def __init__(self, max_running: int = 4, keep_finished: int = 100):
+        self.keep_finished = keep_finished
+        self._lock = threading.Lock()
+        self._jobs: 'OrderedDict[str, ImportJob]' = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_running), thread_name_prefix='kordiam-job')
+    
+    def submit(self,
+               importer: 'KordiamImporter',
+               run: Callable[[ImportJob], Dict[str, Any]],
+               label: str,
+               dry_run: bool = False) -> ImportJob:
+        """
+        Start an import in the background.
+        
+        Args:
+            importer: The importer `run` uses (polled for progress, used to cancel)
+            run: Runs the import and returns its results; receives the job, which
+                should be passed as a result sink (result_sinks=[job])
+            label: Name shown for the job (e.g. the file name)
+            dry_run: Whether the import is a dry run (for display only)
+            
+        Returns:
+            The queued job
+        """
+        job = ImportJob(uuid.uuid4().hex, label, importer, dry_run)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, run)
+        return job
+    
+    def _run(self, job: ImportJob, run: Callable[[ImportJob], Dict[str, Any]]):
+        if job.importer.cancelled:
+            job.status = 'cancelled'
+            return
+        job.started_at = time.monotonic()
+        job.status = 'running'
+        try:
+            job.results = run(job)
+            job.status = 'cancelled' if job.results.get('cancelled') else 'completed'
+        except Exception as e:
+            logging.error(f"Import job {job.label} failed: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.monotonic()
+    
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+    
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        """The job with this id, or None if unknown or pruned."""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def jobs(self) -> List[ImportJob]:
+        """All known jobs, oldest first."""
+        with self._lock:
+            return list(self._jobs.values())
+
+
+# Row being uploaded by the current thread or task; attached to its log records
+_log_row: contextvars.ContextVar = contextvars.ContextVar('kordiam_log_row', default=None)
+_log_listener: Optional['_BatchingQueueListener'] = None
+
+
+class _LogContextFilter(logging.Filter):
+    """Attach the row of the current upload to records that don't name one."""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, 'row', None) is None:
+            record.row = _log_row.get()
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue records without formatting them first.
+    
+    The stock QueueHandler formats the whole record on the logging thread; here
+    only the message is merged with its arguments, so later changes to mutable
+    arguments cannot alter it. Timestamps, the formatter and tracebacks are left to
+    the listener thread. Records never leave the process, so exc_info is passed on.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+class _BatchingQueueListener:
+    """
+    Write queued records in batches on a background thread.
+    
+    The worker blocks on queue.get() for the next record, then takes whatever else
+    is already queued (up to `batch_size` records) and writes each stream handler's
+    share with one write() and one flush().
+    """
+    
+    batch_size = 256
+    _STOP = object()
+    
+    def __init__(self, log_queue: 'queue.SimpleQueue', *handlers: logging.Handler, respect_handler_level: bool = False):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.respect_handler_level = respect_handler_level
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start the worker thread."""
+        self._thread = threading.Thread(target=self._run, name='kordiam-log-writer', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Write everything queued so far and stop the worker thread."""
+        if self._thread is not None:
+            self.queue.put_nowait(self._STOP)
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            records = []
+            stop = False
+            for record in batch:
+                if record is self._STOP:
+                    stop = True
+                elif isinstance(record, threading.Event):
+                    self._write(records)
+                    records = []
+                    record.set()  # flush() marker: everything before it is written
+                else:
+                    records.append(record)
+            self._write(records)
+            if stop:
+                return
+    
+    def _write(self, records: List[logging.LogRecord]):
+        if not records:
+            return
+        for handler in self.handlers:
+            selected = [record for record in records
+                        if (not self.respect_handler_level or record.levelno >= handler.level) and handler.filter(record)]
+            if not selected:
+                continue
+            if not isinstance(handler, logging.StreamHandler) or handler.stream is None:
+                for record in selected:
+                    handler.handle(record)
+                continue
+            
+            lines = []
+            for record in selected:
+                try:
+                    lines.append(handler.format(record) + handler.terminator)
+                except Exception:
+                    handler.handleError(record)
+            with handler.lock:
+                try:
+                    handler.stream.write(''.join(lines))
+                    handler.stream.flush()
+                except Exception:
+                    handler.handleError(selected[-1])
+    
+    def flush(self, timeout: float = 5.0):
+        """Wait until every record queued so far has been written."""
+        if self._thread is not None:
+            marker = threading.Event()
+            self.queue.put_nowait(marker)
+            marker.wait(timeout)
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including row and request ids when known."""
+    
+    CONTEXT_FIELDS = ('row', 'request_id', 'element_id', 'status')
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        for field in self.CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(log_level: str = "INFO", log_format: str = "text") -> Optional[_BatchingQueueListener]:
+    """
+    Setup logging configuration.
+    
+    Log calls only put the record on a queue; a background listener thread formats
+    the records and writes them in batches to the log file and stdout. Like
+    logging.basicConfig, this does nothing if the root logger already has handlers.
+    
+    Args:
+        log_level: Minimum level to log
+        log_format: 'text' for the classic one-line format, 'json' for JSON lines
+        
+    Returns:
+        The started listener, or None if logging was already configured
+    """
+    global _log_listener
+    root = logging.getLogger()
+    if root.handlers:
+        return _log_listener
+    
+    if log_format == 'json':
+        formatter = JsonLogFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    handlers = [
+        logging.FileHandler(f'kordiam_import_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log', encoding='utf-8'),
+        logging.StreamHandler(sys.stdout)
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(_LogContextFilter())
+    root.setLevel(getattr(logging, log_level.upper()))
+    root.addHandler(queue_handler)
+    
+    _log_listener = _BatchingQueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    return _log_listener
+
+
+def flush_logging():
+    """Wait until queued log records are written (e.g. before printing a summary)."""
+    if _log_listener is not None:
+        _log_listener.flush()
+
+
+def _optional_config(config_file: Union[str, BinaryIO, None]) -> Dict[str, Any]:
+    """
+    Read the optional settings (retries, pacing, pooling, ...) from a config file.
+    
+    Used when the credentials come from the command line or the environment, so
+    the tuning in config.json still applies. A missing file gives no settings; an
+    unreadable one is ignored with a warning, since it is not needed for credentials.
+    """
+    if not config_file or not (hasattr(config_file, 'read') or os.path.exists(config_file)):
+        return {}
+    try:
+        if hasattr(config_file, 'read'):
+            config_data = json.load(config_file)
+        else:
+            with open(config_file, 'r') as f:
+                config_data = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring settings in unreadable config file {workbook_name(config_file)}: {e}")
+        return {}
+    if not isinstance(config_data, dict):
+        return {}
+    return {key: config_data[key] for key in _OPTIONAL_CONFIG_KEYS if key in config_data}
 
 
 def load_config_with_args(args) -> KordiamConfig:
@@ -470,7 +4289,8 @@ def load_config_with_args(args) -> KordiamConfig:
                 client_id=args.client_id,
                 client_secret=args.client_secret,
                 token_endpoint='/api/token',
-                timeout=30
+                timeout=30,
+                **_optional_config(args.config)
             )
         
         # Second priority: Environment variables
@@ -484,7 +4304,8 @@ def load_config_with_args(args) -> KordiamConfig:
                 client_id=client_id,
                 client_secret=client_secret,
                 token_endpoint=os.getenv('KORDIAM_TOKEN_ENDPOINT', '/api/token'),
-                timeout=int(os.getenv('KORDIAM_TIMEOUT', '30'))
+                timeout=int(os.getenv('KORDIAM_TIMEOUT', '30')),
+                **_optional_config(args.config)
             )
         
         # Third priority: Config file
@@ -498,8 +4319,8 @@ def load_config_with_args(args) -> KordiamConfig:
         logging.error("3. Config file: Update config.json with your credentials")
         raise
 
-def load_config(config_file: str) -> KordiamConfig:
-    """Load configuration from JSON file or environment variables."""
+def load_config(config_file: Union[str, BinaryIO]) -> KordiamConfig:
+    """Load configuration from JSON file (a path or an open file, e.g. an upload) or environment variables."""
     try:
         # Try to load from environment variables first (more secure)
         client_id = os.getenv('KORDIAM_CLIENT_ID')
@@ -513,21 +4334,26 @@ def load_config(config_file: str) -> KordiamConfig:
                 client_id=client_id,
                 client_secret=client_secret,
                 token_endpoint=os.getenv('KORDIAM_TOKEN_ENDPOINT', '/api/token'),
-                timeout=int(os.getenv('KORDIAM_TIMEOUT', '30'))
+                timeout=int(os.getenv('KORDIAM_TIMEOUT', '30')),
+                **_optional_config(config_file)
             )
         
         # Fall back to config file if environment variables not set
-        if os.path.exists(config_file):
-            logging.info(f"Loading configuration from {config_file}")
-            with open(config_file, 'r') as f:
-                config_data = json.load(f)
+        if hasattr(config_file, 'read') or os.path.exists(config_file):
+            logging.info(f"Loading configuration from {workbook_name(config_file)}")
+            if hasattr(config_file, 'read'):
+                config_data = json.load(config_file)
+            else:
+                with open(config_file, 'r') as f:
+                    config_data = json.load(f)
             
             return KordiamConfig(
                 base_url=config_data['base_url'],
                 client_id=config_data['client_id'],
                 client_secret=config_data['client_secret'],
                 token_endpoint=config_data.get('token_endpoint', '/api/token'),
-                timeout=config_data.get('timeout', 30)
+                timeout=config_data.get('timeout', 30),
+                **{key: config_data[key] for key in _OPTIONAL_CONFIG_KEYS if key in config_data}
             )
         else:
             raise FileNotFoundError(f"Config file {config_file} not found and no environment variables set")
@@ -544,45 +4370,200 @@ def load_config(config_file: str) -> KordiamConfig:
 def main():
     """Main function to run the importer."""
     parser = argparse.ArgumentParser(description='Import Excel data to Kordiam')
-    parser.add_argument('excel_file', help='Path to Excel file')
+    parser.add_argument('excel_file', nargs='+', help='Excel file(s), directories or glob patterns')
     parser.add_argument('--config', default='config.json', help='Path to config file')
     parser.add_argument('--mapping', default='kordiam_mapping.json', help='Path to Kordiam mapping file')
     parser.add_argument('--sheet', help='Excel sheet name (optional)')
+    parser.add_argument('--all-sheets', action='store_true', help='Import every sheet of every workbook')
+    parser.add_argument('--parallel-files', type=int, default=1, help='Sheets read and transformed at the same time in batch mode (default: 1)')
+    parser.add_argument('--report', help='Write the consolidated batch report to this JSON file')
+    parser.add_argument('--results', action='append', default=[], help='Stream per-row outcomes to this .jsonl, .csv or .sqlite file (repeatable)')
+    parser.add_argument('--results-data', action='store_true', help='Include the transformed element in --results JSONL/SQLite files')
+    parser.add_argument('--write-back', action='store_true', help='Save a copy of each workbook with element ID and status columns (<file>.kordiam.xlsx)')
+    parser.add_argument('--metrics-file', help='Write phase and HTTP timing histograms to this file in OpenMetrics text format')
     parser.add_argument('--dry-run', action='store_true', help='Test run without creating elements')
+    parser.add_argument('--dry-run-samples', type=int, default=3, help='Example elements printed after a dry run (default: 3)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of concurrent uploads (default: 1)')
+    parser.add_argument('--stream', action='store_true', help='Read the Excel file in chunks instead of loading it all at once')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per chunk in streaming mode (default: 1000)')
+    parser.add_argument('--transform-processes', type=int, default=1, help='Transform chunks of --chunk-size rows in this many processes (default: 1)')
+    parser.add_argument('--pipeline', action='store_true', help='Overlap reading, transforming and uploading in separate stages')
+    parser.add_argument('--queue-size', type=int, default=256, help='Rows buffered between the transform and upload stages (default: 256)')
+    parser.add_argument('--rows', help='Import only this range of data rows, e.g. 1000-1999 (1 = first row below the header)')
+    parser.add_argument('--partition', help='Import only partition k of n, e.g. 2/4, to split a sheet across machines or processes')
+    parser.add_argument('--partition-by', default='hash', choices=['hash', 'modulo'], help='Assign rows to partitions by a stable hash of the row number or by row number modulo n (default: hash)')
+    parser.add_argument('--sample', type=int, help='Import only N randomly chosen rows (of the --rows/--partition selection; same rows on every run)')
+    parser.add_argument('--journal', help='Keep an import journal at this path (with --resume, default: <excel_file>.journal.jsonl)')
+    parser.add_argument('--resume', action='store_true', help='Keep a journal and skip rows it records as already created')
+    parser.add_argument('--upsert-key', help='Element field identifying rows across imports (e.g. slug); unchanged rows are skipped and changed rows updated')
+    parser.add_argument('--upsert-index', default='kordiam_upsert_index.jsonl', help='File remembering element IDs per upsert key')
+    parser.add_argument('--batch-size', type=int, help='Submit elements in batches of this size, resending only failed members')
+    parser.add_argument('--batch-endpoint', help='Server path accepting a list of elements (default: send batch members individually)')
     parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--log-format', default='text', choices=['text', 'json'], help='Log line format (json: one object per line with row and request ids)')
     
     # OAuth2 credential options
     parser.add_argument('--client-id', help='Kordiam OAuth2 client ID')
     parser.add_argument('--client-secret', help='Kordiam OAuth2 client secret')
     parser.add_argument('--base-url', default='https://kordiam.app', help='Kordiam base URL')
     
+    # Request pacing options
+    parser.add_argument('--rate-limit', type=float, help='Maximum requests per second (default: unlimited)')
+    parser.add_argument('--max-retries', type=int, help='Retries on throttling, gateway and connection errors; creates only when the server cannot have received them (default: 3)')
+    parser.add_argument('--token-cache', help='File for sharing OAuth2 tokens between runs (or set KORDIAM_TOKEN_CACHE)')
+    
     args = parser.parse_args()
     
-    setup_logging(args.log_level)
+    setup_logging(args.log_level, args.log_format)
     
     try:
         # Load configuration with command line override support
         config = load_config_with_args(args)
+        if args.rate_limit:
+            config.rate_limit = args.rate_limit
+        if args.max_retries is not None:
+            config.max_retries = args.max_retries
+        token_cache_file = args.token_cache or os.getenv('KORDIAM_TOKEN_CACHE')
+        if token_cache_file:
+            config.token_cache_file = token_cache_file
         
         # Load mapping configuration
         with open(args.mapping, 'r') as f:
             mapping_config = json.load(f)
         
         # Create importer and run
-        importer = KordiamImporter(config)
-        results = importer.import_from_excel(
-            args.excel_file,
-            mapping_config,
-            args.sheet,
-            args.dry_run
+        importer = KordiamImporter(config, max_workers=args.workers)
+        workbooks = expand_workbook_paths(args.excel_file)
+        batch_mode = len(workbooks) != 1 or workbooks != args.excel_file or args.all_sheets
+        if not workbooks:
+            raise ValueError(f"No workbooks found in {', '.join(args.excel_file)}")
+        
+        batch_sender = None
+        if args.batch_endpoint:
+            batch_sender = BatchEndpointSender(importer.client, args.batch_endpoint, args.workers)
+        row_selection = None
+        if args.rows or args.partition or args.sample is not None:
+            row_selection = RowSelection.parse(args.rows, args.partition, args.partition_by, args.sample)
+        result_sinks = [open_result_sink(path, args.results_data) for path in args.results]
+        write_back = WorkbookWriteBack() if args.write_back and not args.dry_run else None
+        if write_back:
+            result_sinks.append(write_back)
+        options = dict(
+            stream=args.stream,
+            chunk_size=args.chunk_size,
+            resume=args.resume,
+            upsert_key=args.upsert_key,
+            upsert_index_path=args.upsert_index,
+            batch_size=args.batch_size or (100 if batch_sender else None),
+            batch_sender=batch_sender,
+            pipeline=args.pipeline,
+            queue_size=args.queue_size,
+            transform_processes=args.transform_processes,
+            result_sinks=result_sinks,
+            samples=args.dry_run_samples,
+            row_selection=row_selection
         )
+        # Journals are only kept when asked for, so plain imports leave no files behind
+        journal = args.resume or args.journal is not None
+        try:
+            if batch_mode:
+                if args.journal:
+                    logging.warning("--journal path is ignored in batch mode; each sheet gets a journal next to its workbook")
+                results = importer.import_workbooks(
+                    workbooks,
+                    mapping_config,
+                    sheet_name=args.sheet,
+                    all_sheets=args.all_sheets,
+                    parallel_files=args.parallel_files,
+                    dry_run=args.dry_run,
+                    journal=journal,
+                    **options
+                )
+            else:
+                journal_path = None
+                if journal:
+                    journal_path = args.journal or KordiamImporter.journal_path_for(workbooks[0], row_selection=row_selection)
+                results = importer.import_from_excel(
+                    workbooks[0],
+                    mapping_config,
+                    args.sheet,
+                    args.dry_run,
+                    journal_path=journal_path,
+                    **options
+                )
+        finally:
+            if batch_sender:
+                batch_sender.close()
+            for sink in result_sinks:
+                sink.close()
         
         # Print results
+        flush_logging()
         print(f"\nImport completed:")
-        print(f"Success: {results['success']}")
+        if batch_mode:
+            for job in results['jobs']:
+                name = f"{job['file']}" + (f" [{job['sheet']}]" if job['sheet'] else '')
+                if job['status'] == 'failed':
+                    print(f"  {name}: FAILED ({job['error']})")
+                elif job['status'] == 'cancelled':
+                    print(f"  {name}: cancelled")
+                else:
+                    print(f"  {name}: {job['success']} ok, {job['errors']} errors ({job['seconds']:.1f}s)")
+            print(f"Sheets: {results['sheets']} from {results['workbooks']} workbooks "
+                  f"({results['failed_sheets']} failed, {results['seconds']:.1f}s)")
+            if args.report:
+                with open(args.report, 'w', encoding='utf-8') as f:
+                    json.dump(results, f, indent=2, default=str)
+                print(f"Report written to {args.report}")
+        if args.dry_run:
+            samples = [sample for job in results.get('jobs', [results]) for sample in job.get('samples', [])]
+            for sample in samples[:args.dry_run_samples]:
+                print(f"\nRow {sample['row']}: would {sample['action']} element with data:")
+                print(json.dumps(sample['data'], indent=2, ensure_ascii=False, default=str))
+            print(f"\nValid elements: {results['success']}")
+        else:
+            print(f"Success: {results['success']}")
         print(f"Errors: {results['errors']}")
+        if results['skipped']:
+            print(f"Skipped (already imported): {results['skipped']}")
+        if results.get('invalid'):
+            print(f"Skipped (no publication, task or group): {results['invalid']}")
+        if args.upsert_key:
+            print(f"Updated: {results['updated']}")
+            print(f"Unchanged: {results['unchanged']}")
+        if results.get('client', {}).get('retries'):
+            client_stats = results['client']
+            print(f"Retries: {client_stats['retries']} {client_stats['retries_by_reason']} "
+                  f"(throttled: {client_stats['throttled']}, concurrency limit: {client_stats['concurrency_limit']})")
+        if results.get('pipeline'):
+            for stage, counters in results['pipeline']['stages'].items():
+                print(f"  {stage:<10} {counters['items']:>8} items  {counters['rate']:>9.1f}/s  "
+                      f"busy {counters['busy_seconds']:.1f}s")
+            depths = ', '.join(f"{name} {q['max_depth']}/{q['capacity'] or '-'}"
+                               for name, q in results['pipeline']['queues'].items())
+            print(f"  max queue depth: {depths}")
+        if results.get('client', {}).get('connections_opened'):
+            print(f"Connections: {results['client']['connections_opened']} opened, "
+                  f"{results['client']['connections_reused']} reused")
+        if results.get('client', {}).get('reauthentications'):
+            print(f"Token refreshes after 401: {results['client']['reauthentications']}")
+        for path in args.results:
+            print(f"Row results written to {path}")
+        for path in (write_back.written if write_back else []):
+            print(f"Workbook with results written to {path}")
+        if results.get('timings'):
+            timings = results['timings']
+            wall = f" (wall {timings['wall_seconds']:.1f}s)" if 'wall_seconds' in timings else ''
+            print(f"Timings{wall}:")
+            for name, summary in list(timings['phases'].items()) + list(timings['http'].items()):
+                print(f"  {name:<14} {summary['count']:>8}x  total {summary['total_seconds']:>8.2f}s  "
+                      f"p50 {summary['p50_ms']:>8.1f}ms  p99 {summary['p99_ms']:>8.1f}ms")
+        if args.metrics_file:
+            with open(args.metrics_file, 'w', encoding='utf-8') as f:
+                f.write(importer.metrics.to_openmetrics())
+            print(f"Metrics written to {args.metrics_file}")
         
-        if results['errors'] > 0:
+        if results['errors'] > 0 or results.get('failed_sheets'):
             print("\nErrors occurred. Check the log file for details.")
             sys.exit(1)
             
@@ -7,16 +7,35 @@ A simple graphical interface for importing Excel data to Kordiam.
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import json
+import logging
 import os
+import queue
 import sys
 import threading
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 import io
 import pandas as pd
 
 # Import our existing importer
 from kordiam_excel_importer import KordiamConfig, KordiamImporter, load_config
 
+
+class _QueueLogHandler(logging.Handler):
+    """Forward log records from the import thread to the GUI event queue."""
+    
+    def __init__(self, events, level=logging.WARNING):
+        super().__init__(level)
+        self.events = events
+        self.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    
+    def emit(self, record):
+        try:
+            self.events.put(("log", self.format(record)))
+        except Exception:
+            self.handleError(record)
+
+
 class KordiamImporterGUI:
     FIELD_DEFINITIONS = [
         # (section, label, kordiam_field, field_type)
@@ -37,6 +56,10 @@ class KordiamImporterGUI:
         ("event", "Event End Date", "toDate", "date"),
         ("event", "Event End Time", "toTime", "time"),
     ]
+    
+    # The import thread never touches widgets; it posts events that the Tk loop drains
+    POLL_INTERVAL_MS = 100
+    MAX_EVENTS_PER_POLL = 500
 
     def __init__(self, root):
         self.root = root
@@ -54,6 +77,13 @@ class KordiamImporterGUI:
         self.excel_headers = []
         self.field_vars = {}
         self.field_widgets = []
+        self.events = queue.Queue()
+        self.importer = None
+        # Set by Cancel; the import thread honours it even before it has created the importer
+        self.cancel_requested = threading.Event()
+        self.import_started = None
+        self.progress_var = tk.DoubleVar(value=0.0)
+        self.progress_text = tk.StringVar(value="")
         
         # Set default values
         self.mapping_file.set("kordiam_mapping_clean.json")
@@ -61,6 +91,7 @@ class KordiamImporterGUI:
         
         self.create_widgets()
         self.load_default_config()
+        self.root.after(self.POLL_INTERVAL_MS, self.process_events)
     
     def create_widgets(self):
         # Main frame
@@ -155,16 +186,28 @@ class KordiamImporterGUI:
         button_frame.grid(row=5, column=0, columnspan=3, pady=(0, 10))
         
         ttk.Button(button_frame, text="Create Example Data", command=self.create_example_data).grid(row=0, column=0, padx=(0, 10))
-        ttk.Button(button_frame, text="Test Import (Dry Run)", command=self.test_import).grid(row=0, column=1, padx=(0, 10))
-        ttk.Button(button_frame, text="Run Import", command=self.run_import).grid(row=0, column=2, padx=(0, 10))
-        ttk.Button(button_frame, text="Clear Log", command=self.clear_log).grid(row=0, column=3)
+        self.test_button = ttk.Button(button_frame, text="Test Import (Dry Run)", command=self.test_import)
+        self.test_button.grid(row=0, column=1, padx=(0, 10))
+        self.run_button = ttk.Button(button_frame, text="Run Import", command=self.run_import)
+        self.run_button.grid(row=0, column=2, padx=(0, 10))
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_import, state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=3, padx=(0, 10))
+        ttk.Button(button_frame, text="Clear Log", command=self.clear_log).grid(row=0, column=4)
+        
+        # Progress section
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
+        progress_frame.columnconfigure(0, weight=1)
+        self.progress_bar = ttk.Progressbar(progress_frame, variable=self.progress_var, maximum=100.0, mode="determinate")
+        self.progress_bar.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        ttk.Label(progress_frame, textvariable=self.progress_text, width=45, anchor=tk.E).grid(row=0, column=1, padx=(10, 0))
         
         # Log section
         log_frame = ttk.LabelFrame(main_frame, text="Log Output", padding="10")
-        log_frame.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
+        log_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
-        main_frame.rowconfigure(6, weight=1)
+        main_frame.rowconfigure(7, weight=1)
         
         # Log text area
         self.log_text = scrolledtext.ScrolledText(log_frame, height=15, width=80)
@@ -173,7 +216,7 @@ class KordiamImporterGUI:
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
         status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E))
+        status_bar.grid(row=8, column=0, columnspan=3, sticky=(tk.W, tk.E))
     
     def load_default_config(self):
         """Load default configuration if available."""
@@ -342,12 +385,92 @@ class KordiamImporterGUI:
             messagebox.showerror("Error", f"Error saving mapping: {e}")
     
     def log_message(self, message):
-        """Add message to log with timestamp."""
+        """Add message to log with timestamp (safe to call from any thread)."""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
-        self.log_text.insert(tk.END, log_entry)
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        self.events.put(("log", f"[{timestamp}] {message}"))
+    
+    def set_status(self, message):
+        """Update the status bar (safe to call from any thread)."""
+        self.events.put(("status", message))
+    
+    def process_events(self):
+        """Apply queued events from the import thread in one batch, then refresh the progress bar."""
+        lines = []
+        try:
+            for _ in range(self.MAX_EVENTS_PER_POLL):
+                kind, payload = self.events.get_nowait()
+                if kind == "log":
+                    lines.append(payload + "\n")
+                elif kind == "status":
+                    self.status_var.set(payload)
+                elif kind == "error":
+                    messagebox.showerror("Error", payload)
+                elif kind == "finished":
+                    self.finish_import()
+        except queue.Empty:
+            pass
+        
+        if lines:
+            self.log_text.insert(tk.END, "".join(lines))
+            self.log_text.see(tk.END)
+        if self.importer is not None:
+            self.update_progress()
+        self.root.after(self.POLL_INTERVAL_MS, self.process_events)
+    
+    def update_progress(self, final=False):
+        """Show processed rows, throughput and (while running) ETA of the import."""
+        progress = self.importer.progress()
+        processed, total = progress["processed"], progress["total"]
+        elapsed = time.monotonic() - self.import_started
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        
+        if total:
+            self.progress_bar.configure(mode="determinate")
+            self.progress_var.set(min(100.0, 100.0 * processed / total))
+            text = f"{processed}/{total} rows  {rate:.1f} rows/s"
+            if rate > 0 and processed < total and not final:
+                text += f"  ETA {timedelta(seconds=int((total - processed) / rate))}"
+        else:
+            text = f"{processed} rows  {rate:.1f} rows/s" if total is not None else "Reading Excel file..."
+        self.progress_text.set(text)
+    
+    def start_import(self, dry_run):
+        """Start an import thread and switch the buttons to the running state."""
+        self.importer = None
+        self.cancel_requested.clear()
+        self.import_started = time.monotonic()
+        self.progress_var.set(0.0)
+        self.progress_text.set("")
+        self.test_button.configure(state=tk.DISABLED)
+        self.run_button.configure(state=tk.DISABLED)
+        self.cancel_button.configure(state=tk.NORMAL)
+        
+        # Run in separate thread to prevent GUI freezing
+        thread = threading.Thread(target=self.run_import_thread, args=(dry_run,))
+        thread.daemon = True
+        thread.start()
+    
+    def finish_import(self):
+        """Show the final progress and re-enable the buttons."""
+        if self.importer is not None:
+            self.update_progress(final=True)
+            if self.importer.cancelled:
+                self.progress_text.set(self.progress_text.get() + "  (cancelled)")
+            else:
+                self.progress_var.set(100.0)
+        self.importer = None
+        self.test_button.configure(state=tk.NORMAL)
+        self.run_button.configure(state=tk.NORMAL)
+        self.cancel_button.configure(state=tk.DISABLED)
+    
+    def cancel_import(self):
+        """Stop reading new rows; uploads already in flight finish and are recorded."""
+        self.cancel_requested.set()
+        if self.importer is not None:
+            self.importer.cancel()
+        self.cancel_button.configure(state=tk.DISABLED)
+        self.set_status("Cancelling...")
+        self.log_message("Cancelling import, waiting for uploads in flight...")
     
     def clear_log(self):
         """Clear the log output."""
@@ -362,7 +485,7 @@ class KordiamImporterGUI:
             
             # Import and run the example creator
             import create_kordiam_example_clean
-            create_kordiam_example_clean
+            create_kordiam_example_clean.create_example_workbook()
             
             self.log_message("✓ Example data created successfully!")
             self.log_message("File: kordiam_example_clean.xlsx")
@@ -376,7 +499,9 @@ class KordiamImporterGUI:
             self.status_var.set("Error creating example data")
     
     def run_import_thread(self, dry_run=False):
-        """Run the import in a separate thread."""
+        """Run the import in a separate thread; all GUI updates go through the event queue."""
+        log_handler = _QueueLogHandler(self.events)
+        logging.getLogger().addHandler(log_handler)
         try:
             # Validate inputs
             if not self.excel_file.get():
@@ -406,8 +531,12 @@ class KordiamImporterGUI:
             else:
                 self.log_message("Using mapping configuration from selector...")
             
-            # Create importer
+            # Create importer (polled by the Tk loop for progress)
             importer = KordiamImporter(config)
+            self.importer = importer
+            if self.cancel_requested.is_set():
+                # Cancel was clicked while the inputs were loaded
+                importer.cancel()
             
             # Run import
             operation = "dry run" if dry_run else "import"
@@ -420,30 +549,33 @@ class KordiamImporterGUI:
             )
             
             # Display results
-            self.log_message(f"✓ {operation.capitalize()} completed!")
+            if results.get('cancelled'):
+                self.log_message(f"⚠ {operation.capitalize()} cancelled")
+            else:
+                self.log_message(f"✓ {operation.capitalize()} completed!")
             self.log_message(f"Success: {results['success']}")
             self.log_message(f"Errors: {results['errors']}")
             
             if results['errors'] > 0:
                 self.log_message("⚠ Some errors occurred. Check the details above.")
             
-            self.status_var.set(f"{operation.capitalize()} completed - {results['success']} success, {results['errors']} errors")
+            state = "cancelled" if results.get('cancelled') else "completed"
+            self.set_status(f"{operation.capitalize()} {state} - {results['success']} success, {results['errors']} errors")
             
         except Exception as e:
             error_msg = f"Error during import: {e}"
             self.log_message(f"✗ {error_msg}")
-            messagebox.showerror("Error", error_msg)
-            self.status_var.set("Import failed")
+            self.events.put(("error", error_msg))
+            self.set_status("Import failed")
+        finally:
+            logging.getLogger().removeHandler(log_handler)
+            self.events.put(("finished", None))
     
     def test_import(self):
         """Run a test import (dry run)."""
         self.status_var.set("Running test import...")
         self.log_message("=== Starting Test Import (Dry Run) ===")
-        
-        # Run in separate thread to prevent GUI freezing
-        thread = threading.Thread(target=self.run_import_thread, args=(True,))
-        thread.daemon = True
-        thread.start()
+        self.start_import(True)
     
     def run_import(self):
         """Run the actual import."""
@@ -458,11 +590,7 @@ class KordiamImporterGUI:
         
         self.status_var.set("Running import...")
         self.log_message("=== Starting Actual Import ===")
-        
-        # Run in separate thread to prevent GUI freezing
-        thread = threading.Thread(target=self.run_import_thread, args=(self.dry_run.get(),))
-        thread.daemon = True
-        thread.start()
+        self.start_import(self.dry_run.get())
 
 def main():
     root = tk.Tk()
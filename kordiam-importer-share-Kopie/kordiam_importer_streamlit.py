@@ -5,13 +5,14 @@ Web-based GUI for importing Excel data to Kordiam.
 """
 
 import streamlit as st
+import asyncio
 import json
 import os
+import time
 from datetime import datetime
-import tempfile
-import io
 import pandas as pd
-from kordiam_excel_importer import KordiamImporter, load_config, KordiamConfig
+from kordiam_excel_importer import (KordiamImporter, ImportJobRegistry, ParsedWorkbook, WorkbookCache,
+                                    load_config, KordiamConfig, httpx)
 
 
 # Streamlit page setup
@@ -66,16 +67,10 @@ def get_config_from_secrets_or_file(config_file=None):
     if config_file:
         try:
             log_message("Loading configuration from uploaded file...")
-            # If it's a Streamlit uploaded file, save to temp file first
-            if hasattr(config_file, 'read'):
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".json", mode='w') as tmp_config:
-                    config_file.seek(0)  # Reset file pointer
-                    tmp_config.write(config_file.read().decode('utf-8'))
-                    config_path = tmp_config.name
-            else:
-                config_path = config_file
-            
-            return load_config(config_path)
+            # A Streamlit uploaded file is read directly; it may have been read before
+            if hasattr(config_file, 'seek'):
+                config_file.seek(0)
+            return load_config(config_file)
         except Exception as e:
             log_message(f"Could not load from config file: {e}")
             raise
@@ -93,9 +88,43 @@ def log_message(message: str):
     st.session_state.logs += f"[{timestamp}] {message}\n"
 
 
+# --- Background Import Jobs ---
+@st.cache_resource
+def get_job_registry() -> ImportJobRegistry:
+    """Job registry shared by all sessions of this server process."""
+    return ImportJobRegistry(max_running=4)
+
+
+def _get_job_query_ids():
+    """Job ids kept in the page URL, so a browser refresh finds the jobs again."""
+    if hasattr(st, "query_params"):
+        return list(st.query_params.get_all("job"))
+    return list(st.experimental_get_query_params().get("job", []))
+
+
+def _set_job_query_ids(job_ids):
+    if hasattr(st, "query_params"):
+        st.query_params["job"] = job_ids
+    else:
+        st.experimental_set_query_params(job=job_ids)
+
+
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = _get_job_query_ids()
+if "reported_jobs" not in st.session_state:
+    st.session_state.reported_jobs = set()
+
+
 # --- Sidebar Options ---
 st.sidebar.header("⚙️ Options")
 dry_run = st.sidebar.checkbox("Dry Run (Test without creating elements)", value=True)
+concurrency = st.sidebar.number_input(
+    "Concurrent requests",
+    min_value=1,
+    max_value=200,
+    value=1,
+    help="Number of element uploads in flight at once"
+)
 mapping_source = st.sidebar.radio(
     "Mapping Source",
     ["Build from Excel columns", "Upload mapping JSON"],
@@ -128,12 +157,21 @@ else:
     config_file = st.file_uploader("Select Config File (JSON)", type=["json"])
 
 
+@st.cache_resource
+def get_workbook_cache() -> WorkbookCache:
+    """Parsed uploads shared by all sessions, so reruns don't parse a workbook again."""
+    return WorkbookCache(max_entries=8, max_bytes=512 * 1024 * 1024)
+
+
+def load_workbook(uploaded_file) -> ParsedWorkbook:
+    """Parse an uploaded workbook once per distinct content."""
+    return get_workbook_cache().get(uploaded_file.getvalue())
+
+
 def get_excel_headers(uploaded_file):
     if not uploaded_file:
         return []
-    data = uploaded_file.getvalue()
-    df = pd.read_excel(io.BytesIO(data), nrows=0)
-    return [str(c) for c in df.columns]
+    return load_workbook(uploaded_file).headers
 
 
 def _col_index_to_letter(index: int) -> str:
@@ -151,18 +189,11 @@ def excel_columns_with_first_value(uploaded_file):
     """
     if not uploaded_file:
         return []
-    data = uploaded_file.getvalue()
-    # Read first row to extract first-values; if file is empty this will be empty
-    df = pd.read_excel(io.BytesIO(data), nrows=1)
+    workbook = load_workbook(uploaded_file)
+    # First-values come from the cached first row; if the sheet is empty this is empty
     cols = []
-    for idx, col in enumerate(df.columns):
-        try:
-            if df.empty:
-                first_val = ""
-            else:
-                first_val = df.iloc[0][col]
-        except Exception:
-            first_val = ""
+    for idx, col in enumerate(workbook.frame.columns):
+        first_val = workbook.first_row.get(str(col), "")
 
         # Normalize first value to a short string
         try:
@@ -204,6 +235,7 @@ with col1:
     if st.button("📑 Create Example Data"):
         try:
             import create_kordiam_example_clean
+            create_kordiam_example_clean.create_example_workbook()
             log_message("✓ Example data created successfully! File: kordiam_example_clean.xlsx")
             st.success("Example data created: kordiam_example_clean.xlsx")
         except Exception as e:
@@ -212,7 +244,7 @@ with col1:
 
 
 def run_import(excel_file, mapping_file, config_file, dry_run: bool):
-    """Run importer and log results."""
+    """Start the import as a background job; its progress is shown under Import Jobs."""
     try:
         if not excel_file:
             raise ValueError("Please select an Excel file")
@@ -226,19 +258,12 @@ def run_import(excel_file, mapping_file, config_file, dry_run: bool):
         if not config:
             raise ValueError("No configuration available. Please configure Streamlit secrets or upload a config file.")
 
-        # Save uploaded files to temp dir (since importer expects file paths)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_excel:
-            tmp_excel.write(excel_file.getvalue())
-            excel_path = tmp_excel.name
+        # Import the frame parsed when the file was uploaded instead of parsing it again
+        workbook = load_workbook(excel_file)
 
         if mapping_source == "Upload mapping JSON":
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tmp_mapping:
-                tmp_mapping.write(mapping_file.getvalue())
-                mapping_path = tmp_mapping.name
-
             log_message("Loading mapping configuration...")
-            with open(mapping_path, 'r') as f:
-                mapping_config = json.load(f)
+            mapping_config = json.loads(mapping_file.getvalue())
         else:
             mapping_config = st.session_state.get("built_mapping_config")
             if not mapping_config:
@@ -247,24 +272,36 @@ def run_import(excel_file, mapping_file, config_file, dry_run: bool):
         # Create importer
         importer = KordiamImporter(config)
 
-        # Run import
+        # Run import in the background; the job counts rows as they are written to it
         operation = "dry run" if dry_run else "import"
         log_message(f"Starting {operation}...")
+        workers = int(concurrency)
+
+        def run(job):
+            if workers > 1 and httpx is not None:
+                # Drive all uploads from one event loop over a shared connection pool
+                return asyncio.run(importer.import_from_excel_async(
+                    excel_file=excel_file.name,
+                    mapping_config=mapping_config,
+                    dry_run=dry_run,
+                    max_concurrency=workers,
+                    result_sinks=[job],
+                    dataframe=workbook.frame
+                ))
+            return importer.import_from_excel(
+                excel_file=excel_file.name,
+                mapping_config=mapping_config,
+                dry_run=dry_run,
+                max_workers=workers,
+                result_sinks=[job],
+                dataframe=workbook.frame
+            )
 
-        results = importer.import_from_excel(
-            excel_file=excel_path,
-            mapping_config=mapping_config,
-            dry_run=dry_run
-        )
-
-        log_message(f"✓ {operation.capitalize()} completed!")
-        log_message(f"Success: {results['success']}")
-        log_message(f"Errors: {results['errors']}")
-
-        if results['errors'] > 0:
-            log_message("⚠ Some errors occurred. Check details above.")
+        job = get_job_registry().submit(importer, run, label=excel_file.name, dry_run=dry_run)
+        st.session_state.job_ids.append(job.id)
+        _set_job_query_ids(st.session_state.job_ids)
 
-        st.success(f"{operation.capitalize()} completed: {results['success']} success, {results['errors']} errors")
+        st.info(f"{operation.capitalize()} started: {excel_file.name}")
 
     except Exception as e:
         log_message(f"✗ Error during import: {e}")
@@ -310,6 +347,54 @@ with col4:
         st.session_state.logs = ""
 
 
+# --- Import Jobs ---
+def show_job(job):
+    """Show progress, throughput and recent errors of a background job."""
+    snapshot = job.snapshot()
+    operation = "Dry run" if snapshot['dry_run'] else "Import"
+    processed, total = snapshot['processed'], snapshot['total']
+    st.markdown(f"**{operation}: {snapshot['label']}** — {snapshot['status']}")
+    if total:
+        st.progress(min(1.0, processed / total), text=f"{processed}/{total} rows")
+
+    metric_cols = st.columns(4)
+    metric_cols[0].metric("Rows processed", processed)
+    metric_cols[1].metric("Rows/s", snapshot['rate'])
+    metric_cols[2].metric("Errors", snapshot['errors'])
+    eta = snapshot['eta_seconds']
+    metric_cols[3].metric("ETA", "—" if eta is None else f"{eta // 60:.0f}:{eta % 60:02.0f}")
+
+    if not job.done and st.button("⏹ Cancel", key=f"cancel_{job.id}"):
+        job.cancel()
+        log_message(f"Cancelling {snapshot['label']}; uploads in flight finish first...")
+    if snapshot['error']:
+        st.error(f"Error during import: {snapshot['error']}")
+    if snapshot['recent_errors']:
+        with st.expander(f"Recent errors ({len(snapshot['recent_errors'])})"):
+            st.dataframe(pd.DataFrame(snapshot['recent_errors']), use_container_width=True)
+
+    # Log the outcome once per session
+    if job.done and job.id not in st.session_state.reported_jobs:
+        st.session_state.reported_jobs.add(job.id)
+        if snapshot['status'] == 'failed':
+            log_message(f"✗ Error during import: {snapshot['error']}")
+        else:
+            log_message(f"✓ {operation} {snapshot['status']}: {snapshot['label']}")
+            log_message(f"Success: {snapshot['success']}")
+            log_message(f"Errors: {snapshot['errors']}")
+            if snapshot['errors'] > 0:
+                log_message("⚠ Some errors occurred. Check details under Import Jobs.")
+
+
+registry = get_job_registry()
+session_jobs = [job for job in map(registry.get, st.session_state.job_ids) if job]
+if session_jobs:
+    st.subheader("🏃 Import Jobs")
+    for job in reversed(session_jobs):
+        show_job(job)
+        st.divider()
+
+
 # --- Log Output ---
 st.subheader("📜 Log Output")
 st.text_area("Logs", st.session_state.logs, height=300)
@@ -387,3 +472,9 @@ if mapping_source == "Build from Excel columns":
                     st.info("Select at least one Excel column to build a mapping.")
         except Exception as e:
             st.error(f"Error reading Excel headers: {e}")
+
+# --- Poll Running Jobs ---
+# Jobs run in background threads; rerun once a second to refresh their progress
+if any(not job.done for job in session_jobs):
+    time.sleep(1)
+    st.rerun()
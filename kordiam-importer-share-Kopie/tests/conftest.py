@@ -0,0 +1,43 @@
+"""Shared fixtures: a synthetic workbook, the example mapping and a stub Kordiam server."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from create_kordiam_example_clean import create_synthetic_workbook
+from kordiam_excel_importer import KordiamConfig, TokenCache
+from stub_server import start_stub
+
+
+@pytest.fixture(scope='session')
+def mapping():
+    with open(ROOT / 'kordiam_mapping_clean.json', 'r') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='session')
+def workbook(tmp_path_factory):
+    """A 30-row synthetic workbook; row N has the slug story-(N-1)."""
+    return str(create_synthetic_workbook(tmp_path_factory.mktemp('workbooks') / 'synthetic.xlsx', 30))
+
+
+@pytest.fixture
+def stub():
+    """A stub Kordiam API without latency; tests change `stub.state` to inject jitter or failures."""
+    TokenCache._memory.clear()  # A new stub may reuse an earlier one's port, and so its cache key
+    server = start_stub(latency=0.0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def config(stub):
+    return KordiamConfig(base_url=stub.base_url, client_id='test', client_secret='test',
+                         max_retries=3, backoff_base=0.001, backoff_max=0.01)
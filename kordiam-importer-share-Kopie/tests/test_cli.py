@@ -0,0 +1,84 @@
+"""The command line entry point, run in-process against the stub server, and its config loading."""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+import kordiam_excel_importer
+from conftest import ROOT
+from kordiam_excel_importer import KordiamConfig, load_config_with_args
+
+
+@pytest.fixture
+def run_cli(stub, monkeypatch, tmp_path):
+    """Run main() with the stub's credentials and the example mapping."""
+    monkeypatch.chdir(tmp_path)
+    
+    def run(*args):
+        argv = ['kordiam_excel_importer.py', *args, '--mapping', str(ROOT / 'kordiam_mapping_clean.json'),
+                '--client-id', 'test', '--client-secret', 'test', '--base-url', stub.base_url,
+                '--config', str(tmp_path / 'missing.json'), '--log-level', 'WARNING']
+        monkeypatch.setattr(sys, 'argv', argv)
+        kordiam_excel_importer.main()
+    return run
+
+
+@pytest.fixture
+def local_workbook(workbook, tmp_path):
+    copy = tmp_path / 'data.xlsx'
+    copy.write_bytes(Path(workbook).read_bytes())
+    return copy
+
+
+def test_plain_import_writes_no_journal(run_cli, local_workbook, stub):
+    run_cli(str(local_workbook))
+    assert stub.state.counters['created'] == 30
+    assert not Path(f"{local_workbook}.journal.jsonl").exists()
+
+
+def test_resume_keeps_a_journal_and_skips_its_rows(run_cli, local_workbook, stub):
+    run_cli(str(local_workbook), '--resume')
+    assert Path(f"{local_workbook}.journal.jsonl").exists()
+    
+    run_cli(str(local_workbook), '--resume')
+    assert stub.state.counters['created'] == 30
+
+
+def test_journal_option_names_the_journal(run_cli, local_workbook, tmp_path):
+    run_cli(str(local_workbook), '--journal', str(tmp_path / 'run.jsonl'))
+    assert (tmp_path / 'run.jsonl').exists()
+    assert not Path(f"{local_workbook}.journal.jsonl").exists()
+
+
+@pytest.fixture
+def tuned_config_file(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({'base_url': 'https://file.example', 'client_id': 'file', 'client_secret': 'file',
+                                'max_retries': 7, 'pool_maxsize': 12, 'keep_alive': False}))
+    return str(path)
+
+
+@pytest.mark.parametrize('source', ['arguments', 'environment', 'file'])
+def test_config_file_settings_apply_whatever_the_credentials_source(tuned_config_file, monkeypatch, source):
+    monkeypatch.delenv('KORDIAM_CLIENT_ID', raising=False)
+    monkeypatch.delenv('KORDIAM_CLIENT_SECRET', raising=False)
+    args = argparse.Namespace(config=tuned_config_file, client_id=None, client_secret=None,
+                              base_url='https://kordiam.app')
+    if source == 'arguments':
+        args.client_id, args.client_secret = 'cli', 'cli'
+    elif source == 'environment':
+        monkeypatch.setenv('KORDIAM_CLIENT_ID', 'env')
+        monkeypatch.setenv('KORDIAM_CLIENT_SECRET', 'env')
+    
+    config = load_config_with_args(args)
+    assert (config.max_retries, config.pool_maxsize, config.keep_alive) == (7, 12, False)
+    assert config.client_id == {'arguments': 'cli', 'environment': 'env', 'file': 'file'}[source]
+
+
+def test_credentials_from_arguments_do_not_need_a_config_file(tmp_path):
+    args = argparse.Namespace(config=str(tmp_path / 'missing.json'), client_id='cli', client_secret='cli',
+                              base_url='https://kordiam.app')
+    assert load_config_with_args(args).max_retries == KordiamConfig.max_retries
@@ -0,0 +1,44 @@
+"""Connection pool metrics: how many requests opened a connection and how many reused one."""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+from kordiam_excel_importer import KordiamAPIClient, KordiamImporter
+
+
+def test_sequential_requests_reuse_one_connection(stub, config):
+    client = KordiamAPIClient(config)
+    for element_id in range(5):
+        client.get_element(element_id)
+    
+    # The token request opens the connection; every element request reuses it
+    stats = client.get_stats()
+    assert (stats['connections_opened'], stats['connections_reused']) == (1, 5)
+
+
+def test_without_keep_alive_every_request_connects(stub, config):
+    client = KordiamAPIClient(replace(config, keep_alive=False))
+    for element_id in range(5):
+        client.get_element(element_id)
+    
+    stats = client.get_stats()
+    assert (stats['connections_opened'], stats['connections_reused']) == (6, 0)
+
+
+def test_concurrent_requests_open_at_most_pool_maxsize_connections(stub, config):
+    stub.state.latency = 0.01
+    client = KordiamAPIClient(replace(config, pool_maxsize=4))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(client.get_element, range(40)))
+    
+    stats = client.get_stats()
+    assert stats['connections_opened'] + stats['connections_reused'] == 41
+    assert 1 <= stats['connections_opened'] <= 4
+
+
+def test_import_results_report_connection_reuse(stub, config, mapping, workbook):
+    results = KordiamImporter(config).import_from_excel(workbook, mapping, max_workers=4)
+    
+    client = results['client']
+    assert client['connections_opened'] + client['connections_reused'] == client['requests'] + 1
+    assert client['connections_reused'] > client['connections_opened']
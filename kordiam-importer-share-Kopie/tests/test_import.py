@@ -0,0 +1,178 @@
+"""End-to-end imports against the stub server."""
+
+import asyncio
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from create_kordiam_example_clean import create_synthetic_workbook
+from kordiam_excel_importer import AsyncKordiamAPIClient, KordiamImporter
+
+MODES = {
+    'serial': {},
+    'concurrent': {'max_workers': 8},
+    'stream': {'max_workers': 8, 'stream': True, 'chunk_size': 7},
+    'pipeline': {'max_workers': 8, 'pipeline': True, 'chunk_size': 7},
+    'batched': {'max_workers': 8, 'batch_size': 4},
+}
+
+
+def recorded_rows(results):
+    return [detail['row'] for detail in results['details']]
+
+
+def read_jsonl(path):
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize('options', MODES.values(), ids=MODES.keys())
+def test_outcomes_are_recorded_in_row_order(stub, config, mapping, workbook, options):
+    stub.state.jitter = 0.01  # Uploads finish out of order
+    results = KordiamImporter(config).import_from_excel(workbook, mapping, **options)
+    
+    assert (results['success'], results['errors']) == (30, 0)
+    assert stub.state.counters['created'] == 30
+    assert recorded_rows(results) == list(range(1, 31))
+
+
+def test_async_outcomes_are_recorded_in_row_order(stub, config, mapping, workbook):
+    stub.state.jitter = 0.01
+    results = asyncio.run(KordiamImporter(config).import_from_excel_async(workbook, mapping, max_concurrency=8))
+    
+    assert (results['success'], results['errors']) == (30, 0)
+    assert stub.state.counters['created'] == 30
+    assert recorded_rows(results) == list(range(1, 31))
+
+
+def test_cancelled_async_import_journals_the_requests_in_flight(stub, config, mapping, workbook, tmp_path):
+    stub.state.latency = 0.05
+    journal = str(tmp_path / 'journal.jsonl')
+    
+    async def cancel_mid_batch():
+        task = asyncio.create_task(KordiamImporter(config).import_from_excel_async(
+            workbook, mapping, max_concurrency=8, journal_path=journal))
+        await asyncio.sleep(0.12)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    asyncio.run(cancel_mid_batch())
+    created = stub.state.counters['created']
+    assert 0 < created < 30
+    assert len([entry for entry in read_jsonl(journal) if entry['status'] == 'success']) == created
+
+
+def test_journal_records_every_created_row(stub, config, mapping, workbook, tmp_path):
+    journal = str(tmp_path / 'journal.jsonl')
+    results = KordiamImporter(config).import_from_excel(workbook, mapping, journal_path=journal, max_workers=8)
+    
+    entries = read_jsonl(journal)
+    assert sorted(entry['row'] for entry in entries) == list(range(1, 31))
+    assert {entry['element_id'] for entry in entries} == {detail['element_id'] for detail in results['details']}
+
+
+def test_resume_skips_rows_the_journal_records(stub, config, mapping, workbook, tmp_path):
+    journal = str(tmp_path / 'journal.jsonl')
+    first_rows = str(create_synthetic_workbook(tmp_path / 'first_rows.xlsx', 20))
+    KordiamImporter(config).import_from_excel(first_rows, mapping, journal_path=journal, max_workers=4)
+    assert stub.state.counters['created'] == 20
+    
+    results = KordiamImporter(config).import_from_excel(workbook, mapping, journal_path=journal,
+                                                        resume=True, max_workers=4)
+    assert (results['skipped'], results['success']) == (20, 10)
+    assert stub.state.counters['created'] == 30
+
+
+def test_resume_never_recreates_an_edited_row(stub, config, mapping, workbook, tmp_path):
+    journal = str(tmp_path / 'journal.jsonl')
+    KordiamImporter(config).import_from_excel(workbook, mapping, journal_path=journal)
+    
+    frame = pd.read_excel(workbook)
+    frame.loc[3, 'Title'] = 'Changed title'
+    changed = tmp_path / 'changed.xlsx'
+    frame.to_excel(changed, index=False)
+    results = KordiamImporter(config).import_from_excel(str(changed), mapping, journal_path=journal, resume=True)
+    assert (results['skipped'], results['success']) == (30, 0)
+    assert stub.state.counters['created'] == 30
+
+
+def test_resume_with_upsert_updates_an_edited_row(stub, config, mapping, workbook, tmp_path):
+    journal, index = str(tmp_path / 'journal.jsonl'), str(tmp_path / 'upsert.jsonl')
+    KordiamImporter(config).import_from_excel(workbook, mapping, journal_path=journal,
+                                              upsert_key='slug', upsert_index_path=index)
+    
+    frame = pd.read_excel(workbook)
+    frame.loc[3, 'Title'] = 'Changed title'
+    changed = tmp_path / 'changed.xlsx'
+    frame.to_excel(changed, index=False)
+    results = KordiamImporter(config).import_from_excel(str(changed), mapping, journal_path=journal, resume=True,
+                                                        upsert_key='slug', upsert_index_path=index)
+    assert (results['skipped'], results['updated']) == (29, 1)
+    assert (stub.state.counters['created'], stub.state.counters['updated']) == (30, 1)
+
+
+def test_resume_ignores_journal_lines_that_are_not_entries(stub, config, mapping, workbook, tmp_path):
+    journal = tmp_path / 'journal.jsonl'
+    KordiamImporter(config).import_from_excel(workbook, mapping, journal_path=str(journal))
+    with open(journal, 'a', encoding='utf-8') as f:
+        f.write('{"status": "success"}\n[1, 2]\n')
+    
+    results = KordiamImporter(config).import_from_excel(workbook, mapping, journal_path=str(journal), resume=True)
+    assert (results['skipped'], results['success']) == (30, 0)
+
+
+def test_upsert_skips_unchanged_and_updates_changed_rows(stub, config, mapping, workbook, tmp_path):
+    index = str(tmp_path / 'upsert.jsonl')
+    KordiamImporter(config).import_from_excel(workbook, mapping, upsert_key='slug', upsert_index_path=index)
+    assert stub.state.counters['created'] == 30
+    
+    frame = pd.read_excel(workbook)
+    frame.loc[3, 'Title'] = 'Changed title'
+    changed = tmp_path / 'changed.xlsx'
+    frame.to_excel(changed, index=False)
+    results = KordiamImporter(config).import_from_excel(str(changed), mapping, upsert_key='slug',
+                                                        upsert_index_path=index, max_workers=4)
+    assert (results['unchanged'], results['updated'], results['success']) == (29, 1, 1)
+    assert (stub.state.counters['created'], stub.state.counters['updated']) == (30, 1)
+
+
+def test_async_client_creates_reads_and_updates(stub, config):
+    async def roundtrip():
+        async with AsyncKordiamAPIClient(config) as client:
+            created = await client.create_element({'title': 'Story'})
+            fetched = await client.get_element(created['id'])
+            updated = await client.update_element(created['id'], {'title': 'Changed'})
+            return created, fetched, updated
+    
+    created, fetched, updated = asyncio.run(roundtrip())
+    assert str(fetched['id']) == str(created['id']) == str(updated['id'])
+    assert (stub.state.counters['created'], stub.state.counters['updated']) == (1, 1)
+
+
+def test_dry_run_leaves_the_upsert_index_alone(stub, config, mapping, workbook, tmp_path):
+    index = str(tmp_path / 'upsert.jsonl')
+    KordiamImporter(config).import_from_excel(workbook, mapping, dry_run=True,
+                                              upsert_key='slug', upsert_index_path=index)
+    assert not os.path.exists(index)
+    
+    KordiamImporter(config).import_from_excel(workbook, mapping, upsert_key='slug', upsert_index_path=index)
+    modified = os.stat(index).st_mtime_ns
+    results = KordiamImporter(config).import_from_excel(workbook, mapping, dry_run=True,
+                                                        upsert_key='slug', upsert_index_path=index)
+    assert results['unchanged'] == 30
+    assert os.stat(index).st_mtime_ns == modified
+
+
+def test_concurrent_uploads_share_one_token(stub, config, mapping, workbook):
+    stub.state.latency = 0.01
+    KordiamImporter(config, max_workers=16).import_from_excel(workbook, mapping)
+    assert stub.state.counters['tokens'] == 1
+
+
+def test_async_uploads_share_one_token(stub, config, mapping, workbook):
+    stub.state.latency = 0.01
+    asyncio.run(KordiamImporter(config).import_from_excel_async(workbook, mapping, max_concurrency=16))
+    assert stub.state.counters['tokens'] == 1
@@ -0,0 +1,149 @@
+"""Background import jobs: submit, status, cancel and eviction of finished jobs."""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from kordiam_excel_importer import ImportJob, ImportJobRegistry, KordiamImporter
+
+
+@pytest.fixture
+def registry():
+    registry = ImportJobRegistry(max_running=2, keep_finished=2)
+    yield registry
+    registry._executor.shutdown(wait=True)
+
+
+def wait_until_done(job, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not job.done:
+        assert time.monotonic() < deadline, f"Job {job.label} still {job.status}"
+        time.sleep(0.01)
+    return job.snapshot()
+
+
+def submit_import(registry, config, mapping, workbook, **options):
+    importer = KordiamImporter(config)
+    return registry.submit(importer, lambda job: importer.import_from_excel(workbook, mapping, result_sinks=[job],
+                                                                             **options), label='synthetic.xlsx')
+
+
+def submit_blocked(registry, config, release):
+    """A job that runs until `release` is set."""
+    def run(job):
+        release.wait(10)
+        return {}
+    return registry.submit(KordiamImporter(config), run, label='blocked')
+
+
+def test_submitted_import_completes_with_its_counts(stub, config, mapping, workbook, registry):
+    job = submit_import(registry, config, mapping, workbook)
+    assert registry.get(job.id) is job
+    
+    snapshot = wait_until_done(job)
+    assert snapshot['status'] == 'completed'
+    assert (snapshot['processed'], snapshot['total'], snapshot['success'], snapshot['errors']) == (30, 30, 30, 0)
+    assert snapshot['eta_seconds'] is None and snapshot['recent_errors'] == []
+    assert job.results['success'] == 30
+
+
+def test_rows_failing_validation_count_as_processed(stub, config, mapping, workbook, registry):
+    frame = pd.read_excel(workbook).astype(object)
+    # Rows 1-5 keep their title but lose every publication, task and group column
+    frame.loc[:4, [column for column in frame.columns if column not in ('Title', 'Slug', 'Element Status')]] = None
+    importer = KordiamImporter(config)
+    job = registry.submit(importer, lambda job: importer.import_from_excel(frame, mapping, result_sinks=[job]),
+                          label='frame')
+    
+    snapshot = wait_until_done(job)
+    assert (snapshot['processed'], snapshot['total'], snapshot['success']) == (30, 30, 25)
+    assert job.results['invalid'] == 5
+    assert stub.state.counters['created'] == 25
+
+
+def test_jobs_beyond_max_running_wait_in_line(config, registry):
+    release = threading.Event()
+    running = [submit_blocked(registry, config, release) for _ in range(2)]
+    waiting = submit_blocked(registry, config, release)
+    time.sleep(0.05)
+    
+    assert [job.status for job in running] == ['running', 'running']
+    assert waiting.status == 'queued'
+    assert registry.jobs() == running + [waiting]
+    release.set()
+    assert wait_until_done(waiting)['status'] == 'completed'
+
+
+def test_only_the_most_recent_errors_are_kept(stub, config, mapping, workbook, registry, monkeypatch):
+    monkeypatch.setattr(ImportJob, 'MAX_ERRORS', 5)
+    stub.state.error_rate = 1.0
+    stub.state.error_status = 400
+    
+    snapshot = wait_until_done(submit_import(registry, config, mapping, workbook))
+    assert snapshot['errors'] == 30
+    assert [error['row'] for error in snapshot['recent_errors']] == [26, 27, 28, 29, 30]
+
+
+def test_failing_run_marks_the_job_failed(config, registry):
+    def run(job):
+        raise RuntimeError("Workbook is corrupt")
+    
+    snapshot = wait_until_done(registry.submit(KordiamImporter(config), run, label='corrupt.xlsx'))
+    assert (snapshot['status'], snapshot['error']) == ('failed', 'Workbook is corrupt')
+
+
+def test_cancel_stops_a_running_import(stub, config, mapping, workbook, registry):
+    stub.state.latency = 0.02
+    job = submit_import(registry, config, mapping, workbook)
+    while job.snapshot()['processed'] < 3:
+        time.sleep(0.01)
+    job.cancel()
+    
+    snapshot = wait_until_done(job)
+    assert snapshot['status'] == 'cancelled'
+    assert 3 <= snapshot['success'] < 30
+    assert stub.state.counters['created'] == snapshot['success']
+
+
+def test_cancelled_queued_job_never_runs(stub, config, mapping, workbook, registry):
+    release = threading.Event()
+    for _ in range(2):
+        submit_blocked(registry, config, release)
+    job = submit_import(registry, config, mapping, workbook)
+    job.cancel()
+    release.set()
+    
+    assert wait_until_done(job)['status'] == 'cancelled'
+    assert job.started_at is None
+    assert stub.state.counters['created'] == 0
+
+
+def test_oldest_finished_jobs_are_evicted(config, registry):
+    jobs = []
+    for i in range(4):
+        job = registry.submit(KordiamImporter(config), lambda job: {}, label=f"job {i}")
+        wait_until_done(job)
+        jobs.append(job)
+    release = threading.Event()
+    running = submit_blocked(registry, config, release)
+    
+    # Pruning happens on submit: of the four finished jobs, the two most recent stay
+    assert [registry.get(job.id) for job in jobs] == [None, None, jobs[2], jobs[3]]
+    assert registry.get(running.id) is running
+    release.set()
+
+
+def test_running_jobs_are_never_evicted(config):
+    registry = ImportJobRegistry(max_running=2, keep_finished=0)
+    release = threading.Event()
+    running = submit_blocked(registry, config, release)
+    done = registry.submit(KordiamImporter(config), lambda job: {}, label='done')
+    wait_until_done(done)
+    registry.submit(KordiamImporter(config), lambda job: {}, label='next')
+    
+    assert registry.get(running.id) is running
+    assert registry.get(done.id) is None
+    release.set()
+    registry._executor.shutdown(wait=True)
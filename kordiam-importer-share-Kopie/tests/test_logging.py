@@ -0,0 +1,96 @@
+"""The logging pipeline: records are queued by the caller and written in batches by a worker thread."""
+
+import io
+import logging
+import queue
+
+import pytest
+
+from kordiam_excel_importer import _BatchingQueueListener, _DeferredQueueHandler
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+    
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+@pytest.fixture
+def pipeline():
+    """A private logger feeding a queue, and a listener writing to an in-memory stream."""
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger(f"kordiam-test-{id(log_queue)}")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = _DeferredQueueHandler(log_queue)
+    logger.addHandler(handler)
+    stream = CountingStream()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+    listener = _BatchingQueueListener(log_queue, output, respect_handler_level=True)
+    yield logger, listener, output, stream
+    listener.stop()
+    logger.removeHandler(handler)
+
+
+def test_records_are_written_in_order_and_in_batches(pipeline):
+    logger, listener, _, stream = pipeline
+    for i in range(1000):
+        logger.info("record %d", i)
+    listener.start()
+    listener.flush()
+    
+    assert stream.getvalue().splitlines() == [f"INFO record {i}" for i in range(1000)]
+    assert stream.writes <= 1000 // _BatchingQueueListener.batch_size + 1
+
+
+def test_message_is_fixed_when_the_record_is_logged(pipeline):
+    logger, listener, _, stream = pipeline
+    row = {'title': 'before'}
+    logger.warning("row %s", row)
+    row['title'] = 'after'  # Changed before the worker thread formats the record
+    listener.start()
+    listener.flush()
+    
+    assert stream.getvalue() == "WARNING row {'title': 'before'}\n"
+
+
+def test_handler_levels_are_respected(pipeline):
+    logger, listener, output, stream = pipeline
+    output.setLevel(logging.WARNING)
+    logger.info("hidden")
+    logger.error("shown")
+    listener.start()
+    listener.flush()
+    
+    assert stream.getvalue() == "ERROR shown\n"
+
+
+def test_stop_writes_queued_records_and_ends_the_worker(pipeline):
+    logger, listener, _, stream = pipeline
+    listener.start()
+    worker = listener._thread
+    for i in range(10):
+        logger.info("record %d", i)
+    listener.stop()
+    
+    assert not worker.is_alive()
+    assert len(stream.getvalue().splitlines()) == 10
+
+
+def test_tracebacks_are_formatted_by_the_worker(pipeline):
+    logger, listener, _, stream = pipeline
+    try:
+        raise ValueError("bad cell")
+    except ValueError:
+        logger.exception("row %d failed", 3)
+    listener.start()
+    listener.flush()
+    
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "ERROR row 3 failed"
+    assert lines[1].startswith("Traceback") and lines[-1] == "ValueError: bad cell"
@@ -0,0 +1,59 @@
+"""Timing metrics: phase histograms and their OpenMetrics text exposition."""
+
+import re
+
+from kordiam_excel_importer import ImportMetrics, KordiamImporter
+
+SAMPLE = re.compile(r'^(?P<name>[a-z_]+)\{(?P<labels>[^}]*)\} (?P<value>\S+)$')
+
+
+def parse_exposition(text):
+    """Split OpenMetrics text into metadata lines and (name, labels, value) samples."""
+    metadata, samples = [], []
+    for line in text.splitlines():
+        if line.startswith('#'):
+            metadata.append(line)
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"Malformed sample line: {line!r}"
+        labels = dict(re.findall(r'(\w+)="([^"]*)"', match['labels']))
+        samples.append((match['name'], labels, float(match['value'])))
+    return metadata, samples
+
+
+def test_openmetrics_exposition_is_well_formed():
+    metrics = ImportMetrics()
+    for seconds in (0.0002, 0.003, 0.003, 0.2, 45.0):
+        metrics.observe('transform', seconds)
+    metrics.observe_http('POST', 201, 0.05)
+    metrics.observe_http('POST', 'error', 1.5)
+    
+    text = metrics.to_openmetrics()
+    assert text.endswith('# EOF\n')
+    metadata, samples = parse_exposition(text)
+    for metric in ('kordiam_import_phase_seconds', 'kordiam_http_request_seconds'):
+        assert f"# TYPE {metric} histogram" in metadata
+        assert f"# UNIT {metric} seconds" in metadata
+    
+    buckets = [(float(labels['le']), value) for name, labels, value in samples
+               if name == 'kordiam_import_phase_seconds_bucket' and labels['phase'] == 'transform']
+    assert [le for le, _ in buckets] == sorted(le for le, _ in buckets)
+    assert [count for _, count in buckets] == sorted(count for _, count in buckets)  # Cumulative
+    assert buckets[-1] == (float('inf'), 5)
+    assert dict(buckets)[0.005] == 3
+    
+    totals = {(name, tuple(sorted(labels.items()))): value for name, labels, value in samples}
+    assert totals[('kordiam_import_phase_seconds_count', (('phase', 'transform'),))] == 5
+    assert abs(totals[('kordiam_import_phase_seconds_sum', (('phase', 'transform'),))] - 45.2062) < 1e-6
+    assert totals[('kordiam_http_request_seconds_count', (('method', 'POST'), ('status', 'error')))] == 1
+
+
+def test_import_exposes_the_phases_and_requests_it_timed(stub, config, mapping, workbook):
+    importer = KordiamImporter(config, max_workers=4)
+    importer.import_from_excel(workbook, mapping)
+    
+    _, samples = parse_exposition(importer.metrics.to_openmetrics())
+    counts = {tuple(labels.values()): value for name, labels, value in samples if name.endswith('_count')}
+    assert counts[('POST', '201')] == 30
+    assert counts[('token',)] == 1
+    assert {('read',), ('transform',), ('serialize',)} <= set(counts)
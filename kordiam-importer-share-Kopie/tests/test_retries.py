@@ -0,0 +1,184 @@
+"""Retry limits: a failing request is sent at most max_retries + 1 times, whatever the import mode."""
+
+import asyncio
+import socket
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import requests
+
+from create_kordiam_example_clean import create_synthetic_workbook
+from kordiam_excel_importer import AsyncKordiamAPIClient, BatchEndpointSender, KordiamAPIClient, KordiamImporter
+from stub_server import BATCH_PATH
+
+MODES = {
+    'serial': {},
+    'concurrent': {'max_workers': 4},
+    'pipeline': {'max_workers': 4, 'pipeline': True},
+    'batched': {'max_workers': 4, 'batch_size': 3},
+}
+
+
+@pytest.fixture(scope='module')
+def six_rows(tmp_path_factory):
+    return str(create_synthetic_workbook(tmp_path_factory.mktemp('workbooks') / 'six_rows.xlsx', 6))
+
+
+@pytest.fixture
+def unavailable(stub):
+    """Answer every element request with 503 (Retry-After: 0)."""
+    stub.state.error_rate = 1.0
+    stub.state.error_status = 503
+    return stub
+
+
+@pytest.mark.parametrize('options', MODES.values(), ids=MODES.keys())
+def test_each_row_is_sent_max_retries_plus_one_times(unavailable, config, mapping, six_rows, options):
+    results = KordiamImporter(config).import_from_excel(six_rows, mapping, **options)
+    
+    assert (results['success'], results['errors']) == (0, 6)
+    assert unavailable.state.counters['errors'] == 6 * (config.max_retries + 1)
+    assert results['client']['retries'] == 6 * config.max_retries
+
+
+def test_batch_endpoint_request_is_sent_max_retries_plus_one_times(unavailable, config, mapping, six_rows):
+    importer = KordiamImporter(config)
+    sender = BatchEndpointSender(importer.client, BATCH_PATH, workers=4)
+    results = importer.import_from_excel(six_rows, mapping, batch_size=3, batch_sender=sender)
+    
+    assert results['errors'] == 6
+    assert unavailable.state.counters['errors'] == 2 * (config.max_retries + 1)
+
+
+def test_async_row_is_sent_max_retries_plus_one_times(unavailable, config, mapping, six_rows):
+    results = asyncio.run(KordiamImporter(config).import_from_excel_async(six_rows, mapping))
+    
+    assert (results['success'], results['errors']) == (0, 6)
+    assert unavailable.state.counters['errors'] == 6 * (config.max_retries + 1)
+    assert results['client']['retries'] == 6 * config.max_retries
+
+
+def test_client_errors_are_not_retried(unavailable, config, mapping, six_rows):
+    unavailable.state.error_status = 400
+    results = KordiamImporter(config).import_from_excel(six_rows, mapping, max_workers=4)
+    
+    assert results['errors'] == 6
+    assert unavailable.state.counters['errors'] == 6
+
+
+def test_transient_failures_are_retried_to_success(stub, config, mapping, workbook):
+    stub.state.error_rate = 0.3
+    results = KordiamImporter(config).import_from_excel(workbook, mapping, max_workers=4, batch_size=5)
+    
+    # Every row gets four attempts, so with 30% failures nearly all succeed; none is created twice
+    assert results['success'] + results['errors'] == 30
+    assert stub.state.counters['created'] == results['success']
+
+
+@pytest.fixture
+def client(config):
+    """A client that already holds a token, so only element requests reach the network."""
+    client = KordiamAPIClient(config)
+    client.access_token, client.token_expires_at = 'token', datetime.now() + timedelta(hours=1)
+    return client
+
+
+@pytest.fixture
+def async_client(config):
+    client = AsyncKordiamAPIClient(config)
+    client.access_token, client.token_expires_at = 'token', datetime.now() + timedelta(hours=1)
+    return client
+
+
+@pytest.fixture
+def refused_url():
+    """Base URL of a port nobody listens on."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+@pytest.mark.parametrize('status', [502, 504])
+def test_creates_are_not_retried_on_gateway_errors(unavailable, client, status):
+    unavailable.state.error_status = status
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.create_element({'title': 'Story'})
+    assert unavailable.state.counters['errors'] == 1
+
+
+@pytest.mark.parametrize('status', [502, 504])
+def test_updates_are_retried_on_gateway_errors(unavailable, config, client, status):
+    unavailable.state.error_status = status
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.update_element(7, {'title': 'Story'})
+    assert unavailable.state.counters['errors'] == config.max_retries + 1
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_creates_are_retried_when_the_server_refused_them(unavailable, config, client, status):
+    unavailable.state.error_status = status
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.create_element({'title': 'Story'})
+    assert unavailable.state.counters['errors'] == config.max_retries + 1
+
+
+def test_creates_are_not_retried_after_the_connection_dropped(stub, client):
+    stub.state.disconnect_rate = 1.0
+    with pytest.raises(requests.exceptions.ConnectionError, match='aborted'):
+        client.create_element({'title': 'Story'})
+    assert stub.state.counters['disconnects'] == 1
+
+
+def test_updates_are_retried_after_the_connection_dropped(stub, config, client):
+    stub.state.disconnect_rate = 1.0
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.update_element(7, {'title': 'Story'})
+    assert stub.state.counters['disconnects'] == config.max_retries + 1
+
+
+def test_creates_are_retried_when_the_connection_is_refused(config, client, refused_url):
+    client.config.base_url = refused_url
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.create_element({'title': 'Story'})
+    assert client.get_stats()['retries_by_reason'] == {'connection_error': config.max_retries}
+
+
+def test_async_creates_follow_the_same_policy(unavailable, config, async_client):
+    async def create_and_update():
+        async with async_client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await async_client.create_element({'title': 'Story'})
+            created_attempts = unavailable.state.counters['errors']
+            with pytest.raises(httpx.HTTPStatusError):
+                await async_client.update_element(7, {'title': 'Story'})
+            return created_attempts, unavailable.state.counters['errors'] - created_attempts
+    
+    unavailable.state.error_status = 502
+    assert asyncio.run(create_and_update()) == (1, config.max_retries + 1)
+
+
+def test_async_creates_are_not_retried_after_the_connection_dropped(stub, config, async_client):
+    async def create_and_update():
+        async with async_client:
+            with pytest.raises(httpx.TransportError):
+                await async_client.create_element({'title': 'Story'})
+            created_attempts = stub.state.counters['disconnects']
+            with pytest.raises(httpx.TransportError):
+                await async_client.update_element(7, {'title': 'Story'})
+            return created_attempts, stub.state.counters['disconnects'] - created_attempts
+    
+    stub.state.disconnect_rate = 1.0
+    assert asyncio.run(create_and_update()) == (1, config.max_retries + 1)
+
+
+def test_async_creates_are_retried_when_the_connection_is_refused(config, async_client, refused_url):
+    async def create():
+        async with async_client:
+            with pytest.raises(httpx.ConnectError):
+                await async_client.create_element({'title': 'Story'})
+    
+    async_client.config.base_url = refused_url
+    asyncio.run(create())
+    assert async_client.get_stats()['retries_by_reason'] == {'connection_error': config.max_retries}
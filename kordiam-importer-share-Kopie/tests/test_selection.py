@@ -0,0 +1,66 @@
+"""Row selections: ranges, partitions and samples."""
+
+import json
+
+import pandas as pd
+import pytest
+
+from kordiam_excel_importer import JsonlResultSink, KordiamImporter, RowSelection
+
+SHEET = pd.DataFrame({'n': range(1000)})
+
+
+def selected_rows(selection, frame=SHEET):
+    return set(selection.apply(frame).index + 1)
+
+
+@pytest.mark.parametrize('partition_by', ['hash', 'modulo'])
+@pytest.mark.parametrize('n', [1, 3, 4, 7])
+def test_partitions_are_disjoint_and_cover_the_sheet(partition_by, n):
+    parts = [selected_rows(RowSelection.parse(partition=f"{k}/{n}", partition_by=partition_by))
+             for k in range(1, n + 1)]
+    assert sum(len(part) for part in parts) == len(SHEET)
+    assert set().union(*parts) == set(range(1, len(SHEET) + 1))
+    # Roughly even: no partition more than 30% off its share
+    assert all(abs(len(part) - len(SHEET) / n) <= 0.3 * len(SHEET) / n for part in parts)
+
+
+def test_partitions_of_a_range_stay_inside_it():
+    parts = [selected_rows(RowSelection.parse(rows='101-300', partition=f"{k}/4")) for k in range(1, 5)]
+    assert set().union(*parts) == set(range(101, 301))
+
+
+def test_chunked_selection_matches_the_whole_sheet():
+    selection = RowSelection.parse(rows='95-620', partition='2/3')
+    chunks = [SHEET.iloc[start:start + 64] for start in range(0, len(SHEET), 64)]
+    chunked = pd.concat(selection.filter_chunks(chunks))
+    assert list(chunked.index) == list(selection.apply(SHEET).index)
+
+
+def test_sample_is_repeatable():
+    first = selected_rows(RowSelection.parse(partition='1/2', sample=50, seed=7))
+    assert len(first) == 50
+    assert first == selected_rows(RowSelection.parse(partition='1/2', sample=50, seed=7))
+    assert first != selected_rows(RowSelection.parse(partition='1/2', sample=50, seed=8))
+
+
+@pytest.mark.parametrize('kwargs', [{'rows': '20-10'}, {'rows': 'a-b'}, {'partition': '5/4'},
+                                    {'partition': '2'}, {'partition_by': 'random'}])
+def test_invalid_selections_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        RowSelection.parse(**kwargs)
+
+
+@pytest.mark.parametrize('stream', [False, True], ids=['whole', 'stream'])
+def test_partitioned_imports_create_every_row_once(stub, config, mapping, workbook, tmp_path, stream):
+    rows = []
+    for k in range(1, 4):
+        sink = JsonlResultSink(str(tmp_path / f"part{k}.jsonl"))
+        KordiamImporter(config).import_from_excel(workbook, mapping, row_selection=RowSelection.parse(partition=f"{k}/3"),
+                                                  result_sinks=[sink], stream=stream, chunk_size=8, max_workers=4)
+        sink.close()
+        with open(tmp_path / f"part{k}.jsonl", 'r') as f:
+            rows.extend(json.loads(line)['row'] for line in f)
+    
+    assert sorted(rows) == list(range(1, 31))
+    assert stub.state.counters['created'] == 30
@@ -0,0 +1,76 @@
+"""Workbooks given as paths, bytes, file objects and parsed DataFrames."""
+
+import io
+import json
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from kordiam_excel_importer import ExcelProcessor, JsonlResultSink, KordiamImporter, RowSelection, WorkbookWriteBack
+
+
+def dry_run_rows(config, mapping, source, tmp_path, **kwargs):
+    """Import `source` as a dry run and return the row numbers the result sink saw."""
+    sink = JsonlResultSink(str(tmp_path / 'results.jsonl'))
+    KordiamImporter(config).import_from_excel(source, mapping, dry_run=True, result_sinks=[sink], **kwargs)
+    sink.close()
+    with open(tmp_path / 'results.jsonl', 'r') as f:
+        return [json.loads(line)['row'] for line in f]
+
+
+def test_in_memory_sources_match_the_path(config, mapping, workbook, tmp_path):
+    with open(workbook, 'rb') as f:
+        content = f.read()
+    expected = dry_run_rows(config, mapping, workbook, tmp_path)
+    assert expected == list(range(1, 31))
+    assert dry_run_rows(config, mapping, content, tmp_path) == expected
+    assert dry_run_rows(config, mapping, io.BytesIO(content), tmp_path) == expected
+    assert dry_run_rows(config, mapping, pd.read_excel(workbook), tmp_path) == expected
+
+
+@pytest.mark.parametrize('reindex', [
+    lambda df: df.set_index(df.index.map(lambda i: f"row-{i}")),
+    lambda df: df.iloc[5:15],
+    lambda df: df.set_axis(range(100, 130)),
+], ids=['string-index', 'slice', 'offset-range'])
+def test_dataframe_rows_are_numbered_by_position(config, mapping, workbook, tmp_path, reindex):
+    frame = reindex(pd.read_excel(workbook))
+    processor = ExcelProcessor(frame)
+    assert list(processor.read_excel_data().index) == list(range(len(frame)))
+    assert dry_run_rows(config, mapping, frame, tmp_path) == list(range(1, len(frame) + 1))
+    
+    selection = RowSelection.parse(rows='2-4')
+    selected = ExcelProcessor(frame, row_selection=selection).read_excel_data()
+    assert list(selected['Slug']) == list(frame['Slug'].iloc[1:4])
+    assert dry_run_rows(config, mapping, frame, tmp_path, row_selection=selection) == [2, 3, 4]
+
+
+def test_dataframe_keyword_does_not_change_the_callers_frame(workbook):
+    frame = pd.read_excel(workbook).iloc[10:]
+    ExcelProcessor(workbook, dataframe=frame).read_excel_data()
+    assert frame.index[0] == 10
+
+
+def test_write_back_saves_a_copy_with_the_outcomes(stub, config, mapping, workbook, tmp_path):
+    source = shutil.copy(workbook, tmp_path / 'stories.xlsx')
+    write_back = WorkbookWriteBack()
+    results = KordiamImporter(config).import_from_excel(str(source), mapping, result_sinks=[write_back])
+    write_back.close()
+    
+    assert write_back.written == [str(tmp_path / 'stories.kordiam.xlsx')]
+    copy = pd.read_excel(write_back.written[0])
+    assert copy['Kordiam Status'].tolist() == ['success'] * 30
+    assert copy['Kordiam Element ID'].notna().all() and results['success'] == 30
+
+
+@pytest.mark.parametrize('source', [
+    lambda path: Path(path).read_bytes(),
+    lambda path: io.BytesIO(Path(path).read_bytes()),
+    lambda path: pd.read_excel(path),
+], ids=['bytes', 'file-object', 'dataframe'])
+def test_write_back_rejects_in_memory_sources(stub, config, mapping, workbook, source):
+    with pytest.raises(ValueError, match='file path'):
+        KordiamImporter(config).import_from_excel(source(workbook), mapping, result_sinks=[WorkbookWriteBack()])
+    assert stub.state.counters['requests'] == 0
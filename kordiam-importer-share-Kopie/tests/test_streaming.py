@@ -0,0 +1,74 @@
+"""Streamed chunks give the same elements as reading the whole sheet, whatever the chunk size."""
+
+import json
+from datetime import datetime
+
+import openpyxl
+import pytest
+
+from kordiam_excel_importer import ExcelProcessor, KordiamImporter, element_content_hash
+
+
+@pytest.fixture(scope='module')
+def ragged_workbook(tmp_path_factory):
+    """Columns whose inferred dtype changes with the rows a chunk happens to contain."""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Title', 'Slug', 'Element Status', 'Task Status ID', 'Confirmation Status', 'Platform ID',
+                  'Group IDs', 'Publication Date', 'Event Start Date', 'Event Start Time', 'Task Assignments'])
+    published = datetime(2024, 3, 15, 18, 30)
+    sheet.append(['One', 'one', 1, 2, -2, 9413781, 7, published, published, published, 'true'])
+    sheet.append(['Two', 'two', 2, 2.0, -2, 9413781, '7, 8', published, 'TBD', None, 'true, false'])
+    sheet.append(['Three', 'three', None, 2, 'N/A', None, None, None, None, published, None])
+    sheet.append([None] * 11)  # Blank row inside the sheet is kept
+    sheet.append(['Five', 'five', 4, 2.5, 0, 9413781.0, 9, published, published, None, 'false'])
+    sheet.append(['Six', 'six', 5, None, -2, '9413781', 10, 'soon', published, published, True])
+    sheet.append([None] * 11)  # Trailing blank rows are dropped
+    path = tmp_path_factory.mktemp('workbooks') / 'ragged.xlsx'
+    workbook.save(path)
+    return str(path)
+
+
+def payloads(processor, frames, mapping):
+    return [(index, json.dumps(element, sort_keys=True, default=str), repr(error))
+            for frame in frames for index, element, error in processor.iter_elements(frame, mapping)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 4, 5, 1000])
+def test_streamed_elements_match_read_excel(ragged_workbook, mapping, chunk_size):
+    processor = ExcelProcessor(ragged_workbook)
+    expected = payloads(processor, [processor.read_excel_data()], mapping)
+    assert [index for index, _, _ in expected] == list(range(6))
+    assert payloads(processor, processor.iter_excel_chunks(chunk_size), mapping) == expected
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7])
+def test_streamed_content_hashes_match_read_excel(workbook, mapping, chunk_size):
+    processor = ExcelProcessor(workbook)
+    expected = [element_content_hash(element) for _, element, _ in
+                processor.iter_elements(processor.read_excel_data(), mapping)]
+    streamed = [element_content_hash(element) for chunk in processor.iter_excel_chunks(chunk_size)
+                for _, element, _ in processor.iter_elements(chunk, mapping)]
+    assert streamed == expected
+
+
+def test_process_pool_yields_the_elements_of_iter_elements(ragged_workbook, mapping):
+    processor = ExcelProcessor(ragged_workbook)
+    expected = payloads(processor, [processor.read_excel_data()], mapping)
+    sharded = [(index, json.dumps(element, sort_keys=True, default=str), repr(error)) for index, element, error in
+               processor.iter_elements_parallel(processor.iter_excel_chunks(2), mapping, processes=2)]
+    assert sharded == expected
+
+
+def test_resume_after_a_streamed_import_creates_nothing(stub, config, mapping, ragged_workbook, tmp_path):
+    journal = str(tmp_path / 'journal.jsonl')
+    first = KordiamImporter(config).import_from_excel(ragged_workbook, mapping, journal_path=journal,
+                                                      stream=True, chunk_size=2)
+    created = stub.state.counters['created']
+    assert created == first['success'] > 0
+    
+    for options in ({}, {'stream': True, 'chunk_size': 3}):
+        results = KordiamImporter(config).import_from_excel(ragged_workbook, mapping, journal_path=journal,
+                                                            resume=True, **options)
+        assert results['skipped'] == created
+        assert stub.state.counters['created'] == created
@@ -0,0 +1,98 @@
+"""OAuth2 tokens: one token request for many concurrent callers, the token cache file and 401 replays."""
+
+import asyncio
+import json
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from kordiam_excel_importer import AsyncKordiamAPIClient, KordiamAPIClient, KordiamImporter, TokenCache
+
+
+@pytest.fixture
+def cached_config(config, tmp_path):
+    return replace(config, token_cache_file=str(tmp_path / 'tokens.json'))
+
+
+def test_concurrent_401s_request_one_new_token(stub, config):
+    client = KordiamAPIClient(config)
+    client.get_element(1)
+    stub.state.revoke_tokens()
+    
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(client.get_element, range(8)))
+    
+    # Every rejected request refreshes and replays, but only the first asks for a token
+    assert stub.state.counters['unauthorized'] > 1
+    assert stub.state.counters['tokens'] == 2
+    assert client.get_stats()['reauthentications'] == stub.state.counters['unauthorized']
+
+
+def test_async_concurrent_401s_request_one_new_token(stub, config):
+    async def read_concurrently():
+        async with AsyncKordiamAPIClient(config) as client:
+            await client.get_element(1)
+            stub.state.revoke_tokens()
+            await asyncio.gather(*(client.get_element(i) for i in range(8)))
+    
+    asyncio.run(read_concurrently())
+    assert stub.state.counters['unauthorized'] == 8
+    assert stub.state.counters['tokens'] == 2
+
+
+def test_token_cache_file_is_private(stub, cached_config):
+    KordiamAPIClient(cached_config).get_element(1)
+    
+    mode = os.stat(cached_config.token_cache_file).st_mode
+    assert stat.S_IMODE(mode) == 0o600
+
+
+def test_token_cache_is_shared_across_clients(stub, cached_config):
+    KordiamAPIClient(cached_config).get_element(1)
+    TokenCache._memory.clear()  # As in a new process
+    KordiamAPIClient(cached_config).get_element(2)
+    
+    assert stub.state.counters['tokens'] == 1
+
+
+def test_expired_cached_token_is_ignored(stub, cached_config):
+    expired = {'access_token': 'expired-token', 'expires_at': (datetime.now() - timedelta(minutes=1)).isoformat()}
+    with open(cached_config.token_cache_file, 'w') as f:
+        json.dump({TokenCache(cached_config).key: expired}, f)
+    
+    client = KordiamAPIClient(cached_config)
+    client.get_element(1)
+    assert stub.state.counters['tokens'] == 1
+    assert client.access_token != 'expired-token'
+
+
+@pytest.mark.parametrize('options', [{}, {'max_workers': 4}, {'max_workers': 4, 'batch_size': 5}],
+                         ids=['serial', 'concurrent', 'batched'])
+def test_token_expiring_mid_import_replays_each_rejected_request_once(stub, config, mapping, workbook, options):
+    stub.state.revoke_after = 10
+    results = KordiamImporter(config).import_from_excel(workbook, mapping, **options)
+    
+    unauthorized = stub.state.counters['unauthorized']
+    assert (results['success'], results['errors']) == (30, 0)
+    assert unauthorized >= 1
+    assert stub.state.counters['requests'] == 30 + unauthorized
+    assert stub.state.counters['created'] == 30
+    assert stub.state.counters['tokens'] == 2
+    assert results['client']['reauthentications'] == unauthorized
+
+
+def test_request_rejected_again_after_refresh_is_not_replayed_twice(stub, config, monkeypatch):
+    def reject(token):
+        stub.state.count('unauthorized')
+        return False
+    
+    monkeypatch.setattr(stub.state, 'admit', reject)
+    with pytest.raises(requests.exceptions.HTTPError, match='401'):
+        KordiamAPIClient(config).get_element(1)
+    assert stub.state.counters['unauthorized'] == 2
+    assert stub.state.counters['tokens'] == 2
@@ -0,0 +1,117 @@
+"""The column-wise transform gives byte-identical elements to transforming row by row."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kordiam_excel_importer import ExcelProcessor, MappingPlan
+
+ROWS = 5
+
+
+def stamps(tz=None):
+    values = pd.to_datetime(['2024-03-15 18:30', None, '1999-12-31 00:05', '2025-07-31 16:15', None])
+    return values.tz_localize(tz) if tz else values
+
+
+FRAMES = {
+    'nan_object_mix': lambda: {
+        'Element Status': pd.Series([1, np.nan, '3', None, 2.0], dtype=object),
+        'Task Status ID': pd.Series([2.0, '2', np.nan, 4, None], dtype=object),
+        'Platform ID': pd.Series(['9413781', 9413781.0, None, np.nan, 9413781], dtype=object),
+        'Group IDs': pd.Series(['7, 8', np.nan, 9, '10', None], dtype=object),
+        'Task Assignments': pd.Series(['true', None, True, 'false, true', np.nan], dtype=object),
+        'Event Start Time': pd.Series(['16:15', None, pd.Timestamp('2024-03-15 07:00'), np.nan, '08:00'], dtype=object),
+    },
+    'tz_aware_datetimes': lambda: {
+        'Task Status ID': [2] * ROWS,
+        'Task Deadline': stamps('Europe/Berlin'),
+        'Publication Date': stamps('UTC'),
+        'Event Start Date': stamps('America/New_York'),
+        'Event Start Time': stamps('America/New_York'),
+    },
+    'naive_datetimes': lambda: {
+        'Task Status ID': [2] * ROWS,
+        'Task Deadline': stamps(),
+        'Publication Date': stamps(),
+        'Event Start Date': stamps(),
+        'Event End Time': stamps(),
+    },
+    'all_float_columns': lambda: {
+        'Element Status': [1.0, np.nan, 3.0, 2.5, 4.0],
+        'Task Status ID': [2.0, 2.0, np.nan, 4.0, np.nan],
+        'Assigned User ID': [10126151.0, np.nan, 10126151.0, 1.5, 10126151.0],
+        'Confirmation Status': [-2.0, np.nan, 0.0, -2.0, 1.0],
+        'Platform ID': [9413781.0, np.nan, np.nan, 9413781.0, 9413781.0],
+        'Group IDs': [9455121.0, np.nan, 7.0, np.nan, 8.0],
+    },
+    'categorical_columns': lambda: {
+        'Element Status': pd.Categorical([1, 2, None, 2, 3]),
+        'Platform ID': pd.Categorical(['9413781', None, '9413781', '1', None]),
+        'Group IDs': pd.Categorical(['7, 8', '9', None, '7, 8', '10']),
+        'Task Assignments': pd.Categorical(['true', 'false', None, 'true, true', 'true']),
+    },
+    'nullable_int_columns': lambda: {
+        'Element Status': pd.array([1, None, 3, 2, None], dtype='Int64'),
+        'Task Status ID': pd.array([2, 2, None, 4, 2], dtype='Int64'),
+        'Assigned User ID': pd.array([10126151, None, 10126151, None, 1], dtype='Int64'),
+        'Platform ID': pd.array([9413781, None, 9413781, 9413781, None], dtype='Int64'),
+        'Group IDs': pd.array([9455121, 7, None, None, 8], dtype='Int64'),
+    },
+}
+
+
+def payload(element, error):
+    return json.dumps(element, sort_keys=True, default=str) if error is None else repr(error)
+
+
+def row_wise(processor, df, plan):
+    payloads = []
+    for _, row in df.iterrows():
+        try:
+            payloads.append(payload(processor.transform_row_to_element(row, plan), None))
+        except Exception as e:
+            payloads.append(payload(None, e))
+    return payloads
+
+
+@pytest.mark.parametrize('columns', FRAMES.values(), ids=FRAMES.keys())
+def test_column_wise_transform_matches_row_wise(mapping, columns):
+    df = pd.DataFrame({'Title': [f"Story {i}" for i in range(ROWS)], **columns()})
+    processor = ExcelProcessor(None)
+    plan = MappingPlan.for_columns(mapping, df.columns)
+    
+    column_wise = [payload(element, error) for _, element, error in processor.iter_elements(df, plan)]
+    assert column_wise == row_wise(processor, df, plan)
+
+
+def test_underscore_columns_are_mapped_but_documentation_keys_are_not():
+    mapping = {'element_fields': {'_comment': 'Basic fields', '_note2': 'More notes', 'Title': 'title',
+                                  '_Internal Slug': 'slug', '_examples': 'title'}}
+    plan = MappingPlan.compile(mapping, ['Title', '_Internal Slug', '_comment', '_note2', '_examples'])
+    
+    assert [column.excel_col for column in plan.sections['element_fields']] == ['Title', '_Internal Slug']
+    assert plan.missing_columns == ()
+
+
+def test_mapping_is_hashed_once_per_dict(mapping, monkeypatch):
+    calls = []
+    mapping_hash = MappingPlan.mapping_hash
+    
+    def counting_hash(config):
+        calls.append(1)
+        return mapping_hash(config)
+    
+    monkeypatch.setattr(MappingPlan, 'mapping_hash', staticmethod(counting_hash))
+    mapping = json.loads(json.dumps(mapping))
+    columns = ['Title', 'Slug']
+    
+    plan = MappingPlan.for_columns(mapping, columns)
+    assert MappingPlan.for_columns(mapping, columns) is plan
+    assert len(calls) == 1
+    
+    # An equal mapping in a new dict is hashed once more and shares the cached plan
+    assert MappingPlan.for_columns(json.loads(json.dumps(mapping)), columns) is plan
+    assert len(calls) == 2
@@ -0,0 +1,36 @@
+"""WorkbookCache: parsed uploads reused by content hash and evicted least recently used first."""
+
+from create_kordiam_example_clean import create_synthetic_workbook
+from kordiam_excel_importer import WorkbookCache
+
+
+def test_workbook_cache_reuses_and_evicts_least_recently_used(workbook, tmp_path):
+    with open(workbook, 'rb') as f:
+        first = f.read()
+    others = []
+    for rows in (5, 6):
+        path = tmp_path / f"other_{rows}.xlsx"
+        create_synthetic_workbook(path, rows)
+        others.append(path.read_bytes())
+    
+    cache = WorkbookCache(max_entries=2)
+    parsed = cache.get(first)
+    assert cache.get(first) is parsed
+    assert parsed.headers[:2] == ['Title', 'Slug'] and parsed.first_row['Slug'] == 'story-0'
+    
+    cache.get(others[0])
+    cache.get(first)  # Most recently used again
+    cache.get(others[1])  # Evicts others[0]
+    assert cache.stats()['entries'] == 2
+    assert cache.get(first) is parsed
+    misses = cache.stats()['misses']
+    cache.get(others[0])
+    assert cache.stats()['misses'] == misses + 1
+
+
+def test_workbook_cache_respects_its_memory_limit(workbook):
+    with open(workbook, 'rb') as f:
+        content = f.read()
+    cache = WorkbookCache(max_bytes=1)
+    assert len(cache.get(content).frame) == 30
+    assert cache.stats() == {'entries': 0, 'bytes': 0, 'hits': 0, 'misses': 1}